@@ -1,13 +1,20 @@
 import sys
-from typing import cast
+import time
 
-from docoloco.config import APPLICATION_ID, default_config
-from .widgets.preferences import PreferencesWindow
+STARTED = time.perf_counter()
 
-import gi
+from typing import cast  # noqa: E402
 
-from .registry import get_registry
-from .widgets import MainWindow
+from docoloco.config import APPLICATION_ID, default_config  # noqa: E402
+
+import gi  # noqa: E402
+
+from . import cli  # noqa: E402
+from .diagnostics.metrics import metrics  # noqa: E402
+from .diagnostics.startup import StartupProfile  # noqa: E402
+from .diagnostics.watchdog import start_watchdog  # noqa: E402
+from .registry import get_registry  # noqa: E402
+from .service import ServiceClient, is_service_running, run_service  # noqa: E402
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
@@ -15,8 +22,9 @@ from gi.repository import Adw, Gtk, Gio, GLib  # noqa: E402
 
 
 class DocoLoco(Adw.Application):
-    def __init__(self):
+    def __init__(self, startup_profile: StartupProfile = None):
         super().__init__(application_id=APPLICATION_ID)
+        self.startup_profile = startup_profile
         GLib.set_application_name("Doco Loco")
         self.connect("activate", self.on_activate)
 
@@ -35,11 +43,102 @@ class DocoLoco(Adw.Application):
                 self.set_accels_for_action(f"app.{name}", shortcut)
 
     def on_activate(self, app):
+        profile = self.startup_profile
+        if profile:
+            profile.mark("application startup")
+
+        from .widgets import MainWindow
+
+        if profile:
+            profile.mark("widget imports")
+
         self.win = MainWindow(app)
         self.win.set_application(self)
         self.win.present()
 
+        registry = get_registry()
+        if profile and not registry.is_loaded:
+            profile.mark("window present")
+            self.win.add_tick_callback(self.on_first_frame)
+            registry.connect("loaded", self.on_profiled_registry_loaded)
+
+        registry.load_in_background()
+        self.attach_to_service()
+        self.start_metrics_dump()
+        start_watchdog()
+
+    def start_metrics_dump(self):
+        """Write the search metrics to the state directory every few seconds, when
+        the `metrics_dump_interval` setting is set
+        """
+
+        interval = default_config.get_setting("metrics_dump_interval", 0)
+        if not interval or getattr(self, "metrics_dump_source_id", None):
+            return
+
+        def dump_metrics():
+            metrics.dump()
+            return GLib.SOURCE_CONTINUE
+
+        self.metrics_dump_source_id = GLib.timeout_add_seconds(
+            int(interval), dump_metrics
+        )
+
+    def on_first_frame(self, *_):
+        self.startup_profile.mark("first frame")
+        self.report_startup_profile()
+        return GLib.SOURCE_REMOVE
+
+    def on_profiled_registry_loaded(self, registry):
+        for provider_id, (started, finished) in registry.load_times.items():
+            self.startup_profile.add(f"load {provider_id}", started, finished)
+        self.report_startup_profile()
+
+    def report_startup_profile(self):
+        """Print the profile once both the first frame and the registry are done"""
+
+        profile = self.startup_profile
+        has_first_frame = any(phase.name == "first frame" for phase in profile.phases)
+        if has_first_frame and get_registry().is_loaded:
+            profile.report()
+            self.startup_profile = None
+
+    def attach_to_service(self):
+        """Show pages that editors open through a running DocoLoco service"""
+
+        socket_path = default_config.service_socket_path.as_posix()
+        if getattr(self, "service_client", None) or not is_service_running(socket_path):
+            return
+
+        self.service_client = ServiceClient(socket_path).connect()
+        self.service_client.attach(
+            lambda event: GLib.idle_add(self.on_service_event, event)
+        )
+
+    def on_service_event(self, event):
+        if event.get("event") != "open" or not event.get("url"):
+            return False
+
+        args = event.get("args")
+        if (
+            isinstance(args, list)
+            and len(args) == 3
+            and all(isinstance(arg, str) for arg in args)
+        ):
+            self.win.activate_action(
+                "win.open_docset_page", GLib.Variant("(sss)", tuple(args))
+            )
+        else:
+            self.win.activate_action(
+                "win.open_page_uri", GLib.Variant.new_string(event["url"])
+            )
+
+        self.win.present()
+        return False
+
     def show_preferences(self, *args):
+        from .widgets.preferences import PreferencesWindow
+
         preferences_window = PreferencesWindow(parent_window=self.win)
         preferences_window.present()
 
@@ -56,9 +155,21 @@ def main(argv=None) -> int:
     if argv is None:
         argv = sys.argv
 
-    get_registry().initialize_providers()
+    if "--service" in argv:
+        return run_service()
+
+    if len(argv) > 1 and argv[1] in cli.COMMANDS:
+        return cli.main(argv[1:])
+
+    startup_profile = None
+    if "--profile-startup" in argv:
+        argv = [arg for arg in argv if arg != "--profile-startup"]
+        startup_profile = StartupProfile(STARTED)
+        startup_profile.mark("imports")
+        default_config.initialize_settings()
+        startup_profile.mark("config")
 
-    app = DocoLoco()
+    app = DocoLoco(startup_profile)
     return app.run(argv)
 
 
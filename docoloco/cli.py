@@ -0,0 +1,231 @@
+import argparse
+import json
+import sys
+import time
+from typing import List, NamedTuple
+
+COMMANDS = ("search", "docsets", "related", "resolve", "open", "memory")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--format", choices=("json", "tsv"), default="json", help="output format"
+    )
+    common.add_argument(
+        "--time", action="store_true", help="print the lookup time to stderr"
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="docoloco", description="Search DocoLoco docsets without a window"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", parents=[common], help="search symbols")
+    search.add_argument("query")
+    search.add_argument("--docset", help="docset name, provider:name or keyword")
+    search.add_argument("--keyword", help="only search docsets known by a keyword")
+    search.add_argument("--section", help="symbol type, e.g. Function")
+    search.add_argument("--limit", type=int, default=100)
+
+    docsets = commands.add_parser(
+        "docsets", parents=[common], help="filter installed docsets"
+    )
+    docsets.add_argument("query", nargs="?", default="")
+    docsets.add_argument("--provider", help="provider id, e.g. zeal or man")
+
+    related = commands.add_parser(
+        "related", parents=[common], help="links related to a page"
+    )
+    related.add_argument("docset")
+    related.add_argument("url")
+
+    resolve = commands.add_parser(
+        "resolve",
+        parents=[common],
+        help="resolve exact symbol names, one per argument, or per line of stdin "
+        "when it is piped or given as -",
+    )
+    resolve.add_argument("names", nargs="*")
+    resolve.add_argument("--docset", help="docset name, provider:name or keyword")
+    resolve.add_argument("--keyword", help="only search docsets known by a keyword")
+
+    open_command = commands.add_parser(
+        "open",
+        parents=[common],
+        help="resolve a symbol in the running service and show it in DocoLoco",
+    )
+    open_command.add_argument("name")
+    open_command.add_argument("--keyword")
+
+    memory = commands.add_parser(
+        "memory", parents=[common], help="estimate the memory held by each docset"
+    )
+    memory.add_argument(
+        "--populate", action="store_true", help="load every section of every docset"
+    )
+    memory.add_argument(
+        "--allocations",
+        action="store_true",
+        help="list the largest allocations made while loading",
+    )
+    memory.add_argument(
+        "--budget-mb", type=float, help="fail when the resident size is above this"
+    )
+
+    return parser
+
+
+def write_records(records: List[NamedTuple], output_format: str):
+    if output_format == "json":
+        json.dump([record._asdict() for record in records], sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    for record in records:
+        values = [
+            ",".join(value) if isinstance(value, list) else str(value)
+            for value in record
+        ]
+        sys.stdout.write("\t".join(values) + "\n")
+
+
+def open_command(args: argparse.Namespace) -> int:
+    """Resolve a symbol in the running DocoLoco service, and show it in the
+    windows attached to it
+    """
+
+    from .config import default_config
+    from .engine import SymbolRecord
+    from .service import ServiceClient, is_service_running
+
+    socket_path = default_config.service_socket_path.as_posix()
+    if not is_service_running(socket_path):
+        print(
+            "open: no DocoLoco service is running, start one with --service",
+            file=sys.stderr,
+        )
+        return 1
+
+    started = time.perf_counter()
+    client = ServiceClient(socket_path)
+    try:
+        client.connect()
+        resolved = client.request("resolve", name=args.name, keyword=args.keyword)
+        response = None
+        if resolved:
+            response = client.request(
+                "open",
+                url=resolved["url"],
+                provider=resolved["provider"],
+                docset=resolved["docset"],
+            )
+    except (OSError, RuntimeError) as e:
+        print(f"open: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - started
+
+    write_records([SymbolRecord(**resolved)] if resolved else [], args.format)
+
+    if args.time:
+        print(f"open: {elapsed * 1000:.2f} ms", file=sys.stderr)
+
+    if not resolved:
+        return 1
+
+    if not response["delivered"]:
+        print("open: no DocoLoco window is attached to the service", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def memory_command(args: argparse.Namespace) -> int:
+    from .diagnostics.memory import allocations, format_bytes, memory_report
+    from .registry import get_registry
+
+    if args.allocations:
+        allocations.take()
+
+    registry = get_registry()
+    registry.initialize_providers()
+    if args.populate:
+        for provider in registry.providers.values():
+            for docset in provider.docs.values():
+                docset.populate_all_sections()
+
+    report = memory_report(registry)
+    if args.allocations:
+        report["allocations"] = [diff._asdict() for diff in allocations.take()]
+
+    if args.format == "json":
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for usage in report["docsets"]:
+            sys.stdout.write(
+                f"{usage['provider']}\t{usage['docset']}\t{usage['total_bytes']}\n"
+            )
+
+    print(
+        f"memory: {format_bytes(report['rss_bytes'])} resident, "
+        f"{format_bytes(report['docsets_bytes'])} estimated in docsets",
+        file=sys.stderr,
+    )
+
+    if args.budget_mb is not None and report["rss_bytes"] > args.budget_mb * 2**20:
+        print(f"memory: above the budget of {args.budget_mb:g} MiB", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def main(argv: List[str]) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "memory":
+        return memory_command(args)
+
+    if args.command == "open":
+        return open_command(args)
+
+    if args.command == "resolve":
+        names = args.names
+        if names == ["-"] or (not names and not sys.stdin.isatty()):
+            names = [line.strip() for line in sys.stdin if line.strip()]
+        elif not names:
+            print("resolve: give the names as arguments, or pipe them", file=sys.stderr)
+            return 2
+
+    from .engine import SearchEngine
+    from .registry import get_registry
+
+    registry = get_registry()
+    registry.initialize_providers()
+    engine = SearchEngine(registry)
+
+    started = time.perf_counter()
+    if args.command == "search":
+        records = engine.symbols(
+            args.query, args.docset, args.keyword, args.section, args.limit
+        )
+    elif args.command == "docsets":
+        records = engine.docsets(args.query, args.provider)
+    elif args.command == "related":
+        records = engine.related(args.docset, args.url)
+    else:
+        records = [
+            record
+            for record in engine.resolve_many(names, args.docset, args.keyword)
+            if record
+        ]
+    elapsed = time.perf_counter() - started
+
+    write_records(records, args.format)
+
+    if args.time:
+        print(f"{args.command}: {elapsed * 1000:.2f} ms", file=sys.stderr)
+
+    return 0
@@ -1,7 +1,6 @@
 from pathlib import Path
 from typing import Dict
 
-import yaml
 from gi.repository import GLib
 
 APPLICATION_ID = "io.github.mepowerleo10.DocoLoco"
@@ -12,8 +11,7 @@ class Config:
         self.ui_dir = Path(__file__).parent / "ui"
         self.templates_dir = self.ui_dir / "templates"
         self.styles_dir = self.ui_dir / "styles"
-        self._settings: Dict = {}
-        self.initialize_settings()
+        self._settings: Dict = None
 
     def template(self, name: str) -> str:
         return (self.templates_dir / f"{name}.ui").as_posix()
@@ -32,6 +30,20 @@ class Config:
     def user_cache_dir(self) -> Path:
         return Path(GLib.get_user_cache_dir())
 
+    @property
+    def application_cache_dir(self) -> Path:
+        cache_dir = self.user_cache_dir / "DocoLoco"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        return cache_dir
+
+    @property
+    def index_dir(self) -> Path:
+        index_dir = self.application_cache_dir / "Indexes"
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        return index_dir
+
     @property
     def user_config_dir(self) -> Path:
         return Path(GLib.get_user_config_dir())
@@ -47,13 +59,37 @@ class Config:
     def user_state_dir(self) -> Path:
         return Path(GLib.get_user_state_dir())
 
+    @property
+    def application_state_dir(self) -> Path:
+        state_dir = self.user_state_dir / "DocoLoco"
+        state_dir.mkdir(parents=True, exist_ok=True)
+
+        return state_dir
+
+    @property
+    def service_socket_path(self) -> Path:
+        return Path(GLib.get_user_runtime_dir()) / f"{APPLICATION_ID}.sock"
+
+    @property
+    def settings(self) -> Dict:
+        if self._settings is None:
+            self.initialize_settings()
+
+        return self._settings
+
+    def get_setting(self, name: str, default=None):
+        return self.settings.get(name, default)
+
     def initialize_settings(self):
+        self._settings = {}
         settings_path = self.application_config_dir / f"{APPLICATION_ID}.yaml"
         if not settings_path.exists():
             return
 
+        import yaml
+
         with open(settings_path, "r+") as settings_file:
-            self._settings = yaml.safe_load(settings_file)
+            self._settings = yaml.safe_load(settings_file) or {}
 
 
 default_config = Config()
@@ -0,0 +1,260 @@
+import os
+import sqlite3
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple
+
+# Items sampled from a list store; the rest are assumed to be of the same size
+SAMPLE_SIZE = 256
+
+# The C side of a GObject instance, which `sys.getsizeof` does not see
+GOBJECT_INSTANCE_BYTES = 64
+
+
+class DocSetMemory(NamedTuple):
+    """Estimated bytes held by a docset. `sqlite_cache_limit_bytes` is the limit
+    of the page cache of its connection, which SQLite fills as pages are read, so
+    it is not part of `total_bytes`.
+    """
+
+    provider: str
+    docset: str
+    section_items: int
+    sections_bytes: int
+    related_bytes: int
+    symbol_strings_bytes: int
+    symbol_filter_bytes: int
+    sqlite_cache_limit_bytes: int
+
+    @property
+    def total_bytes(self) -> int:
+        return (
+            self.sections_bytes
+            + self.related_bytes
+            + self.symbol_strings_bytes
+            + self.symbol_filter_bytes
+        )
+
+    def as_dict(self) -> Dict:
+        return dict(self._asdict(), total_bytes=self.total_bytes)
+
+
+class Process(NamedTuple):
+    pid: int
+    name: str
+    rss_bytes: int
+
+
+class AllocationDiff(NamedTuple):
+    location: str
+    size_diff_bytes: int
+    count_diff: int
+
+
+def object_bytes(value) -> int:
+    """Bytes of a Python object and of the attributes it holds directly"""
+
+    size = sys.getsizeof(value)
+    attributes = getattr(value, "__dict__", None)
+    if attributes:
+        size += sys.getsizeof(attributes)
+        size += sum(sys.getsizeof(attribute) for attribute in attributes.values())
+
+    return size
+
+
+def list_store_bytes(store) -> int:
+    n_items = store.get_n_items() if store is not None else 0
+    if not n_items:
+        return 0
+
+    sampled = min(n_items, SAMPLE_SIZE)
+    sample_bytes = sum(
+        object_bytes(store.get_item(position)) + GOBJECT_INSTANCE_BYTES
+        for position in range(sampled)
+    )
+
+    return sample_bytes * n_items // sampled
+
+
+def sqlite_cache_limit_bytes(con: sqlite3.Connection) -> int:
+    if con is None:
+        return 0
+
+    try:
+        cursor = sqlite3.Cursor(con)
+        cursor.row_factory = None
+        cache_size = cursor.execute("PRAGMA cache_size").fetchone()[0]
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        cursor.close()
+    except sqlite3.Error:
+        return 0
+
+    # Negative cache sizes are in KiB, positive ones in pages
+    return -cache_size * 1024 if cache_size < 0 else cache_size * page_size
+
+
+def docset_memory(docset) -> DocSetMemory:
+    sections = list(docset.sections.values())
+    symbol_strings_bytes = sys.getsizeof(docset.symbol_strings) + sum(
+        sys.getsizeof(aliases) + sum(sys.getsizeof(alias) for alias in aliases)
+        for aliases in docset.symbol_strings.values()
+    )
+    symbol_filter = getattr(docset, "symbol_filter", None)
+
+    return DocSetMemory(
+        docset.provider_id,
+        docset.name,
+        sum(section.get_n_items() for section in sections),
+        sum(list_store_bytes(section) for section in sections),
+        list_store_bytes(getattr(docset, "related_docs", None)),
+        symbol_strings_bytes,
+        len(symbol_filter.bits) if symbol_filter else 0,
+        sqlite_cache_limit_bytes(getattr(docset, "con", None)),
+    )
+
+
+def registry_memory(registry) -> List[DocSetMemory]:
+    return [
+        docset_memory(docset)
+        for provider in list(registry.providers.values())
+        for docset in list(provider.docs.values())
+    ]
+
+
+def process_rss(pid="self") -> int:
+    try:
+        with open(f"/proc/{pid}/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if pid == "self":
+        import resource
+
+        # Peak, rather than current, resident size where /proc is missing
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+    return 0
+
+
+def child_processes(prefix: str = "WebKit") -> List[Process]:
+    """Descendants of this process whose name starts with `prefix`, such as the
+    WebKit web and network processes
+    """
+
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return []
+
+    parents: Dict[int, int] = dict()
+    names: Dict[int, str] = dict()
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+
+        # The name is in parentheses and may hold spaces; the parent pid follows
+        name_end = stat.rindex(")")
+        names[int(entry.name)] = stat[stat.index("(") + 1 : name_end]
+        parents[int(entry.name)] = int(stat[name_end + 2 :].split()[1])
+
+    own_pid = os.getpid()
+
+    def is_descendant(pid: int) -> bool:
+        while pid in parents and pid > 1:
+            pid = parents[pid]
+            if pid == own_pid:
+                return True
+        return False
+
+    return [
+        Process(pid, name, process_rss(pid))
+        for pid, name in sorted(names.items())
+        if name.startswith(prefix) and is_descendant(pid)
+    ]
+
+
+class AllocationTracker:
+    """Diffs `tracemalloc` snapshots: each `take` compares against the previous
+    one, and the first starts tracing
+    """
+
+    def __init__(self, frames: int = 1) -> None:
+        self.frames = frames
+        self.previous: tracemalloc.Snapshot = None
+
+    @property
+    def is_tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def take(self, limit: int = 10) -> List[AllocationDiff]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ]
+        )
+        previous, self.previous = self.previous, snapshot
+        if previous is None:
+            return []
+
+        return [
+            AllocationDiff(str(stat.traceback), stat.size_diff, stat.count_diff)
+            for stat in snapshot.compare_to(previous, "lineno")[:limit]
+        ]
+
+    def stop(self):
+        tracemalloc.stop()
+        self.previous = None
+
+
+allocations = AllocationTracker()
+
+
+def memory_report(registry, pages: Iterable = ()) -> Dict:
+    """Estimates for each docset, the tabs and their WebViews, and the resident
+    size of DocoLoco and its WebKit processes
+    """
+
+    docsets = sorted(
+        registry_memory(registry), key=lambda usage: usage.total_bytes, reverse=True
+    )
+    web_processes = child_processes("WebKit")
+
+    return {
+        "rss_bytes": process_rss(),
+        "docsets_bytes": sum(usage.total_bytes for usage in docsets),
+        "docsets": [usage.as_dict() for usage in docsets],
+        "tabs": [
+            {
+                "title": page.props.title,
+                "docset": page.docset.name if page.docset else None,
+                "has_web_view": page._web_view is not None,
+                "suspended": page.suspended is not None,
+            }
+            for page in pages
+        ],
+        "web_processes": [process._asdict() for process in web_processes],
+        "web_processes_rss_bytes": sum(process.rss_bytes for process in web_processes),
+    }
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+    return f"{size:.1f} GiB"
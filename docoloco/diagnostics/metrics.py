@@ -0,0 +1,197 @@
+import functools
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from ..config import default_config
+
+# Upper bounds of the latency buckets, in milliseconds
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def count_rows(result) -> int:
+    """Rows in a list, or in a list model, returned by a measured call"""
+
+    if result is None:
+        return None
+
+    if hasattr(result, "get_n_items"):
+        return result.get_n_items()
+
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+
+    def add(self, duration_ms: float, rows: int = None):
+        position = 0
+        while (
+            position < len(LATENCY_BUCKETS_MS)
+            and duration_ms > LATENCY_BUCKETS_MS[position]
+        ):
+            position += 1
+
+        self.buckets[position] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        if rows:
+            self.rows += rows
+
+    def percentile(self, percent: float) -> float:
+        """The upper bound of the bucket holding the given percentile"""
+
+        rank = self.count * percent / 100
+        seen = 0
+        for position, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if position < len(LATENCY_BUCKETS_MS):
+                    return LATENCY_BUCKETS_MS[position]
+                return self.max_ms
+
+        return 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "rows": self.rows,
+            "buckets": dict(
+                zip(
+                    [str(bound) for bound in LATENCY_BUCKETS_MS] + ["inf"], self.buckets
+                )
+            ),
+        }
+
+
+class Measurement:
+    """Times a `with` block; set `rows` inside it to record the rows returned"""
+
+    def __init__(self, metrics: "Metrics", name: str) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.rows: int = None
+        self.started: float = None
+
+    def __enter__(self) -> "Measurement":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        duration_ms = (time.perf_counter() - self.started) * 1000
+        self.metrics.record(self.name, duration_ms, self.rows)
+
+
+class Metrics:
+    """Latency histograms, cache hit rates, per-call counts and subprocess time,
+    kept in memory for the debug page and the periodic JSON dump
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.latencies: Dict[str, Histogram] = dict()
+        self.subprocesses: Dict[str, Histogram] = dict()
+        self.caches: Dict[str, List[int]] = dict()
+        # name -> [calls, total, max]
+        self.counts: Dict[str, List[int]] = dict()
+
+    def record(self, name: str, duration_ms: float, rows: int = None):
+        with self.lock:
+            self.latencies.setdefault(name, Histogram()).add(duration_ms, rows)
+
+    def record_subprocess(self, command: str, duration_ms: float):
+        with self.lock:
+            self.subprocesses.setdefault(command, Histogram()).add(duration_ms)
+
+    def record_cache(self, name: str, hit: bool):
+        with self.lock:
+            counts = self.caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def record_count(self, name: str, value: int):
+        """Record how many of something one call saw, e.g. docsets it pruned"""
+
+        with self.lock:
+            counts = self.counts.setdefault(name, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += value
+            counts[2] = max(counts[2], value)
+
+    def measure(self, name: str) -> Measurement:
+        return Measurement(self, name)
+
+    def timed(self, name: str) -> Callable:
+        """Decorate a function to record its latency and the rows it returns"""
+
+        def decorator(function: Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.measure(name) as measurement:
+                    result = function(*args, **kwargs)
+                    measurement.rows = count_rows(result)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {
+                "started": self.started,
+                "captured": time.time(),
+                "latencies": {
+                    name: histogram.as_dict()
+                    for name, histogram in sorted(self.latencies.items())
+                },
+                "subprocesses": {
+                    command: histogram.as_dict()
+                    for command, histogram in sorted(self.subprocesses.items())
+                },
+                "caches": {
+                    name: {
+                        "hits": hits,
+                        "misses": misses,
+                        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                    }
+                    for name, (hits, misses) in sorted(self.caches.items())
+                },
+                "counts": {
+                    name: {
+                        "calls": calls,
+                        "total": total,
+                        "mean": total / calls if calls else 0.0,
+                        "max": maximum,
+                    }
+                    for name, (calls, total, maximum) in sorted(self.counts.items())
+                },
+            }
+
+    def dump(self, path: Path = None) -> Path:
+        path = path or default_config.application_state_dir / "metrics.json"
+        partial_path = path.with_suffix(".partial")
+        with open(partial_path, "w") as metrics_file:
+            json.dump(self.snapshot(), metrics_file, indent=2)
+        partial_path.replace(path)
+
+        return path
+
+
+metrics = Metrics()
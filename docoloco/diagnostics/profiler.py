@@ -0,0 +1,206 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from ..config import default_config
+
+SAMPLE_INTERVAL = 0.005
+
+# How long `stop` waits for worker threads to stop their own profilers
+WORKER_STOP_TIMEOUT = 0.5
+
+
+class ProfileSnapshot:
+    """The stats of a worker thread's profiler, for `pstats`, which would
+    otherwise disable it from the wrong thread
+    """
+
+    def __init__(self, profile: cProfile.Profile) -> None:
+        profile.snapshot_stats()
+        self.stats = profile.stats
+
+    def create_stats(self):
+        pass
+
+
+def collapsed_stack(frame) -> List[str]:
+    stack = []
+    while frame:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+        frame = frame.f_back
+
+    return list(reversed(stack))
+
+
+class SessionProfiler:
+    """Profiles a slice of a session.
+
+    cProfile runs on the thread that starts the profiler and on threads started
+    while it runs; threads that were already running are only profiled on
+    Python 3.12+. A sampling thread records collapsed stacks of every thread for
+    flame graphs.
+
+    Before 3.12, a profiler can only be disabled from its own thread, so worker
+    threads check a stop flag on every profiled event and stop theirs.
+    """
+
+    def __init__(self) -> None:
+        self.profiles: List[cProfile.Profile] = []
+        self.samples: Counter = Counter()
+        self.is_running = False
+        self.started: float = None
+
+        self._lock = threading.Lock()
+        self._sampler: threading.Thread = None
+        self._main_profile: cProfile.Profile = None
+        self._stopping: threading.Event = None
+        self._stopped: Set[cProfile.Profile] = set()
+        self._threads: Dict[cProfile.Profile, threading.Thread] = dict()
+
+    def start(self):
+        if self.is_running:
+            return
+
+        self.profiles = []
+        self.samples = Counter()
+        self.is_running = True
+        self.started = time.time()
+        self._stopping = threading.Event()
+        self._stopped = set()
+        self._threads = dict()
+
+        # Started first, so that the sampler itself is not profiled
+        self._sampler = threading.Thread(
+            target=self._sample, name="profiler-sampler", daemon=True
+        )
+        self._sampler.start()
+
+        threading.setprofile(self._profile_new_thread)
+        if hasattr(threading, "setprofile_all_threads"):
+            threading.setprofile_all_threads(self._profile_new_thread)
+
+        self._main_profile = cProfile.Profile()
+        self.profiles.append(self._main_profile)
+        self._main_profile.enable()
+
+    def stop(self) -> Tuple[Path, Path]:
+        """Stop profiling, and return the paths of the pstats and collapsed stacks"""
+
+        if not self.is_running:
+            return None
+
+        self.is_running = False
+        threading.setprofile(None)
+        if hasattr(threading, "setprofile_all_threads"):
+            threading.setprofile_all_threads(None)
+
+        self._stopping.set()
+        self._main_profile.disable()
+        self._sampler.join()
+        self._wait_for_workers()
+
+        return self.save()
+
+    def _stopped_workers(self) -> List[cProfile.Profile]:
+        """Worker profilers that no longer run: their thread stopped them, or ended"""
+
+        with self._lock:
+            return [
+                profile
+                for profile, thread in self._threads.items()
+                if profile in self._stopped or not thread.is_alive()
+            ]
+
+    def _wait_for_workers(self):
+        deadline = time.monotonic() + WORKER_STOP_TIMEOUT
+        while len(self._stopped_workers()) < len(self._threads):
+            if time.monotonic() > deadline:
+                return
+            time.sleep(0.01)
+
+    def toggle(self) -> Tuple[Path, Path]:
+        if self.is_running:
+            return self.stop()
+
+        self.start()
+        return None
+
+    def save(self) -> Tuple[Path, Path]:
+        profiles_dir = default_config.application_state_dir / "profiles"
+        profiles_dir.mkdir(parents=True, exist_ok=True)
+        stem = time.strftime("profile-%Y%m%d-%H%M%S", time.localtime(self.started))
+
+        stats_path = profiles_dir / f"{stem}.pstats"
+        # Threads blocked since the stop still hold a running profiler
+        workers = self._stopped_workers()
+        running = len(self._threads) - len(workers)
+        if running:
+            print(f"Left out {running} threads that did not stop profiling in time")
+
+        stats = pstats.Stats(self._main_profile)
+        for profile in workers:
+            if profile.getstats():
+                stats.add(ProfileSnapshot(profile))
+        stats.dump_stats(stats_path)
+
+        collapsed_path = profiles_dir / f"{stem}.collapsed"
+        with open(collapsed_path, "w") as collapsed_file:
+            for stack, count in self.samples.most_common():
+                collapsed_file.write(f"{stack} {count}\n")
+
+        return stats_path, collapsed_path
+
+    def _enable_on_current_thread(self):
+        stopping = self._stopping
+
+        def timer() -> float:
+            if stopping.is_set():
+                # `disable` would free the call stack this callback is still
+                # using, so only this thread's hook is removed
+                sys.setprofile(None)
+                with self._lock:
+                    self._stopped.add(profile)
+
+            return time.perf_counter()
+
+        profile = cProfile.Profile(timer)
+        with self._lock:
+            self.profiles.append(profile)
+            self._threads[profile] = threading.current_thread()
+        profile.enable()
+
+    def _profile_new_thread(self, *_):
+        # Runs as the profile function of each new thread: it replaces itself
+        # with a cProfile profiler for that thread
+        sys.setprofile(None)
+        if self.is_running:
+            self._enable_on_current_thread()
+
+    def _sample(self):
+        sampler_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        while self.is_running:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_id:
+                    continue
+
+                if thread_id not in names:
+                    names = {
+                        thread.ident: thread.name for thread in threading.enumerate()
+                    }
+                thread_name = names.get(thread_id, str(thread_id))
+                stack = ";".join([thread_name] + collapsed_stack(frame))
+                self.samples[stack] += 1
+
+            time.sleep(SAMPLE_INTERVAL)
+
+
+profiler = SessionProfiler()
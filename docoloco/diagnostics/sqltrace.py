@@ -0,0 +1,240 @@
+import logging
+import logging.handlers
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+from ..config import default_config
+
+# Progress callbacks run every this many SQLite virtual machine instructions
+PROGRESS_STEPS = 1000
+
+logger = logging.getLogger("docoloco.sql")
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Times a statement across its `execute` and the fetches that follow it, and
+    reports it to the connection's tracer once it is done
+    """
+
+    connection: "TracedConnection"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._statement: str = None
+        self._expanded_statement: str = None
+        self._parameters = ()
+        self._elapsed = 0.0
+        self._steps = 0
+
+    def execute(self, sql: str, parameters=()):
+        self._finish_statement()
+
+        self._statement, self._parameters = sql, parameters
+        self._elapsed = 0.0
+        self._steps = self.connection.progress_steps
+        self.connection.trace_context.expanded_statement = None
+        self._timed(super().execute, sql, parameters)
+        self._expanded_statement = self.connection.trace_context.expanded_statement
+
+        if self.description is None:
+            self._finish_statement()
+
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters):
+        self._finish_statement()
+
+        self._statement, self._parameters = sql, ()
+        self._elapsed = 0.0
+        self._steps = self.connection.progress_steps
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._expanded_statement = sql
+        self._finish_statement()
+
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish_statement()
+
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._timed(super().fetchmany, *args, **kwargs)
+        if not rows:
+            self._finish_statement()
+
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._finish_statement()
+
+        return rows
+
+    def __next__(self):
+        try:
+            return self._timed(super().__next__)
+        except StopIteration:
+            self._finish_statement()
+            raise
+
+    def close(self):
+        self._finish_statement()
+        super().close()
+
+    def __del__(self):
+        # Cursors that are dropped before their rows run out are logged here
+        statement = getattr(self, "_statement", None)
+        if statement is None:
+            return
+
+        try:
+            self._finish_statement()
+        except sqlite3.Error as e:
+            print(f"Could not trace {statement!r}: {e}")
+
+    def _timed(self, method, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def _finish_statement(self):
+        statement, self._statement = self._statement, None
+        if statement is None:
+            return
+
+        steps = (self.connection.progress_steps - self._steps) * PROGRESS_STEPS
+        self.connection.tracer.finish(
+            self.connection,
+            statement,
+            self._parameters,
+            self._expanded_statement or statement,
+            self._elapsed,
+            steps,
+        )
+
+
+class TracedConnection(sqlite3.Connection):
+    tracer: "QueryTracer" = None
+    docset_name: str = None
+    progress_steps = 0
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Connections are shared across threads; the trace callback runs in
+        # the thread that executes the statement
+        self.trace_context = threading.local()
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TracedCursor)
+
+    def execute(self, sql: str, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def on_progress(self) -> int:
+        self.progress_steps += 1
+        return 0
+
+    def on_trace(self, statement: str):
+        self.trace_context.expanded_statement = statement
+
+
+class QueryTracer:
+    """Logs statements slower than `threshold_ms`, with their query plan, to a
+    rotating log file. Plans with a `SCAN` step are marked as full scans.
+    """
+
+    def __init__(self, log_path: Path, threshold_ms: float) -> None:
+        self.threshold_ms = threshold_ms
+        self.log_path = log_path
+
+        if not logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=1024 * 1024, backupCount=3
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    def connect(self, path: Path, docset_name: str, **kwargs) -> TracedConnection:
+        con: TracedConnection = sqlite3.connect(
+            path, factory=TracedConnection, **kwargs
+        )
+        con.tracer = self
+        con.docset_name = docset_name
+        con.set_progress_handler(con.on_progress, PROGRESS_STEPS)
+        con.set_trace_callback(con.on_trace)
+
+        return con
+
+    def finish(
+        self,
+        con: TracedConnection,
+        statement: str,
+        parameters,
+        expanded_statement: str,
+        elapsed: float,
+        steps: int,
+    ):
+        duration_ms = elapsed * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        plan = self.query_plan(con, statement, parameters)
+        full_scan = any(step.startswith("SCAN") for step in plan)
+        logger.info(
+            "%s %.1f ms, ~%d steps%s: %s%s",
+            con.docset_name,
+            duration_ms,
+            steps,
+            ", full scan" if full_scan else "",
+            " ".join(expanded_statement.split()),
+            "".join(f"\n    {step}" for step in plan),
+        )
+
+    def query_plan(
+        self, con: TracedConnection, statement: str, parameters
+    ) -> List[str]:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return []
+
+        cursor = sqlite3.Cursor(con)
+        cursor.row_factory = None
+        try:
+            rows = cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[3] for row in rows.fetchall()]
+        except sqlite3.Error as e:
+            return [f"(no plan: {e})"]
+        finally:
+            cursor.close()
+
+
+_tracer: QueryTracer = None
+
+
+def connect_docset(path: Path, docset_name: str) -> sqlite3.Connection:
+    """A connection to a docset database, traced when `slow_query_log` is set"""
+
+    global _tracer
+
+    if not default_config.get_setting("slow_query_log", False):
+        return sqlite3.connect(path, check_same_thread=False)
+
+    if not _tracer:
+        _tracer = QueryTracer(
+            default_config.application_state_dir / "slow-queries.log",
+            float(default_config.get_setting("slow_query_threshold_ms", 50)),
+        )
+
+    return _tracer.connect(path, docset_name, check_same_thread=False)
@@ -0,0 +1,48 @@
+import sys
+import time
+from typing import List, NamedTuple, TextIO
+
+
+class StartupPhase(NamedTuple):
+    name: str
+    started: float
+    finished: float
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+class StartupProfile:
+    """Times the phases of a cold start, from the first import until the window
+    has drawn its first frame and every provider has loaded.
+    """
+
+    def __init__(self, started: float = None) -> None:
+        self.started = started if started is not None else time.perf_counter()
+        self.phases: List[StartupPhase] = []
+        self._last_mark = self.started
+
+    def mark(self, name: str) -> None:
+        """End a phase that began when the previous one ended"""
+
+        now = time.perf_counter()
+        self.add(name, self._last_mark, now)
+        self._last_mark = now
+
+    def add(self, name: str, started: float, finished: float) -> None:
+        self.phases.append(StartupPhase(name, started, finished))
+
+    def report(self, file: TextIO = None):
+        file = file or sys.stderr
+        print("Startup profile (ms)        start  duration", file=file)
+        for phase in sorted(self.phases, key=lambda phase: phase.started):
+            offset = (phase.started - self.started) * 1000
+            duration = phase.duration * 1000
+            print(f"  {phase.name:<24} {offset:>7.1f}  {duration:>8.1f}", file=file)
+
+        finished = max((phase.finished for phase in self.phases), default=self.started)
+        print(
+            f"  {'total':<24} {0:>7.1f}  {(finished - self.started) * 1000:>8.1f}",
+            file=file,
+        )
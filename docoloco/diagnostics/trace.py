@@ -0,0 +1,60 @@
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from ..config import default_config
+
+# A keystroke trace is a JSON lines file of what the locator searched for:
+#   {"at_ms": 0.0, "text": "o", "docset": "zeal:Python_3", "section": null}
+# `at_ms` restarts at zero whenever a new recording session begins.
+
+
+class KeystrokeRecorder:
+    """Appends every locator search, and when it happened, to a trace file"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.started: float = None
+
+    def record(self, text: str, docset=None, section=None):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+
+        event = {
+            "at_ms": round((now - self.started) * 1000, 1),
+            "text": text,
+            "docset": f"{docset.provider_id}:{docset.name}" if docset else None,
+            "section": section.title if section else None,
+        }
+        with open(self.path, "a") as trace_file:
+            trace_file.write(json.dumps(event) + "\n")
+
+
+_recorder: KeystrokeRecorder = None
+
+
+def get_keystroke_recorder() -> KeystrokeRecorder:
+    """The recorder for the `keystroke_trace` setting, if it is set"""
+
+    global _recorder
+
+    path = default_config.get_setting("keystroke_trace")
+    if path and not _recorder:
+        _recorder = KeystrokeRecorder(Path(path).expanduser())
+
+    return _recorder
+
+
+def read_trace(path: Path) -> Iterator[Dict]:
+    with open(path) as trace_file:
+        for line in trace_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_trace(path: Path, events: List[Dict]):
+    with open(path, "w") as trace_file:
+        for event in events:
+            trace_file.write(json.dumps(event) + "\n")
@@ -0,0 +1,153 @@
+import logging
+import logging.handlers
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import List
+
+from gi.repository import GLib
+
+from ..config import default_config
+from .metrics import metrics
+
+logger = logging.getLogger("docoloco.watchdog")
+
+PACKAGE_DIR = Path(__file__).parent.parent
+
+
+def handler_frame(stack: traceback.StackSummary) -> traceback.FrameSummary:
+    """The outermost DocoLoco frame below the main loop, usually the signal or
+    action handler that blocked it
+    """
+
+    for frame in stack:
+        path = Path(frame.filename)
+        if PACKAGE_DIR in path.parents and path.name != "__main__.py":
+            return frame
+
+    return stack[-1] if stack else None
+
+
+class MainLoopWatchdog:
+    """Logs the main thread's stack whenever the GLib main loop stops iterating
+    for longer than `threshold_ms`.
+
+    A timeout on the main loop records a heartbeat every `interval_ms`, and a
+    background thread checks how late the next heartbeat is.
+    """
+
+    def __init__(self, threshold_ms: int, interval_ms: int = 250) -> None:
+        self.threshold = threshold_ms / 1000
+        self.interval_ms = interval_ms
+        self.interval = interval_ms / 1000
+
+        self.main_thread_id: int = None
+        self.last_beat = time.monotonic()
+        self.stall_stacks: List[traceback.StackSummary] = []
+        self._stacks_lock = threading.Lock()
+
+        self._source_id = 0
+        self._thread: threading.Thread = None
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+
+        self.main_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._running = True
+        self._source_id = GLib.timeout_add(self.interval_ms, self._beat)
+        self._thread = threading.Thread(
+            target=self._watch, name="main-loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._source_id:
+            GLib.source_remove(self._source_id)
+            self._source_id = 0
+
+    def _beat(self):
+        now = time.monotonic()
+        # The time the main loop was late by, beyond the expected interval
+        stalled_for = now - self.last_beat - self.interval
+        self.last_beat = now
+
+        with self._stacks_lock:
+            stacks, self.stall_stacks = self.stall_stacks, []
+
+        if stacks:
+            self._report(stalled_for, stacks)
+
+        return GLib.SOURCE_CONTINUE
+
+    def _watch(self):
+        next_capture = self.threshold
+        while self._running:
+            time.sleep(self.interval)
+
+            stalled_for = time.monotonic() - self.last_beat - self.interval
+            if stalled_for < self.threshold:
+                next_capture = self.threshold
+                continue
+
+            # Capture once when the stall is detected, then each threshold after
+            if stalled_for >= next_capture:
+                frame = sys._current_frames().get(self.main_thread_id)
+                if frame:
+                    stack = traceback.extract_stack(frame)
+                    with self._stacks_lock:
+                        self.stall_stacks.append(stack)
+                next_capture += self.threshold
+
+    def _report(self, stalled_for: float, stacks: List[traceback.StackSummary]):
+        duration_ms = stalled_for * 1000
+        metrics.record("main loop stall", duration_ms)
+
+        frame = handler_frame(stacks[0])
+        location = (
+            f"{frame.name} ({Path(frame.filename).name}:{frame.lineno})"
+            if frame
+            else "unknown"
+        )
+        logger.warning(
+            "Main loop stalled for %.0f ms in %s\n%s",
+            duration_ms,
+            location,
+            "".join(stacks[-1].format()),
+        )
+
+
+_watchdog: MainLoopWatchdog = None
+
+
+def start_watchdog() -> MainLoopWatchdog:
+    """Watch the main loop from the calling (main) thread when the
+    `stall_threshold_ms` setting is set
+    """
+
+    global _watchdog
+
+    threshold_ms = int(default_config.get_setting("stall_threshold_ms", 0))
+    if not threshold_ms or _watchdog:
+        return _watchdog
+
+    if not logger.handlers:
+        handler = logging.handlers.RotatingFileHandler(
+            default_config.application_state_dir / "stalls.log",
+            maxBytes=1024 * 1024,
+            backupCount=3,
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    _watchdog = MainLoopWatchdog(threshold_ms)
+    _watchdog.start()
+
+    return _watchdog
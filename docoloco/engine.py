@@ -0,0 +1,165 @@
+from typing import Dict, List, NamedTuple, Optional
+
+from .models import Doc, DocSet, SymbolLookup, symbol_lookup
+from .providers import DocumentationProvider
+
+
+class DocSetRecord(NamedTuple):
+    provider: str
+    name: str
+    title: str
+    keywords: List[str]
+
+
+class SymbolRecord(NamedTuple):
+    provider: str
+    docset: str
+    name: str
+    type: str
+    url: str
+
+
+def symbol_record(docset: DocSet, doc: Doc) -> SymbolRecord:
+    return SymbolRecord(docset.provider_id, docset.name, doc.name, doc.type, doc.url)
+
+
+class SearchEngine:
+    """Docset filtering, symbol search and related-link lookup as plain records.
+
+    Unlike `Registry.search` and `SearchProvider`, nothing here builds list models
+    or action variants, so it can run without a window or a display.
+    """
+
+    def __init__(self, registry) -> None:
+        self.registry = registry
+
+    @property
+    def providers(self) -> List[DocumentationProvider]:
+        return list(self.registry.providers.values())
+
+    def docsets(self, query: str = "", provider_id: str = None) -> List[DocSetRecord]:
+        records = []
+        for provider in self.providers:
+            if provider_id and provider.id != provider_id:
+                continue
+
+            if (
+                not provider_id
+                and provider.type == DocumentationProvider.Type.QUERYABLE
+            ):
+                continue
+
+            for docset in provider.find_docsets(query):
+                records.append(
+                    DocSetRecord(
+                        provider.id, docset.name, docset.title, sorted(docset.keywords)
+                    )
+                )
+
+        return records
+
+    def find_docset(self, name: str) -> DocSet:
+        """A docset by name, by `provider:name` or by keyword"""
+
+        provider_id = None
+        if ":" in name:
+            provider_id, name = name.split(":", 1)
+
+        for provider in self.providers:
+            if provider_id and provider.id != provider_id:
+                continue
+
+            if name in provider.docs:
+                return provider.docs[name]
+
+            by_keyword = provider.find_docsets_by_keyword(name)
+            if by_keyword:
+                return by_keyword[0]
+
+        return None
+
+    def symbols(
+        self,
+        query: str,
+        docset: str = None,
+        keyword: str = None,
+        section: str = None,
+        limit: int = 100,
+    ) -> List[SymbolRecord]:
+        if docset:
+            target = self.find_docset(docset)
+            if not target:
+                raise ValueError(f"Unknown docset {docset}")
+
+            return [
+                symbol_record(target, doc)
+                for doc in target.find_symbols(query, section, limit)
+            ]
+
+        records = []
+        for provider in self.providers:
+            if provider.type == DocumentationProvider.Type.QUERYABLE:
+                continue
+
+            keywords = [keyword] if keyword else None
+            for found_docset, doc in provider.find_symbols(query, keywords, limit):
+                records.append(symbol_record(found_docset, doc))
+
+        return records[:limit]
+
+    def related(self, docset: str, url: str) -> List[SymbolRecord]:
+        target = self.find_docset(docset)
+        if not target:
+            raise ValueError(f"Unknown docset {docset}")
+
+        return [symbol_record(target, doc) for doc in target.find_related(url)]
+
+    def resolve(self, name: str, keyword: str = None) -> SymbolRecord:
+        """The best match for a symbol name, preferring exact matches"""
+
+        records = self.symbols(name, keyword=keyword)
+        for record in records:
+            if record.name == name:
+                return record
+
+        return records[0] if records else None
+
+    def resolve_many(
+        self, names: List, docset: str = None, keyword: str = None
+    ) -> List[Optional[SymbolRecord]]:
+        """The best match for each exact symbol name, in the order of `names`, or
+        `None` for names that were not found. Names are looked up in batches.
+
+        Every docset is queried once for the names that are still unresolved, so
+        the cost grows with the number of docsets rather than with the names.
+        """
+
+        if docset:
+            target = self.find_docset(docset)
+            if not target:
+                raise ValueError(f"Unknown docset {docset}")
+            targets = [target]
+        else:
+            targets = []
+            for provider in self.providers:
+                if provider.type == DocumentationProvider.Type.QUERYABLE:
+                    continue
+
+                if keyword:
+                    targets.extend(provider.find_docsets_by_keyword(keyword))
+                else:
+                    targets.extend(provider.docs.values())
+
+        lookups = [symbol_lookup(name) for name in names]
+        pending = list(dict.fromkeys(lookups))
+        records: Dict[SymbolLookup, SymbolRecord] = dict()
+        for target in targets:
+            if not pending:
+                break
+
+            for lookup, doc in target.resolve_symbols(pending).items():
+                records[lookup] = symbol_record(target, doc)
+
+            pending = [lookup for lookup in pending if lookup not in records]
+
+        return [records.get(lookup) for lookup in lookups]
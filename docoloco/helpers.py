@@ -17,9 +17,21 @@ def add_symmetric_margins(widget, vertical: int = None, horizontal: int = None):
     if horizontal:
         add_margin(widget, {"start": horizontal, "end": horizontal})
 
+
+def plurarize(val: str) -> str:
+    last_char = val[-1]
+    match last_char:
+        case "s":
+            return f"{val}es"
+        case "y":
+            return f"{val[:-1]}ies"
+        case _:
+            return f"{val}s"
+
+
 def is_valid_url(url):
     try:
         result = urlparse(url)
         return bool(result.netloc)
     except ValueError:
-        return False
\ No newline at end of file
+        return False
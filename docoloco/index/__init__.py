@@ -0,0 +1,40 @@
+import html
+import sqlite3
+from pathlib import Path
+
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+TRIGRAM_LENGTH = 3
+
+
+def open_database(path: Path) -> sqlite3.Connection:
+    """Open an index database that can be read while a background worker writes to it"""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+
+    return con
+
+
+def fts_query(term: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix"""
+
+    words = [word.replace('"', '""') for word in term.split()]
+    if not words:
+        return ""
+
+    phrases = [f'"{word}"' for word in words]
+    phrases[-1] = f"{phrases[-1]}*"
+
+    return " ".join(phrases)
+
+
+def snippet_markup(snippet: str) -> str:
+    """Convert a snippet highlighted with `SNIPPET_START`/`SNIPPET_END` into Pango markup"""
+
+    snippet = " ".join(snippet.split())
+    return (
+        html.escape(snippet).replace(SNIPPET_START, "<b>").replace(SNIPPET_END, "</b>")
+    )
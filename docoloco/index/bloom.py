@@ -0,0 +1,93 @@
+import hashlib
+import math
+from typing import Iterable, List, Set, Tuple
+
+from . import TRIGRAM_LENGTH
+
+# Filters are sized for this rate of false positives per trigram...
+FALSE_POSITIVE_RATE = 0.01
+BITS_PER_TRIGRAM = math.ceil(-math.log(FALSE_POSITIVE_RATE) / math.log(2) ** 2)
+HASH_COUNT = round(BITS_PER_TRIGRAM * math.log(2))
+MIN_BITS = 1024
+MAX_BITS = 1024 * 1024 * 8
+# ...and not worth checking once the cap pushes it above this one
+MAX_FALSE_POSITIVE_RATE = 0.1
+
+# Bumped whenever the way filters are built changes, to rebuild stored ones
+FILTER_VERSION = 2
+
+
+def trigrams_of(value: str) -> Set[str]:
+    value = value.lower()
+    return {
+        value[start : start + TRIGRAM_LENGTH]
+        for start in range(len(value) - TRIGRAM_LENGTH + 1)
+    }
+
+
+def trigram_hashes(trigram: str) -> Tuple[int, int]:
+    digest = hashlib.blake2b(trigram.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest[:4], "little"), int.from_bytes(digest[4:], "little")
+
+
+class TrigramBloomFilter:
+    """A Bloom filter over the trigrams of a docset's lowercased symbol names.
+
+    A name can only contain a query as a substring if it contains all of the
+    query's trigrams, so a negative answer means the docset has no match.
+    """
+
+    def __init__(self, bits: bytes, hash_count: int = HASH_COUNT) -> None:
+        self.bits = bits
+        self.size = len(bits) * 8
+        self.hash_count = hash_count
+        self.fill_ratio = (
+            int.from_bytes(bits, "little").bit_count() / self.size if bits else 1.0
+        )
+
+    @property
+    def false_positive_rate(self) -> float:
+        """The chance that a trigram the docset lacks is reported as present"""
+        return self.fill_ratio**self.hash_count
+
+    @property
+    def is_saturated(self) -> bool:
+        return self.false_positive_rate > MAX_FALSE_POSITIVE_RATE
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "TrigramBloomFilter":
+        trigrams: Set[str] = set()
+        for name in names:
+            if name:
+                trigrams.update(trigrams_of(name))
+
+        size = min(max(len(trigrams) * BITS_PER_TRIGRAM, MIN_BITS), MAX_BITS)
+        bits = bytearray((size + 7) // 8)
+        bloom_filter = cls(bits)
+        for trigram in trigrams:
+            for position in bloom_filter.positions(trigram_hashes(trigram)):
+                bits[position >> 3] |= 1 << (position & 7)
+
+        return cls(bytes(bits))
+
+    def positions(self, hashes: Tuple[int, int]) -> List[int]:
+        first, second = hashes
+        return [
+            (first + index * second) % self.size for index in range(self.hash_count)
+        ]
+
+    def might_contain(self, query_hashes: List[Tuple[int, int]]) -> bool:
+        """Whether a name may contain every trigram, given by `trigram_hashes`"""
+
+        for hashes in query_hashes:
+            for position in self.positions(hashes):
+                if not self.bits[position >> 3] & (1 << (position & 7)):
+                    return False
+
+        return True
+
+
+def query_hashes(term: str) -> List[Tuple[int, int]]:
+    """Hashes of a query's trigrams, computed once and checked against many filters"""
+
+    return [trigram_hashes(trigram) for trigram in trigrams_of(term)]
@@ -0,0 +1,116 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+from . import open_database
+from .bloom import FILTER_VERSION, TrigramBloomFilter
+from .manifest import file_stat
+
+
+class CatalogEntry(NamedTuple):
+    name: str
+    stamp: str
+    bloom_filter: TrigramBloomFilter
+
+
+class CatalogSource(NamedTuple):
+    name: str
+    database_path: Path
+    table_name: str
+
+
+def database_stamp(database_path: Path) -> str:
+    return json.dumps([*file_stat(database_path), FILTER_VERSION])
+
+
+class DocSetCatalog:
+    """Per-docset data that is precomputed once and loaded at startup.
+
+    Entries are keyed by the docset database path and are stale as soon as the
+    database size or mtime changes.
+    """
+
+    def __init__(self, database_path: Path) -> None:
+        self.database_path = database_path
+        self.con = open_database(self.database_path)
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS docsets (
+                database_path TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                stamp TEXT NOT NULL,
+                bloom_filter BLOB NOT NULL
+            )
+            """)
+        self.entries: Dict[str, CatalogEntry] = dict()
+
+        self._update_thread: threading.Thread = None
+
+    def load(self) -> None:
+        for database_path, name, stamp, bloom_filter in self.con.execute(
+            "SELECT database_path, name, stamp, bloom_filter FROM docsets"
+        ):
+            self.entries[database_path] = CatalogEntry(
+                name, stamp, TrigramBloomFilter(bloom_filter)
+            )
+
+    def get(self, database_path: Path) -> CatalogEntry:
+        """The entry for a docset, if it is still up to date"""
+
+        entry = self.entries.get(database_path.as_posix())
+        if entry and entry.stamp == database_stamp(database_path):
+            return entry
+
+        return None
+
+    def update_in_background(self, sources: List[CatalogSource], on_entry=None):
+        """Build the entries of `sources`, calling `on_entry(source, entry)` for each"""
+
+        self._update_thread = threading.Thread(
+            target=self.update,
+            args=(sources, on_entry),
+            name="docset-catalog",
+            daemon=True,
+        )
+        self._update_thread.start()
+
+    def update(self, sources: List[CatalogSource], on_entry=None) -> None:
+        con = open_database(self.database_path)
+        try:
+            for source in sources:
+                try:
+                    entry = self._build_entry(source)
+                except Exception as e:
+                    print(f"Could not catalog {source.name}: {e}")
+                    continue
+
+                con.execute(
+                    "INSERT OR REPLACE INTO docsets VALUES (?, ?, ?, ?)",
+                    (
+                        source.database_path.as_posix(),
+                        entry.name,
+                        entry.stamp,
+                        entry.bloom_filter.bits,
+                    ),
+                )
+                con.commit()
+                self.entries[source.database_path.as_posix()] = entry
+
+                if on_entry:
+                    on_entry(source, entry)
+        finally:
+            con.close()
+
+    def _build_entry(self, source: CatalogSource) -> CatalogEntry:
+        stamp = database_stamp(source.database_path)
+        con = sqlite3.connect(f"{source.database_path.as_uri()}?mode=ro", uri=True)
+        try:
+            names = (
+                row[0] for row in con.execute(f"SELECT name FROM {source.table_name}")
+            )
+            bloom_filter = TrigramBloomFilter.from_names(names)
+        finally:
+            con.close()
+
+        return CatalogEntry(source.name, stamp, bloom_filter)
@@ -0,0 +1,216 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import List, NamedTuple, Tuple
+
+from . import SNIPPET_END, SNIPPET_START, fts_query, open_database
+from .manifest import DocSetManifest
+
+DOCUMENT_SUFFIXES = (".html", ".htm", ".xhtml")
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg"}
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ContentMatch(NamedTuple):
+    title: str
+    path: str
+    snippet: str
+
+
+class HTMLTextExtractor(HTMLParser):
+    """Collects the title and visible text of an HTML document as it is fed"""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+
+        self.title_parts: List[str] = []
+        self.text_parts: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skip_depth > 0:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+
+        if self._in_title:
+            self.title_parts.append(data)
+        else:
+            self.text_parts.append(data)
+
+    @property
+    def title(self) -> str:
+        return " ".join("".join(self.title_parts).split())
+
+    @property
+    def text(self) -> str:
+        return " ".join(" ".join(self.text_parts).split())
+
+
+def extract_document(path: str) -> Tuple[str, str]:
+    """Return the title and text of an HTML file, reading it in chunks"""
+
+    extractor = HTMLTextExtractor()
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as document:
+            while chunk := document.read(READ_CHUNK_SIZE):
+                extractor.feed(chunk)
+        extractor.close()
+    except Exception as e:
+        print(f"Could not index {path}: {e}")
+
+    return extractor.title, extractor.text
+
+
+class DocSetContentIndex:
+    """A per-docset SQLite FTS5 index over the text of the Documents tree.
+
+    HTML is stripped in a pool of worker processes, the results are written from
+    a single background thread. Only documents reported as changed by the
+    docset's manifest are reindexed.
+    """
+
+    batch_size = 500
+
+    def __init__(
+        self,
+        database_path: Path,
+        documents_dir: Path,
+        manifest: DocSetManifest,
+        max_workers: int = None,
+    ) -> None:
+        self.database_path = database_path
+        self.documents_dir = documents_dir
+        self.manifest = manifest
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.con = open_database(self.database_path)
+        self._create_tables()
+
+        self._update_lock = threading.Lock()
+        self._update_thread: threading.Thread = None
+
+    def _create_tables(self):
+        self.con.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                title, body
+            );
+            """)
+
+    @property
+    def is_updating(self) -> bool:
+        return self._update_thread is not None and self._update_thread.is_alive()
+
+    @property
+    def is_empty(self) -> bool:
+        return self.con.execute("SELECT 1 FROM documents LIMIT 1").fetchone() is None
+
+    def update_in_background(self) -> None:
+        if self.is_updating:
+            return
+
+        self._update_thread = threading.Thread(
+            target=self.update,
+            name=f"content-index-{self.database_path.stem}",
+            daemon=True,
+        )
+        self._update_thread.start()
+
+    def update(self) -> None:
+        with self._update_lock:
+            con = open_database(self.database_path)
+            try:
+                self._update(con)
+            finally:
+                con.close()
+
+    def _update(self, con):
+        changes = self.manifest.check()
+        if changes.is_empty:
+            return
+
+        self._remove_documents(con, changes.removed)
+        self._index_documents(con, changes.changed)
+        self.manifest.save()
+
+    def _remove_documents(self, con, paths: List[str]):
+        for path in paths:
+            row = con.execute(
+                "SELECT id FROM documents WHERE path = ?", (path,)
+            ).fetchone()
+            if row:
+                con.execute("DELETE FROM documents WHERE id = ?", row)
+                con.execute("DELETE FROM documents_fts WHERE rowid = ?", row)
+
+        con.commit()
+
+    def _index_documents(self, con, paths: List[str]):
+        if not paths:
+            return
+
+        absolute_paths = [(self.documents_dir / path).as_posix() for path in paths]
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            extracted = pool.map(extract_document, absolute_paths, chunksize=64)
+            for count, (path, (title, text)) in enumerate(
+                zip(paths, extracted), start=1
+            ):
+                self._store_document(con, path, title, text)
+
+                if count % self.batch_size == 0:
+                    con.commit()
+
+        con.commit()
+
+    def _store_document(self, con, path: str, title: str, text: str):
+        row = con.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+        if row:
+            document_id = row[0]
+            con.execute("DELETE FROM documents_fts WHERE rowid = ?", (document_id,))
+        else:
+            document_id = con.execute(
+                "INSERT INTO documents (path) VALUES (?)", (path,)
+            ).lastrowid
+
+        con.execute(
+            "INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+            (document_id, title or Path(path).stem, text),
+        )
+
+    def search(self, term: str, limit: int = 100) -> List[ContentMatch]:
+        query = fts_query(term)
+        if not query:
+            return []
+
+        rows = self.con.execute(
+            """
+            SELECT documents_fts.title, documents.path,
+                   snippet(documents_fts, 1, ?, ?, '…', 12)
+            FROM documents_fts JOIN documents ON documents.id = documents_fts.rowid
+            WHERE documents_fts MATCH ?
+            ORDER BY bm25(documents_fts, 10.0, 1.0)
+            LIMIT ?
+            """,
+            (SNIPPET_START, SNIPPET_END, query, limit),
+        )
+
+        return [ContentMatch(*row) for row in rows.fetchall()]
@@ -0,0 +1,97 @@
+from bisect import bisect_left
+from typing import Dict, Generic, Iterable, List, Set, TypeVar
+
+from . import TRIGRAM_LENGTH
+
+T = TypeVar("T")
+
+
+def normalize(value: str) -> str:
+    return value.strip().lower() if value else ""
+
+
+def grams_of(value: str, length: int) -> Set[str]:
+    return {value[start : start + length] for start in range(len(value) - length + 1)}
+
+
+class LookupIndex(Generic[T]):
+    """Finds items by normalized keys, by exact match, prefix or substring.
+
+    Keys are kept sorted for prefix lookups, and every key is indexed by its
+    1-, 2- and 3-grams so that substring lookups only verify candidate keys.
+    """
+
+    def __init__(self) -> None:
+        self.items: List[T] = []
+        self._keys: Dict[str, Set[int]] = dict()
+        self._sorted_keys: List[str] = []
+        self._grams: Dict[str, Set[str]] = dict()
+
+    def add(self, item: T, keys: Iterable[str]) -> None:
+        position = len(self.items)
+        self.items.append(item)
+
+        for key in {normalize(key) for key in keys}:
+            if not key:
+                continue
+
+            if key not in self._keys:
+                self._keys[key] = set()
+                self._sorted_keys.insert(bisect_left(self._sorted_keys, key), key)
+                for length in range(1, TRIGRAM_LENGTH + 1):
+                    for gram in grams_of(key, length):
+                        self._grams.setdefault(gram, set()).add(key)
+
+            self._keys[key].add(position)
+
+    def exact(self, key: str) -> List[T]:
+        return self._items_of(self._keys.get(normalize(key), ()))
+
+    def prefix(self, key: str) -> List[T]:
+        key = normalize(key)
+        positions = set()
+        for index in range(bisect_left(self._sorted_keys, key), len(self._sorted_keys)):
+            sorted_key = self._sorted_keys[index]
+            if not sorted_key.startswith(key):
+                break
+            positions.update(self._keys[sorted_key])
+
+        return self._items_of(positions)
+
+    def search(self, query: str) -> List[T]:
+        """Items with a key containing `query`; exact and prefix matches first"""
+
+        query = normalize(query)
+        if not query:
+            return list(self.items)
+
+        exact = self.exact(query)
+        prefix = self.prefix(query)
+
+        gram_length = min(len(query), TRIGRAM_LENGTH)
+        candidates: Set[str] = None
+        for gram in grams_of(query, gram_length):
+            keys = self._grams.get(gram, set())
+            candidates = keys if candidates is None else candidates & keys
+            if not candidates:
+                break
+
+        positions = set()
+        for key in candidates or ():
+            if query in key:
+                positions.update(self._keys[key])
+
+        results: List[T] = []
+        seen: Set[int] = set()
+        for item in exact + prefix + self._items_of(positions):
+            if id(item) not in seen:
+                seen.add(id(item))
+                results.append(item)
+
+        return results
+
+    def _items_of(self, positions: Iterable[int]) -> List[T]:
+        return [self.items[position] for position in sorted(positions)]
+
+    def __len__(self) -> int:
+        return len(self.items)
@@ -0,0 +1,223 @@
+import os
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
+
+from . import SNIPPET_END, SNIPPET_START, fts_query, open_database
+
+OVERSTRIKE_PATTERN = re.compile(".\x08")
+COMPRESSION_SUFFIXES = (".gz", ".bz2", ".xz", ".lzma", ".zst", ".Z")
+
+
+class ManPageMatch(NamedTuple):
+    name: str
+    section: str
+    path: str
+    snippet: str
+
+
+class ManPageSource(NamedTuple):
+    name: str
+    section: str
+    mtime: float
+
+
+def parse_page_file_name(file_name: str) -> Tuple[str, str]:
+    """Split `socket.7.gz` into the page name `socket` and the section `7`"""
+
+    for suffix in COMPRESSION_SUFFIXES:
+        if file_name.endswith(suffix):
+            file_name = file_name[: -len(suffix)]
+            break
+
+    name, _, section = file_name.rpartition(".")
+    if not name:
+        return file_name, ""
+
+    return name, section
+
+
+def render_page_text(path: str) -> str:
+    """Render a man page to plain text with `mandoc`"""
+
+    try:
+        process = subprocess.run(
+            ["mandoc", "-T", "utf8", path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError as e:
+        print(f"Could not render {path}: {e}")
+        return ""
+
+    if process.returncode != 0:
+        return ""
+
+    text = process.stdout.decode("utf-8", errors="replace")
+    return OVERSTRIKE_PATTERN.sub("", text)
+
+
+class ManTextIndex:
+    """A SQLite FTS5 index over the rendered text of every installed man page.
+
+    The index is updated incrementally: only pages whose source file changed since
+    the last run are rendered again, on a pool of worker threads.
+    """
+
+    batch_size = 200
+
+    def __init__(self, database_path: Path, max_workers: int = None) -> None:
+        self.database_path = database_path
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.con = open_database(self.database_path)
+        self._create_tables()
+
+        self._update_lock = threading.Lock()
+        self._update_thread: threading.Thread = None
+
+    def _create_tables(self):
+        self.con.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                name TEXT NOT NULL,
+                section TEXT NOT NULL,
+                mtime REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+                name, section, body
+            );
+            """)
+
+    @property
+    def is_updating(self) -> bool:
+        return self._update_thread is not None and self._update_thread.is_alive()
+
+    def update_in_background(self) -> None:
+        if self.is_updating:
+            return
+
+        self._update_thread = threading.Thread(
+            target=self.update, name="man-text-index", daemon=True
+        )
+        self._update_thread.start()
+
+    def update(self) -> None:
+        """Bring the index up to date with the man pages currently installed"""
+
+        with self._update_lock:
+            con = open_database(self.database_path)
+            try:
+                self._update(con)
+            finally:
+                con.close()
+
+    def _update(self, con):
+        indexed: Dict[str, Tuple[int, float]] = {
+            path: (id, mtime)
+            for id, path, mtime in con.execute("SELECT id, path, mtime FROM pages")
+        }
+        installed = self.scan_pages()
+
+        removed_ids = [
+            (id,) for path, (id, _) in indexed.items() if path not in installed
+        ]
+        con.executemany("DELETE FROM pages WHERE id = ?", removed_ids)
+        con.executemany("DELETE FROM pages_fts WHERE rowid = ?", removed_ids)
+        con.commit()
+
+        stale = [
+            path
+            for path, source in installed.items()
+            if path not in indexed or indexed[path][1] != source.mtime
+        ]
+        if not stale:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(render_page_text, path): path for path in stale}
+            for count, future in enumerate(as_completed(futures), start=1):
+                path = futures[future]
+                self._store_page(con, path, installed[path], future.result())
+
+                if count % self.batch_size == 0:
+                    con.commit()
+
+        con.commit()
+
+    def _store_page(self, con, path: str, source: ManPageSource, text: str):
+        row = con.execute("SELECT id FROM pages WHERE path = ?", (path,)).fetchone()
+        if row:
+            page_id = row[0]
+            con.execute(
+                "UPDATE pages SET name = ?, section = ?, mtime = ? WHERE id = ?",
+                (source.name, source.section, source.mtime, page_id),
+            )
+            con.execute("DELETE FROM pages_fts WHERE rowid = ?", (page_id,))
+        else:
+            page_id = con.execute(
+                "INSERT INTO pages (path, name, section, mtime) VALUES (?, ?, ?, ?)",
+                (path, source.name, source.section, source.mtime),
+            ).lastrowid
+
+        con.execute(
+            "INSERT INTO pages_fts (rowid, name, section, body) VALUES (?, ?, ?, ?)",
+            (page_id, source.name, source.section, text),
+        )
+
+    def scan_pages(self) -> Dict[str, ManPageSource]:
+        pages: Dict[str, ManPageSource] = dict()
+
+        for man_dir in self.man_path():
+            for section_dir in man_dir.glob("man*"):
+                if not section_dir.is_dir():
+                    continue
+
+                for entry in os.scandir(section_dir):
+                    if not entry.is_file():
+                        continue
+
+                    name, section = parse_page_file_name(entry.name)
+                    pages[entry.path] = ManPageSource(
+                        name, section, entry.stat().st_mtime
+                    )
+
+        return pages
+
+    def man_path(self) -> List[Path]:
+        try:
+            process = subprocess.run(
+                ["man", "-w"], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            print(e)
+            return []
+
+        if process.returncode != 0:
+            print(process.stderr.decode())
+            return []
+
+        directories = process.stdout.decode().strip().split(":")
+        return [Path(directory) for directory in directories if directory]
+
+    def search(self, term: str, limit: int = 100) -> List[ManPageMatch]:
+        query = fts_query(term)
+        if not query:
+            return []
+
+        rows = self.con.execute(
+            """
+            SELECT pages.name, pages.section, pages.path,
+                   snippet(pages_fts, 2, ?, ?, '…', 12)
+            FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid
+            WHERE pages_fts MATCH ?
+            ORDER BY bm25(pages_fts, 10.0, 1.0, 1.0)
+            LIMIT ?
+            """,
+            (SNIPPET_START, SNIPPET_END, query, limit),
+        )
+
+        return [ManPageMatch(*row) for row in rows.fetchall()]
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ManifestChanges(NamedTuple):
+    changed: List[str]
+    removed: List[str]
+    rows_changed: bool
+    row_count: int
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.changed or self.removed or self.rows_changed)
+
+
+def file_stat(path: Path) -> Tuple[int, float]:
+    try:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+    except FileNotFoundError:
+        return 0, 0.0
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class DocSetManifest:
+    """Records the state of a docset as seen by one derived index.
+
+    `check` compares the docset on disk against the last saved state and reports
+    what changed. The docset database and the Documents directory are stat'ed
+    first; the Documents tree is only walked if one of them changed, and only files
+    whose size or mtime changed are hashed. Without a `documents_dir` only the
+    database is tracked.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        documents_dir: Optional[Path],
+        database_path: Path,
+        table_name: str = "searchIndex",
+        suffixes: Tuple[str, ...] = None,
+    ) -> None:
+        self.path = path
+        self.documents_dir = documents_dir
+        self.database_path = database_path
+        self.table_name = table_name
+        self.suffixes = suffixes
+
+        self.stamp: Dict[str, List] = dict()
+        self.row_count = -1
+        self.files: Dict[str, List] = dict()
+        self.load()
+
+        self._pending: Dict = None
+
+    def load(self):
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, "r") as manifest_file:
+                manifest: Dict = json.load(manifest_file)
+                self.stamp = manifest.get("stamp", dict())
+                self.row_count = manifest.get("row_count", -1)
+                self.files = manifest.get("files", dict())
+        except Exception as e:
+            print(e)
+
+    def save(self):
+        """Persist the state found by the last `check`, once the index caught up"""
+
+        if self._pending:
+            self.stamp = self._pending["stamp"]
+            self.row_count = self._pending["row_count"]
+            self.files = self._pending["files"]
+            self._pending = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_suffix(".tmp")
+        with open(temporary_path, "w") as manifest_file:
+            json.dump(
+                {"stamp": self.stamp, "row_count": self.row_count, "files": self.files},
+                manifest_file,
+            )
+        os.replace(temporary_path, self.path)
+
+    def current_stamp(self) -> Dict[str, List]:
+        stamp = {"database": list(file_stat(self.database_path))}
+        if self.documents_dir:
+            stamp["documents"] = list(file_stat(self.documents_dir))
+
+        return stamp
+
+    def check(self) -> ManifestChanges:
+        stamp = self.current_stamp()
+        if stamp == self.stamp:
+            return ManifestChanges([], [], False, self.row_count)
+
+        rows_changed = stamp.get("database") != self.stamp.get("database")
+        row_count = self.count_rows() if rows_changed else self.row_count
+
+        files = dict()
+        changed = []
+        for path, (size, mtime) in self.scan_documents().items():
+            known = self.files.get(path)
+            if known and known[0] == size and known[1] == mtime:
+                files[path] = known
+                continue
+
+            digest = file_hash(os.path.join(self.documents_dir, path))
+            files[path] = [size, mtime, digest]
+            if not known or known[2] != digest:
+                changed.append(path)
+
+        removed = [path for path in self.files if path not in files]
+
+        self._pending = {"stamp": stamp, "row_count": row_count, "files": files}
+        return ManifestChanges(changed, removed, rows_changed, row_count)
+
+    def count_rows(self) -> int:
+        if not self.database_path.exists():
+            return 0
+
+        con = sqlite3.connect(f"{self.database_path.as_uri()}?mode=ro", uri=True)
+        try:
+            return con.execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()[0]
+        finally:
+            con.close()
+
+    def scan_documents(self) -> Dict[str, Tuple[int, float]]:
+        documents: Dict[str, Tuple[int, float]] = dict()
+        if not self.documents_dir:
+            return documents
+
+        for root, _, files in os.walk(self.documents_dir):
+            for file_name in files:
+                if self.suffixes and not file_name.endswith(self.suffixes):
+                    continue
+
+                full_path = os.path.join(root, file_name)
+                stat = os.stat(full_path)
+                path = os.path.relpath(full_path, self.documents_dir)
+                documents[path] = (stat.st_size, stat.st_mtime)
+
+        return documents
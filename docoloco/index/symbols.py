@@ -0,0 +1,292 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from . import TRIGRAM_LENGTH, open_database
+from .lookup import normalize
+from .manifest import DocSetManifest
+
+
+class SymbolSource(NamedTuple):
+    """Everything the global index needs to know about a docset"""
+
+    name: str
+    title: str
+    # The same keys the provider's `LookupIndex` knows the docset by
+    lookup_keys: Tuple[str, ...]
+    database_path: Path
+    table_name: str
+    has_fragment: bool
+    manifest: DocSetManifest
+
+
+class SymbolMatch(NamedTuple):
+    docset: str
+    name: str
+    type: str
+    path: str
+    fragment: str
+
+
+class GlobalSymbolIndex:
+    """A single SQLite database holding the symbols of every installed docset.
+
+    Each symbol is tagged with the id of its docset, so "search everything" is one
+    trigram-indexed query with a global ranking, and restricting a search to some
+    docsets is a predicate on the `docset_id` column. Docsets are synchronised in
+    the background; only the rows that changed since the last run are written.
+
+    The index is `ready` once a build has covered every installed docset; until
+    then, searches should go through the docsets themselves.
+    """
+
+    def __init__(self, database_path: Path) -> None:
+        self.database_path = database_path
+        self.con = open_database(self.database_path)
+        self._create_tables()
+        self.ready = self._built_docsets(self.con) is not None
+
+        self._update_lock = threading.Lock()
+        self._update_thread: threading.Thread = None
+
+    def _create_tables(self):
+        self.con.executescript("""
+            CREATE TABLE IF NOT EXISTS build_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS docsets (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS docset_keywords (
+                docset_id INTEGER NOT NULL,
+                keyword TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS docset_keywords_keyword
+                ON docset_keywords (keyword);
+            CREATE TABLE IF NOT EXISTS symbols (
+                id INTEGER PRIMARY KEY,
+                docset_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                type TEXT NOT NULL,
+                path TEXT NOT NULL,
+                fragment TEXT
+            );
+            CREATE INDEX IF NOT EXISTS symbols_docset ON symbols (docset_id);
+            CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name COLLATE NOCASE);
+            CREATE VIRTUAL TABLE IF NOT EXISTS symbols_fts USING fts5(
+                name, content='symbols', content_rowid='id', tokenize='trigram'
+            );
+            CREATE TRIGGER IF NOT EXISTS symbols_after_insert AFTER INSERT ON symbols
+            BEGIN
+                INSERT INTO symbols_fts (rowid, name) VALUES (new.id, new.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS symbols_after_delete AFTER DELETE ON symbols
+            BEGIN
+                INSERT INTO symbols_fts (symbols_fts, rowid, name)
+                    VALUES ('delete', old.id, old.name);
+            END;
+            """)
+
+    @property
+    def is_updating(self) -> bool:
+        return self._update_thread is not None and self._update_thread.is_alive()
+
+    @staticmethod
+    def _built_docsets(con) -> Optional[Set[str]]:
+        """The docsets covered by the last complete build, if there was one"""
+
+        row = con.execute(
+            "SELECT value FROM build_state WHERE key = 'docsets'"
+        ).fetchone()
+        return set(json.loads(row[0])) if row else None
+
+    def update_in_background(self, sources: List[SymbolSource]) -> None:
+        if self.is_updating:
+            return
+
+        self._update_thread = threading.Thread(
+            target=self.update,
+            args=(sources,),
+            name="global-symbol-index",
+            daemon=True,
+        )
+        self._update_thread.start()
+
+    def update(self, sources: List[SymbolSource]) -> None:
+        with self._update_lock:
+            con = open_database(self.database_path)
+            try:
+                self._update(con, sources)
+            finally:
+                con.close()
+
+    def _update(self, con, sources: List[SymbolSource]):
+        names = [source.name for source in sources]
+
+        # New docsets are missing from the index until this build completes
+        built_docsets = self._built_docsets(con)
+        if built_docsets is None or not built_docsets.issuperset(names):
+            self.ready = False
+            con.execute("DELETE FROM build_state WHERE key = 'docsets'")
+            con.commit()
+
+        self._remove_missing_docsets(con, names)
+
+        is_complete = True
+        for source in sources:
+            try:
+                self._update_docset(con, source)
+            except Exception as e:
+                print(f"Could not index symbols of {source.name}: {e}")
+                is_complete = False
+
+        if is_complete:
+            con.execute(
+                "INSERT OR REPLACE INTO build_state (key, value) VALUES ('docsets', ?)",
+                (json.dumps(names),),
+            )
+            con.commit()
+            self.ready = True
+
+    def _remove_missing_docsets(self, con, names: List[str]):
+        installed = set(names)
+        for docset_id, name in con.execute("SELECT id, name FROM docsets").fetchall():
+            if name in installed:
+                continue
+
+            con.execute("DELETE FROM symbols WHERE docset_id = ?", (docset_id,))
+            con.execute("DELETE FROM docset_keywords WHERE docset_id = ?", (docset_id,))
+            con.execute("DELETE FROM docsets WHERE id = ?", (docset_id,))
+
+        con.commit()
+
+    def _update_docset(self, con, source: SymbolSource):
+        docset_id = self._register_docset(con, source)
+
+        changes = source.manifest.check()
+        has_symbols = con.execute(
+            "SELECT 1 FROM symbols WHERE docset_id = ? LIMIT 1", (docset_id,)
+        ).fetchone()
+        if changes.is_empty and has_symbols:
+            return
+
+        # Diffed in SQL, without loading the rows of either side
+        fragment = "fragment" if source.has_fragment else "NULL"
+        con.execute(
+            "ATTACH DATABASE ? AS source",
+            (f"{source.database_path.as_uri()}?mode=ro",),
+        )
+        try:
+            parameters = {"docset_id": docset_id}
+            con.execute(
+                f"""
+                DELETE FROM symbols WHERE id IN (
+                    SELECT symbols.id FROM symbols JOIN (
+                        SELECT name, type, path, fragment FROM symbols
+                        WHERE docset_id = :docset_id
+                        EXCEPT
+                        SELECT name, type, path, {fragment}
+                        FROM source.{source.table_name}
+                    ) AS removed
+                    ON symbols.name = removed.name
+                        AND symbols.type = removed.type
+                        AND symbols.path = removed.path
+                        AND symbols.fragment IS removed.fragment
+                    WHERE symbols.docset_id = :docset_id
+                )
+                """,
+                parameters,
+            )
+            con.execute(
+                f"""
+                INSERT INTO symbols (docset_id, name, type, path, fragment)
+                SELECT :docset_id, name, type, path, fragment FROM (
+                    SELECT name, type, path, {fragment} AS fragment
+                    FROM source.{source.table_name}
+                    EXCEPT
+                    SELECT name, type, path, fragment FROM symbols
+                    WHERE docset_id = :docset_id
+                )
+                """,
+                parameters,
+            )
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        finally:
+            con.execute("DETACH DATABASE source")
+
+        source.manifest.save()
+
+    def _register_docset(self, con, source: SymbolSource) -> int:
+        row = con.execute(
+            "SELECT id FROM docsets WHERE name = ?", (source.name,)
+        ).fetchone()
+        if row:
+            docset_id = row[0]
+            con.execute(
+                "UPDATE docsets SET title = ? WHERE id = ?", (source.title, docset_id)
+            )
+        else:
+            docset_id = con.execute(
+                "INSERT INTO docsets (name, title) VALUES (?, ?)",
+                (source.name, source.title),
+            ).lastrowid
+
+        keywords = {normalize(key) for key in source.lookup_keys} - {""}
+        con.execute("DELETE FROM docset_keywords WHERE docset_id = ?", (docset_id,))
+        con.executemany(
+            "INSERT INTO docset_keywords (docset_id, keyword) VALUES (?, ?)",
+            [(docset_id, keyword) for keyword in keywords],
+        )
+        con.commit()
+
+        return docset_id
+
+    def search(
+        self, term: str, keywords: Iterable[str] = None, limit: int = 100
+    ) -> List[SymbolMatch]:
+        term = term.strip().lower()
+        if not term:
+            return []
+
+        parameters: Dict = {"term": term, "prefix": f"{term}%", "limit": limit}
+        if len(term) >= TRIGRAM_LENGTH:
+            candidates = (
+                "symbols.id IN (SELECT rowid FROM symbols_fts WHERE name LIKE :pattern)"
+            )
+            parameters["pattern"] = f"%{term}%"
+        else:
+            candidates = "symbols.name LIKE :prefix"
+
+        docset_filter = ""
+        if keywords:
+            names = []
+            for position, keyword in enumerate(keywords):
+                parameters[f"keyword{position}"] = normalize(keyword)
+                names.append(f":keyword{position}")
+
+            docset_filter = f"""AND symbols.docset_id IN (
+                SELECT docset_id FROM docset_keywords WHERE keyword IN ({", ".join(names)})
+            )"""
+
+        rows = self.con.execute(
+            f"""
+            SELECT docsets.name, symbols.name, symbols.type, symbols.path, symbols.fragment
+            FROM symbols JOIN docsets ON docsets.id = symbols.docset_id
+            WHERE {candidates} {docset_filter}
+            ORDER BY lower(symbols.name) = :term DESC,
+                     lower(symbols.name) LIKE :prefix DESC,
+                     length(symbols.name),
+                     symbols.name
+            LIMIT :limit
+            """,
+            parameters,
+        )
+
+        return [SymbolMatch(*row) for row in rows.fetchall()]
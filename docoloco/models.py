@@ -1,11 +1,33 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 import gi
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-from gi.repository import Gio, GObject  # noqa: E402
+from gi.repository import Gio, GLib, GObject  # noqa: E402
+
+from .diagnostics.metrics import metrics  # noqa: E402
+
+# A symbol name to resolve, and the type to prefer when there are several
+SymbolLookup = Tuple[str, Optional[str]]
+
+
+def symbol_lookup(name) -> SymbolLookup:
+    """`name` as a lookup, whether it is given alone or as a `(name, type)` pair"""
+
+    if isinstance(name, str):
+        return name, None
+
+    return name[0], name[1]
+
+
+@functools.lru_cache(maxsize=None)
+def file_icon(path: str) -> Gio.Icon:
+    """One shared `Gio.FileIcon` per icon file"""
+    return Gio.FileIcon.new_for_string(path)
 
 
 class IconsMixin:
@@ -97,6 +119,27 @@ class DocSet(GObject.Object):
     is_javascript_enabled = True
     icon_files: List[Path] = None
 
+    resolve_priority = [
+        "Class",
+        "Structure",
+        "Protocol",
+        "Interface",
+        "Type",
+        "Enumeration",
+        "Namespace",
+        "Package",
+        "Function",
+        "Method",
+        "Macro",
+        "Constructor",
+        "Property",
+        "Attribute",
+        "Field",
+        "Constant",
+        "Variable",
+        "Guide",
+    ]
+
     def __init__(self, provider_id: str):
         super().__init__()
 
@@ -105,20 +148,128 @@ class DocSet(GObject.Object):
         self.symbol_strings: Dict[str, List] = dict()
         self.symbol_counts: Dict[str, int] = dict()
         self.sections: Dict[str, Gio.ListStore] = dict()
+        self.loading_sections: Set[str] = set()
+        self._section_worker: ThreadPoolExecutor = None
 
-    def search(self, value: str, section: str = None) -> Gio.ListStore:
+    def find_symbols(self, value: str, section: str = None, limit: int = 100) -> List:
         """Search the docset for a value, and return a list of `Doc` objects."""
+        return []
+
+    def search(self, value: str, section: str = None) -> Gio.ListStore:
+        """Search the docset for a value, and return a list of `SearchResult` objects."""
+        ...
+
+    def resolve_symbols(self, names: List) -> Dict[SymbolLookup, Doc]:
+        """Find the best `Doc` for each exact symbol name in one pass, keyed by
+        `symbol_lookup`. Names may be given as `(name, type)` pairs to prefer
+        symbols of that type.
+        """
+        return dict()
+
+    def best_doc(self, docs: List[Doc], type_hint: str = None) -> Doc:
+        def rank(doc: Doc):
+            priority = (
+                self.resolve_priority.index(doc.type)
+                if doc.type in self.resolve_priority
+                else len(self.resolve_priority)
+            )
+            return (doc.type != type_hint, priority)
+
+        return min(docs, key=rank)
+
+    def search_text(self, value: str) -> Gio.ListStore:
+        """Full-text search over the docset's documents, returning `SearchResult`s"""
+        return Gio.ListStore(item_type=SearchResult)
+
+    def prepare(self) -> None:
+        """Get the docset ready to show its index page. Sections are not loaded
+        here, but when they are first shown.
+        """
         ...
 
     def populate_all_sections(self) -> None:
         """Add links to all Sections.
         It is recommended to add no more than 20 links per each section for perfomance.
         """
-        ...
+        for name in self.symbol_counts.keys():
+            self.populate_section(name)
+
+    def fetch_section(self, name: str, offset: int) -> List:
+        """The next page of `Doc`s in a section, from `offset`. This runs on a
+        worker thread, so it must not touch the section stores.
+        """
+        return []
+
+    def section_store(self, name: str) -> Gio.ListStore:
+        """The store of a section, empty until the section is populated"""
+
+        if name not in self.sections:
+            self.sections[name] = self.new_docs_list()
+
+        return self.sections[name]
 
     def populate_section(self, name: str) -> None:
         """Populate a specific section of the documentation"""
-        ...
+
+        offset = self.start_section_page(name)
+        self.finish_section_page(name, self.fetch_section(name, offset))
+
+    def populate_section_async(self, name: str, on_populated: Callable = None):
+        """Load the next page of a section on a worker thread, with a placeholder
+        in its store until the page is appended on the main thread
+        """
+
+        if name in self.loading_sections:
+            return
+
+        self.loading_sections.add(name)
+        offset = self.start_section_page(name)
+        self.section_store(name).append(Doc("Loading ...", "Loading", "loading"))
+
+        def finish(docs: List["Doc"]):
+            store = self.section_store(name)
+            store.remove(store.get_n_items() - 1)  # remove the placeholder
+            self.finish_section_page(name, docs)
+            self.loading_sections.discard(name)
+            if on_populated:
+                on_populated()
+
+            return GLib.SOURCE_REMOVE
+
+        def fetch():
+            try:
+                docs = self.fetch_section(name, offset)
+            except Exception as e:
+                print(f"Failed to load the {name} section of {self.name}: {e}")
+                docs = []
+
+            GLib.idle_add(finish, docs)
+
+        # One worker per docset, so that its fetches never share the connection
+        if not self._section_worker:
+            self._section_worker = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"sections-{self.name}"
+            )
+        self._section_worker.submit(fetch)
+
+    def start_section_page(self, name: str) -> int:
+        """Remove the 'More' link of a section, and return the offset of its next
+        page
+        """
+
+        store = self.section_store(name)
+        size = store.get_n_items()
+        if size > 0 and store.get_item(size - 1).type == "More":
+            store.remove(size - 1)  # remove the 'More...' link
+
+        return store.get_n_items()
+
+    def finish_section_page(self, name: str, docs: List["Doc"]):
+        store = self.section_store(name)
+        store.splice(store.get_n_items(), 0, docs)
+
+        if store.get_n_items() < self.symbol_counts.get(name, 0):
+            store.append(Doc("Load more ...", "More", "more"))  # add the 'More...' link
 
     def parse_symbol_type(self, value: str):
         aliases = {
@@ -251,8 +402,15 @@ class DocSet(GObject.Object):
 
         return aliases.get(value, value)
 
+    def find_related(self, url: str) -> List:
+        """The `Doc` objects linked from the page at `url`"""
+        return []
+
+    @metrics.timed("DocSet.related_docs_of")
     def related_docs_of(self, url: str) -> Gio.ListStore:
-        ...
+        related_links = self.new_docs_list()
+        related_links.splice(0, 0, self.find_related(url))
+        return related_links
 
     def new_docs_list(self) -> Gio.ListStore:
         return Gio.ListStore(item_type=Doc)
@@ -264,8 +422,9 @@ class DocSet(GObject.Object):
     @property
     def icon(self):
         if self.icon_files:
-            icon_path: Path = self.icon_files[0]
-            icon = Gio.FileIcon.new_for_string(icon_path.as_posix())
+            # The 1x icon; the icon cache picks the @2x one on HiDPI displays
+            icon_path: Path = min(self.icon_files, key=lambda path: "@2x" in path.name)
+            icon = file_icon(icon_path.as_posix())
         else:
             icon = Gio.icon_new_for_string("accessories-dictionary-symbolic")
 
@@ -301,6 +460,7 @@ class SearchResult(GObject.Object):
         has_child: bool,
         action_name: str,
         action_args: str,
+        subtitle: str = None,
     ) -> None:
         super().__init__()
 
@@ -309,3 +469,4 @@ class SearchResult(GObject.Object):
         self.has_child = has_child
         self.action_name = action_name
         self.action_args = action_args
+        self.subtitle = subtitle  # Pango markup, e.g. a highlighted text snippet
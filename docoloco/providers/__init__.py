@@ -1,7 +1,7 @@
 from enum import Enum
 from pathlib import Path
-from typing import Dict, Protocol, TypeVar
-from docoloco.models import SearchResult
+from typing import TYPE_CHECKING, Dict, Iterator, List, Protocol, Tuple, TypeVar
+from docoloco.models import Doc, SearchResult, file_icon
 
 import gi
 
@@ -9,17 +9,18 @@ from ..models import DocSet
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-from gi.repository import Gio, GObject, Gtk  # noqa: E402
+from gi.repository import Gio, GObject  # noqa: E402
+
+if TYPE_CHECKING:
+    from gi.repository import Gtk
 
 T = TypeVar("T")
 
 
 class DocumentationProviderView(Protocol):
-    def filter_or_find(self, value: str):
-        ...
+    def filter_or_find(self, value: str): ...
 
-    def get_menu_widget(self) -> Gtk.Widget:
-        ...
+    def get_menu_widget(self) -> "Gtk.Widget": ...
 
 
 class DocumentationProvider(GObject.Object):
@@ -39,22 +40,76 @@ class DocumentationProvider(GObject.Object):
 
         self.query_results_model = Gio.ListStore(item_type=SearchResult)
 
-    def load(self) -> None:
+    def load(self, start_background: bool = False) -> None:
+        for docset in self.discover_docsets():
+            self.add_docset(docset)
+
+        self.finish_loading()
+        if start_background:
+            self.start_background_work()
+
+    def discover_docsets(self) -> Iterator[DocSet]:
+        """Open the provider's docsets one by one. This runs on a worker thread
+        during startup, so it must not touch state that searches read.
+        """
+        return iter(())
+
+    def add_docset(self, docset: DocSet) -> None:
+        """Make a discovered docset searchable"""
+        self.docs[docset.name] = docset
+
+    def finish_loading(self) -> None:
+        """Set up what needs every docset, once they are all added"""
         ...
 
-    def query(self, name: str) -> Gio.ListStore:
+    def start_background_work(self) -> None:
+        """Start building the provider's indexes. One-shot commands skip this,
+        so that they do not wait for the builds when they exit.
+        """
         ...
 
+    def query(self, name: str) -> Gio.ListStore: ...
+
+    def query_text(self, text: str) -> Gio.ListStore:
+        """Full-text search over the contents of the provider's documents"""
+
+        self.query_results_model.remove_all()
+        return self.query_results_model
+
+    def find_docsets(self, name: str) -> List[DocSet]:
+        """The docsets matching `name`, without wrapping them in a list model"""
+        return []
+
+    def find_docsets_by_keyword(self, keyword: str) -> List[DocSet]:
+        return []
+
+    def find_symbols(
+        self, name: str, keywords=None, limit: int = 100
+    ) -> List[Tuple[DocSet, Doc]]:
+        """Symbols matching `name` across the provider's docsets"""
+        return []
+
+    def has_keyword(self, keyword: str) -> bool:
+        """Whether one of the provider's docsets is known by `keyword`"""
+        return len(self.find_docsets_by_keyword(keyword)) > 0
+
+    def query_symbols(self, name: str, keywords=None) -> Gio.ListStore:
+        """Search the symbols of all the provider's docsets at once,
+        or only of the docsets known by one of `keywords`
+        """
+
+        self.query_results_model.remove_all()
+        return self.query_results_model
+
     def get(self, name: str = None, position: int = None) -> DocSet:
         return self.docs[name]
 
-    def get_view(self) -> Gtk.Widget:
-        ...
+    def get_view(self) -> "Gtk.Widget": ...
 
     @property
     def icon(self) -> Gio.Icon:
         if self.icon_path:
-            icon = Gio.FileIcon.new_for_string(self.icon_path)
+            icon = file_icon(self.icon_path)
         else:
             icon = Gio.icon_new_for_string("accessories-dictionary-symbolic")
 
@@ -1,14 +1,25 @@
+import html
 import json
-import plistlib
 import sqlite3
+import threading
 from collections import OrderedDict, namedtuple
 from enum import Enum
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator, List, Tuple
 
 from gi.repository import Gio, GLib
 
-from docoloco.models import Doc, DocSet, SearchResult
+from docoloco.config import default_config
+from docoloco.diagnostics.metrics import metrics
+from docoloco.diagnostics.sqltrace import connect_docset
+from docoloco.index import snippet_markup
+from docoloco.index.bloom import TrigramBloomFilter, query_hashes
+from docoloco.index.catalog import CatalogSource, DocSetCatalog
+from docoloco.index.lookup import LookupIndex
+from docoloco.index.content import DOCUMENT_SUFFIXES, DocSetContentIndex
+from docoloco.index.manifest import DocSetManifest
+from docoloco.index.symbols import GlobalSymbolIndex, SymbolSource
+from docoloco.models import Doc, DocSet, SearchResult, SymbolLookup, symbol_lookup
 from docoloco.providers import DocumentationProvider
 
 
@@ -20,33 +31,171 @@ class DashProvider(DocumentationProvider):
         self.name = name
         self.root_path = root_path
 
-    def load(self):
+        self.catalog = DocSetCatalog(
+            default_config.index_dir / f"{self.id}.catalog.sqlite"
+        )
+        # Opened by finish_loading, so that the settings are not read on import
+        self.symbol_index: GlobalSymbolIndex = None
+
+        self.lookup: LookupIndex[DashDocSet] = LookupIndex()
+
+    def discover_docsets(self) -> Iterator["DashDocSet"]:
+        self.catalog.load()
+
         for doc_path in self.root_path.iterdir():
             try:
-                doc = DashDocSet(provider_id=self.id, path=doc_path)
-                self.docs[doc.name] = doc
+                yield DashDocSet(provider_id=self.id, path=doc_path)
             except Exception as e:
                 print(e)
 
+    def add_docset(self, docset: "DashDocSet") -> None:
+        self.docs[docset.name] = docset
+        self.lookup.add(docset, docset.lookup_keys)
+
+    def finish_loading(self) -> None:
         self.docs = OrderedDict(sorted(self.docs.items()))
 
+        self.lookup = LookupIndex()
+        for docset in self.docs.values():
+            self.lookup.add(docset, docset.lookup_keys)
+
+        self.load_symbol_filters()
+
+        if not self.symbol_index and default_config.get_setting(
+            "global_symbol_index", False
+        ):
+            self.symbol_index = GlobalSymbolIndex(
+                default_config.index_dir / f"{self.id}.symbols.sqlite"
+            )
+
+    def start_background_work(self) -> None:
+        for docset in self.docs.values():
+            if docset.has_content_index:
+                docset.content_index.update_in_background()
+
+        self.build_symbol_filters()
+
+        if self.symbol_index:
+            self.symbol_index.update_in_background(
+                [docset.symbol_source() for docset in self.docs.values()]
+            )
+
     def query(self, name: str) -> Gio.ListStore:
         self.query_results_model.remove_all()
 
-        for key, docset in self.docs.items():
-            if name in docset.title.strip().lower():
-                self.query_results_model.append(
-                    SearchResult(
-                        title=docset.title,
-                        icon=docset.icon,
-                        has_child=True,
-                        action_name="win.change_docset",
-                        action_args=GLib.Variant("(ssi)", (self.id, docset.name, 0)),
-                    )
+        for docset in self.find_docsets(name):
+            self.query_results_model.append(
+                SearchResult(
+                    title=docset.title,
+                    icon=docset.icon,
+                    has_child=True,
+                    action_name="win.change_docset",
+                    action_args=GLib.Variant("(ssi)", (self.id, docset.name, 0)),
                 )
+            )
+
+        return self.query_results_model
+
+    def find_docsets(self, name: str) -> List[DocSet]:
+        return self.lookup.search(name)
+
+    def find_docsets_by_keyword(self, keyword: str) -> List[DocSet]:
+        return self.lookup.exact(keyword)
+
+    def query_symbols(self, name: str, keywords=None) -> Gio.ListStore:
+        self.query_results_model.remove_all()
+
+        for docset, doc in self.find_symbols(name, keywords):
+            self.query_results_model.append(docset.symbol_result(doc))
 
         return self.query_results_model
 
+    def find_symbols(
+        self, name: str, keywords=None, limit: int = 100
+    ) -> List[Tuple["DashDocSet", Doc]]:
+        if not name:
+            return []
+
+        if self.symbol_index and self.symbol_index.ready:
+            return self.find_indexed_symbols(name, keywords, limit)
+
+        if keywords:
+            docsets = []
+            for keyword in keywords:
+                docsets.extend(self.find_docsets_by_keyword(keyword))
+        else:
+            docsets = list(self.docs.values())
+
+        symbols = []
+        hashes = query_hashes(name)
+        pruned = 0
+        for docset in docsets:
+            if docset.symbol_filter:
+                is_pruned = not docset.symbol_filter.might_contain(hashes)
+                metrics.record_cache("symbol bloom filter", is_pruned)
+                if is_pruned:
+                    pruned += 1
+                    continue
+
+            for doc in docset.find_symbols(name, limit=20):
+                symbols.append((docset, doc))
+
+        metrics.record_count("docsets pruned by symbol bloom filters", pruned)
+
+        return symbols[:limit]
+
+    def find_indexed_symbols(self, name: str, keywords=None, limit: int = 100):
+        symbols = []
+        for match in self.symbol_index.search(name, keywords, limit):
+            docset = self.docs.get(match.docset)
+            if not docset:
+                continue
+
+            doc = Doc(
+                match.name,
+                docset.parse_symbol_type(match.type),
+                docset.get_uri_to(match.path),
+                match.fragment,
+            )
+            symbols.append((docset, doc))
+
+        return symbols
+
+    def load_symbol_filters(self):
+        """Attach the catalogued Bloom filters"""
+
+        for docset in self.docs.values():
+            entry = self.catalog.get(docset.database_path)
+            metrics.record_cache("docset catalog", entry is not None)
+            if entry:
+                self.attach_symbol_filter(docset, entry.bloom_filter)
+
+    def build_symbol_filters(self):
+        """Build the missing and outdated Bloom filters in the background"""
+
+        stale = [
+            docset.catalog_source()
+            for docset in self.docs.values()
+            if not self.catalog.get(docset.database_path)
+        ]
+        if stale:
+            self.catalog.update_in_background(stale, self.on_catalog_entry)
+
+    def on_catalog_entry(self, source, entry):
+        docset = self.docs.get(source.name)
+        if docset:
+            self.attach_symbol_filter(docset, entry.bloom_filter)
+
+    def attach_symbol_filter(
+        self, docset: "DashDocSet", bloom_filter: TrigramBloomFilter
+    ):
+        # A saturated filter would almost never prune, but would still be checked
+        metrics.record_cache(
+            "usable symbol bloom filter", not bloom_filter.is_saturated
+        )
+        if not bloom_filter.is_saturated:
+            docset.symbol_filter = bloom_filter
+
 
 def namedtuple_factory(cursor: sqlite3.Cursor, row):
     fields = [column[0] for column in cursor.description]
@@ -96,6 +245,7 @@ class DashDocSet(DocSet):
             raise ValueError(f"Resources path {self.resources_dir} does not exist")
 
         self.database_path = self.resources_dir / "docSet.dsidx"
+        self.resolve_lock = threading.Lock()
         self.load_database()
 
         self.documents_dir = self.resources_dir / "Documents"
@@ -114,6 +264,9 @@ class DashDocSet(DocSet):
 
         self.count_symbols()
 
+        self._content_index: DocSetContentIndex = None
+        self.symbol_filter: TrigramBloomFilter = None
+
         # self.populate_all_sections()
 
     def load_metadata(self):
@@ -142,6 +295,8 @@ class DashDocSet(DocSet):
         if not plist_path.exists():
             plist_path = self.contents_dir / "info.plist"
 
+        import plistlib
+
         with open(plist_path, "rb") as plist_file:
             self.plist: Dict = plistlib.load(plist_file)
 
@@ -170,7 +325,7 @@ class DashDocSet(DocSet):
             raise ValueError(f"{self.database_path} does not exist")
 
         self.table_name = "searchindex"
-        self.con = sqlite3.connect(self.database_path)
+        self.con = connect_docset(self.database_path, self.name)
 
         column_names = self.con.execute(
             f"PRAGMA table_info({self.table_name})"
@@ -216,60 +371,72 @@ class DashDocSet(DocSet):
                 + row.count
             )
 
-    def populate_all_sections(self):
-        for key in self.symbol_strings.keys():
-            self.populate_section(key)
-
-    def populate_section(self, name: str):
-        section_index = self.sections.get(name, self.new_docs_list())
-        section_size = section_index.get_n_items()
-
+    @metrics.timed("DashDocSet.fetch_section")
+    def fetch_section(self, name: str, offset: int) -> List[Doc]:
         page_size = 20
-        if section_size > 0:
-            last_item: Doc = section_index.get_item(section_size - 1)
-            if last_item.type == "More":
-                section_index.remove(section_size - 1)  # remove the 'More...' link
-
-            offset = section_size - 1
-        else:
-            offset = 0
 
         also_known_as_list = self.symbol_strings[name]
-        like_conditions = [f"type LIKE '%{value}%'" for value in also_known_as_list]
+        like_conditions = ["type LIKE ?" for _ in also_known_as_list]
+        parameters = [f"%{value}%" for value in also_known_as_list]
 
         columns_to_select = self.get_columns()
 
-        query = f"SELECT {columns_to_select} FROM {self.table_name} WHERE {'OR '.join(like_conditions)} LIMIT {page_size} OFFSET {offset}"
-        rows = self.con.cursor().execute(query)
-
-        for row in rows.fetchall():
-            doc = self.build_doc_from_row(row)
-            section_index.append(doc)
+        query = f"SELECT {columns_to_select} FROM {self.table_name} WHERE {' OR '.join(like_conditions)} LIMIT ? OFFSET ?"
+        rows = self.con.cursor().execute(query, (*parameters, page_size, offset))
 
-        if section_index.get_n_items() < self.symbol_counts[name]:
-            section_index.append(
-                Doc("Load more ...", "More", "more")
-            )  # add the 'More...' link
+        return [self.build_doc_from_row(row) for row in rows.fetchall()]
 
-        self.sections[name] = section_index
-
-    def search(self, value: str, section: str = "") -> Gio.ListStore:
+    def find_symbols(self, value: str, section: str = "", limit: int = 100):
         columns_to_select = self.get_columns()
         symbols_aka = []
-        where_conditions = f"name LIKE '%{value}%'"
+        where_conditions = "name LIKE ?"
+        parameters = [f"%{value}%"]
 
         if section and len(section) > 0:
             for aka in self.symbol_strings[section]:
-                symbols_aka.append(f"type LIKE '%{aka}%'")
+                symbols_aka.append("type LIKE ?")
+                parameters.append(f"%{aka}%")
+
+            where_conditions = f"{where_conditions} AND ({' OR '.join(symbols_aka)})"
+
+        query = f"SELECT {columns_to_select} FROM {self.table_name} WHERE {where_conditions} LIMIT ?"
+        rows: sqlite3.Cursor = self.con.cursor().execute(query, (*parameters, limit))
+
+        return [self.build_doc_from_row(row) for row in rows.fetchall()]
+
+    def resolve_symbols(self, names: List) -> Dict[SymbolLookup, Doc]:
+        lookups = [symbol_lookup(name) for name in names]
+
+        candidates: Dict[str, List[Doc]] = dict()
+        with self.resolve_lock:
+            self.con.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS resolve_names (name TEXT PRIMARY KEY)"
+            )
+            self.con.execute("DELETE FROM temp.resolve_names")
+            self.con.executemany(
+                "INSERT OR IGNORE INTO temp.resolve_names (name) VALUES (?)",
+                [(name,) for name, _ in lookups],
+            )
+            rows = self.con.execute(
+                f"SELECT {self.get_columns()} FROM {self.table_name} "
+                "WHERE name IN (SELECT name FROM temp.resolve_names)"
+            ).fetchall()
+
+        for row in rows:
+            candidates.setdefault(row.name, []).append(self.build_doc_from_row(row))
 
-            where_conditions = f"{where_conditions} AND ({'OR '.join(symbols_aka)})"
+        resolved: Dict[SymbolLookup, Doc] = dict()
+        for name, type_hint in lookups:
+            if name in candidates:
+                hint = self.parse_symbol_type(type_hint) if type_hint else None
+                resolved[(name, type_hint)] = self.best_doc(candidates[name], hint)
 
-        query = f"SELECT {columns_to_select} FROM {self.table_name} WHERE {where_conditions} LIMIT 100"
-        rows: sqlite3.Cursor = self.con.cursor().execute(query)
+        return resolved
 
+    @metrics.timed("DashDocSet.search")
+    def search(self, value: str, section: str = "") -> Gio.ListStore:
         results = Gio.ListStore(item_type=SearchResult)
-        for row in rows.fetchall():
-            doc = self.build_doc_from_row(row)
+        for doc in self.find_symbols(value, section):
             results.append(
                 SearchResult(
                     title=doc.name,
@@ -282,26 +449,113 @@ class DashDocSet(DocSet):
 
         return results
 
-    def related_docs_of(self, url: str) -> Gio.ListStore:
+    def symbol_result(self, doc: Doc) -> SearchResult:
+        """A search result for a symbol found outside of this docset's own search"""
+
+        return SearchResult(
+            title=doc.name,
+            icon=doc.icon_name,
+            has_child=False,
+            action_name="win.open_docset_page",
+            action_args=GLib.Variant("(sss)", (doc.url, self.provider_id, self.name)),
+            subtitle=html.escape(self.title),
+        )
+
+    @property
+    def lookup_keys(self):
+        return (self.title, self.name, self.name.replace("_", " "), *self.keywords)
+
+    def catalog_source(self) -> CatalogSource:
+        return CatalogSource(self.name, self.database_path, self.table_name)
+
+    def symbol_source(self) -> SymbolSource:
+        return SymbolSource(
+            name=self.name,
+            title=self.title,
+            lookup_keys=tuple(self.lookup_keys),
+            database_path=self.database_path,
+            table_name=self.table_name,
+            has_fragment=self.type != self.Type.DASH,
+            manifest=self.manifest_for("symbols", track_documents=False),
+        )
+
+    @property
+    def index_dir(self) -> Path:
+        return default_config.index_dir / "docsets" / self.name
+
+    @property
+    def content_index(self) -> DocSetContentIndex:
+        if not self._content_index:
+            self._content_index = DocSetContentIndex(
+                self.index_dir / "content.sqlite",
+                self.documents_dir,
+                self.manifest_for("content", DOCUMENT_SUFFIXES),
+            )
+
+        return self._content_index
+
+    @property
+    def has_content_index(self) -> bool:
+        return (self.index_dir / "content.sqlite").exists()
+
+    def manifest_for(
+        self, index_name: str, suffixes=None, track_documents=True
+    ) -> DocSetManifest:
+        return DocSetManifest(
+            self.index_dir / f"{index_name}.manifest.json",
+            self.documents_dir if track_documents else None,
+            self.database_path,
+            self.table_name,
+            suffixes,
+        )
+
+    def search_text(self, value: str) -> Gio.ListStore:
+        results = Gio.ListStore(item_type=SearchResult)
+
+        if self.content_index.is_empty:
+            self.content_index.update_in_background()
+            results.append(
+                SearchResult(
+                    title=f"Indexing {self.title} contents...",
+                    icon="content-loading-symbolic",
+                    has_child=False,
+                    action_name="win.focus_locator",
+                    action_args=GLib.Variant.new_string(f"/text {value}"),
+                )
+            )
+            return results
+
+        for match in self.content_index.search(value):
+            results.append(
+                SearchResult(
+                    title=match.title,
+                    icon="text-x-generic-symbolic",
+                    has_child=False,
+                    action_name="win.open_page_uri",
+                    action_args=GLib.Variant.new_string(self.get_uri_to(match.path)),
+                    subtitle=snippet_markup(match.snippet),
+                )
+            )
+
+        return results
+
+    def find_related(self, url: str) -> List[Doc]:
         path = url.replace(f"{self.documents_dir.as_uri()}/", "").split("#")[0]
         columns_to_select = self.get_columns()
 
         if self.type == self.Type.DASH:
-            where_condition = f"path LIKE '%{path}%' AND path <> '%{path}'"
+            where_condition = "path LIKE ? AND path <> ?"
+            parameters = (f"%{path}%", f"%{path}")
         else:
-            where_condition = f"path LIKE '%{path}' AND fragment IS NOT NULL"
+            where_condition = "path LIKE ? AND fragment IS NOT NULL"
+            parameters = (f"%{path}",)
 
         query = (
             f"SELECT {columns_to_select} FROM {self.table_name} WHERE {where_condition}"
         )
-        rows = self.con.cursor().execute(query)
-
-        related_links = self.new_docs_list()
-        for row in rows.fetchall():
-            doc = self.build_doc_from_row(row)
-            related_links.append(doc)
+        rows = self.con.cursor().execute(query, parameters)
 
-        return related_links
+        return [self.build_doc_from_row(row) for row in rows.fetchall()]
 
     def get_columns(self):
         columns_to_select = "name as name, type as type, path as path"
@@ -1,13 +1,16 @@
 import json
 import subprocess
+import time
 from pathlib import Path
 from shutil import copyfile
-from typing import Dict
+from typing import Dict, List
 
-from bs4 import BeautifulSoup
 from gi.repository import Gio, GLib
 
 from docoloco.config import default_config
+from docoloco.diagnostics.metrics import metrics
+from docoloco.index import snippet_markup
+from docoloco.index.man import ManTextIndex
 from docoloco.models import Doc, DocSet, SearchResult
 from docoloco.providers import DocumentationProvider
 
@@ -20,37 +23,80 @@ class ManProvider(DocumentationProvider):
         self.name = "Man Pages"
         self.type = DocumentationProvider.Type.QUERYABLE
         self.icon_path = default_config.icon("providers/man.png")
+        self.text_index = ManTextIndex(default_config.index_dir / "man.sqlite")
 
+    def start_background_work(self) -> None:
+        self.text_index.update_in_background()
+
+    @metrics.timed("ManProvider.query")
     def query(self, name: str):
         self.query_results_model.remove_all()
 
+        for doc in self.find_docsets(name):
+            self.query_results_model.append(
+                SearchResult(
+                    title=doc.name,
+                    icon=self.icon,
+                    has_child=True,
+                    action_name="win.change_docset",
+                    action_args=GLib.Variant("(ssi)", (self.id, doc.name, 0)),
+                )
+            )
+
+        return self.query_results_model
+
+    def find_docsets(self, name: str) -> List[DocSet]:
         process = subprocess.Popen(
             ["man", "-k", "--regex", name],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
+        started = time.perf_counter()
         output, error = process.communicate()
+        metrics.record_subprocess("man -k", (time.perf_counter() - started) * 1000)
 
-        if process.returncode == 0:
-            output_lines = output.decode().splitlines()[:100]
-            self.docs = dict()
-            for line in output_lines:
-                parts = line.split("(")
-                name = parts[0].strip()
-
-                doc = ManDocSet(provider_id=self.id, name=name, description=line)
-                self.query_results_model.append(
-                    SearchResult(
-                        title=doc.name,
-                        icon=Gio.FileIcon.new_for_string(self.icon_path),
-                        has_child=True,
-                        action_name="win.change_docset",
-                        action_args=GLib.Variant("(ssi)", (self.id, doc.name, 0)),
-                    )
-                )
-                self.docs[doc.name] = doc
-        else:
+        if process.returncode != 0:
             print(error.decode())
+            return []
+
+        output_lines = output.decode().splitlines()[:100]
+        self.docs = dict()
+        for line in output_lines:
+            name, _, rest = line.partition("(")
+            section = rest.partition(")")[0].strip()
+
+            doc = ManDocSet(
+                provider_id=self.id,
+                name=name.strip(),
+                description=line,
+                section=section,
+            )
+            self.docs[doc.name] = doc
+
+        return list(self.docs.values())
+
+    def query_text(self, text: str):
+        self.query_results_model.remove_all()
+        self.docs = dict()
+
+        for match in self.text_index.search(text):
+            doc = ManDocSet(
+                provider_id=self.id,
+                name=match.name,
+                description=f"{match.name}({match.section})",
+                section=match.section,
+            )
+            self.query_results_model.append(
+                SearchResult(
+                    title=doc.description,
+                    icon=self.icon,
+                    has_child=True,
+                    action_name="win.change_docset",
+                    action_args=GLib.Variant("(ssi)", (self.id, doc.name, 0)),
+                    subtitle=snippet_markup(match.snippet),
+                )
+            )
+            self.docs[doc.name] = doc
 
         return self.query_results_model
 
@@ -58,12 +104,18 @@ class ManProvider(DocumentationProvider):
 class ManDocSet(DocSet):
     __gtype_name__ = "ManDocSet"
 
-    def __init__(self, provider_id: str, name: str, description: str):
+    def __init__(
+        self, provider_id: str, name: str, description: str, section: str = ""
+    ):
         super().__init__(provider_id)
 
-        self.name = self.title = name
+        # Pages of different sections share a name, e.g. printf(1) and printf(3)
+        self.page_name = name
+        self.section = section
+        self.name = self.title = f"{name}({section})" if section else name
         self.description = description
         self.path: Path = None
+        self._prepared = False
         self.related_docs = self.new_docs_list()
         self.cache_dir = default_config.user_cache_dir / "DocoLoco/ManPages"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -73,21 +125,33 @@ class ManDocSet(DocSet):
         if not self.style_file.exists():
             copyfile(default_config.get_path_from_style("mandoc.css"), self.style_file)
 
+    def prepare(self) -> None:
+        # The page is rendered, and its links collected, the first time it is shown
+        if not self._prepared:
+            self._prepared = True
+            self.populate_all_sections()
+
     def populate_all_sections(self) -> None:
         self.set_paths()
+        if not self.path:
+            return  # `man -w` did not find the page
 
-        if not self.index_file_path.exists():
+        is_cached = self.index_file_path.exists()
+        metrics.record_cache("man page html", is_cached)
+        if not is_cached:
             self.build_manpage_metadata()
 
         self.load_symbols()
 
     def set_paths(self):
         process = subprocess.Popen(
-            ["man", "-w", self.name],
+            ["man", "-w", *([self.section] if self.section else []), self.page_name],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
+        started = time.perf_counter()
         output, error = process.communicate()
+        metrics.record_subprocess("man -w", (time.perf_counter() - started) * 1000)
 
         if process.returncode == 0:
             self.path = Path(output.decode().strip())
@@ -122,7 +186,11 @@ class ManDocSet(DocSet):
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
+        started = time.perf_counter()
         output, error = process.communicate()
+        metrics.record_subprocess(
+            "mandoc -T html", (time.perf_counter() - started) * 1000
+        )
 
         if process.returncode == 0:
             self.write_to_html(output)
@@ -135,6 +203,8 @@ class ManDocSet(DocSet):
             html_file.write(output.decode("utf-8"))
 
     def extract_symbol_metadata(self, content: str):
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(content, "html.parser")
         symbols = {}
 
@@ -148,5 +218,6 @@ class ManDocSet(DocSet):
         with open(self.metadata_path, "w") as metadata_file:
             json.dump(symbols, metadata_file)
 
+    @metrics.timed("ManDocSet.related_docs_of")
     def related_docs_of(self, url: str) -> Gio.ListStore:
         return self.related_docs
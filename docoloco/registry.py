@@ -1,6 +1,8 @@
-from typing import Dict, List
+import threading
+import time
+from typing import Dict, List, Set, Tuple
 
-from gi.repository import Gio
+from gi.repository import Gio, GLib, GObject
 
 from docoloco.config import default_config
 from docoloco.models import DocSet, SearchResult
@@ -8,24 +10,121 @@ from docoloco.providers import DocumentationProvider
 from docoloco.providers.dash import DashProvider
 from docoloco.providers.man import ManProvider
 
+TEXT_QUERY_PREFIX = "/text"
+SYMBOLS_QUERY_PREFIX = "/symbols"
+
+
+class Registry(GObject.Object):
+    """The documentation providers, loaded either at once with
+    `initialize_providers`, or progressively with `load_in_background`.
+    """
+
+    __gsignals__ = {
+        "docset-added": (GObject.SignalFlags.RUN_FIRST, None, (str, str)),
+        "provider-loaded": (GObject.SignalFlags.RUN_FIRST, None, (str,)),
+        "loaded": (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
 
-class Registry:
     providers: Dict[str, DocumentationProvider] = None
 
     def __init__(self, providers: List[DocumentationProvider]) -> None:
+        super().__init__()
+
         self.providers = dict((provider.id, provider) for provider in providers)
-        self.initialize_providers()
+        self.loading_providers: Set[str] = set()
+        self.is_loaded = False
+        # provider id -> (started, finished) in time.perf_counter() seconds
+        self.load_times: Dict[str, Tuple[float, float]] = dict()
+
+        self._load_thread: threading.Thread = None
+
+    @property
+    def is_loading(self) -> bool:
+        return len(self.loading_providers) > 0
+
+    def initialize_providers(self, start_background: bool = False):
+        """Load every provider on the calling thread, e.g. for the command line.
+        Indexes are only built in the background with `start_background`.
+        """
+
+        if self.is_loaded or self._load_thread:
+            return
+
+        for _, provider in self.providers.items():
+            started = time.perf_counter()
+            provider.load(start_background)
+            self.load_times[provider.id] = (started, time.perf_counter())
+
+        self.is_loaded = True
+
+    def load_in_background(self):
+        """Open the docsets on a worker thread, and add each one on the main loop
+        as soon as it is ready, emitting `docset-added` and `provider-loaded`.
+        """
+
+        if self.is_loaded or self._load_thread:
+            return
+
+        self.loading_providers = set(self.providers.keys())
+        self._load_thread = threading.Thread(
+            target=self._discover_docsets, name="registry-load", daemon=True
+        )
+        self._load_thread.start()
 
-    def initialize_providers(self):
+    def _discover_docsets(self):
         for _, provider in self.providers.items():
-            provider.load()
+            self.load_times[provider.id] = (time.perf_counter(), None)
+            try:
+                for docset in provider.discover_docsets():
+                    GLib.idle_add(self._add_docset, provider, docset)
+            except Exception as e:
+                print(f"Could not load {provider.name}: {e}")
+
+            GLib.idle_add(self._finish_provider, provider)
+
+    def _add_docset(self, provider: DocumentationProvider, docset: DocSet):
+        provider.add_docset(docset)
+        self.emit("docset-added", provider.id, docset.name)
+        return False
+
+    def _finish_provider(self, provider: DocumentationProvider):
+        provider.finish_loading()
+        provider.start_background_work()
+        started, _ = self.load_times[provider.id]
+        self.load_times[provider.id] = (started, time.perf_counter())
+        self.loading_providers.discard(provider.id)
+        self.emit("provider-loaded", provider.id)
+
+        if not self.loading_providers:
+            self.is_loaded = True
+            self.emit("loaded")
+
+        return False
 
     def search(self, term: str):
         term = term.strip().lower()
         if ":" in term:
             provider_id, term = term.split(":", 1)
             provider = self.providers.get(provider_id)
-            results = provider.query(term.strip())
+            term = term.strip()
+            if not provider:
+                results = self.search_keyword(provider_id.strip(), term)
+            elif term.startswith(TEXT_QUERY_PREFIX):
+                results = provider.query_text(term[len(TEXT_QUERY_PREFIX) :].strip())
+            else:
+                results = provider.query(term)
+        elif term.startswith(SYMBOLS_QUERY_PREFIX):
+            term = term[len(SYMBOLS_QUERY_PREFIX) :].strip()
+            results = Gio.ListStore(item_type=SearchResult)
+            for _, provider in self.providers.items():
+                if provider.type == DocumentationProvider.Type.QUERYABLE:
+                    continue
+
+                results.splice(
+                    results.get_n_items(),
+                    0,
+                    provider.query_symbols(term),
+                )
         else:
             results = Gio.ListStore(item_type=SearchResult)
             for _, provider in self.providers.items():
@@ -40,8 +139,30 @@ class Registry:
 
         return results
 
+    def search_keyword(self, keyword: str, term: str) -> Gio.ListStore:
+        """Search the symbols of the docsets known by `keyword`, e.g. `py:os.path`"""
+
+        results = Gio.ListStore(item_type=SearchResult)
+        for _, provider in self.providers.items():
+            if not provider.has_keyword(keyword):
+                continue
+
+            provider_results = (
+                provider.query_symbols(term, keywords=[keyword])
+                if term
+                else provider.query(keyword)
+            )
+            results.splice(results.get_n_items(), 0, provider_results)
+
+        return results
+
     def get(self, provider_id: str, docset_name: str, position: int) -> DocSet:
         provider = self.providers.get(provider_id)
+        if not provider or (
+            provider_id in self.loading_providers and docset_name not in provider.docs
+        ):
+            return None
+
         return provider.get(name=docset_name, position=position)
 
 
@@ -1,8 +1,32 @@
+import difflib
+from typing import List
+
 from gi.repository import Gio, GLib, GObject
 
+from .diagnostics.metrics import metrics
 from .helpers import is_valid_url
 from .models import DocSet, SearchResult, Section
-from .registry import get_registry
+from .registry import TEXT_QUERY_PREFIX, get_registry
+
+
+def list_items(model: Gio.ListModel) -> List:
+    return [model.get_item(position) for position in range(model.get_n_items())]
+
+
+def result_key(result: SearchResult) -> tuple:
+    """What a result shows and does; results with equal keys are interchangeable"""
+
+    icon = result.icon if isinstance(result.icon, str) else result.icon.to_string()
+    args = result.action_args.print_(True) if result.action_args is not None else None
+
+    return (
+        result.title,
+        result.subtitle,
+        icon,
+        result.has_child,
+        result.action_name,
+        args,
+    )
 
 
 class SearchProvider(GObject.Object):
@@ -18,30 +42,52 @@ class SearchProvider(GObject.Object):
         self.result = Gio.ListStore(item_type=SearchResult)
 
     def search(self, word: str):
-        self.result.remove_all()
-        word = word.strip().lower()
+        with metrics.measure("SearchProvider.search") as measurement:
+            word = word.strip().lower()
 
-        if self.docset:
-            if not self.section and (not word or len(word) == 0):
-                self.show_sections()
+            if self.docset:
+                if not self.section and (not word or len(word) == 0):
+                    results = self.show_sections()
+                elif word.startswith(TEXT_QUERY_PREFIX):
+                    results = self.find_text_in_docset(
+                        word[len(TEXT_QUERY_PREFIX) :].strip()
+                    )
+                else:
+                    results = self.find_in_docset(word)
             else:
-                self.find_in_docset(word)
-        else:
-            self.filter_docsets(word)
+                results = self.filter_docsets(word)
+
+            self.update_results(results)
+            measurement.rows = self.result.get_n_items()
 
-    def find_in_docset(self, word):
-        results = (
+    def update_results(self, results: List[SearchResult]):
+        """Turn the current results into `results` with the fewest insertions and
+        removals, keeping the current objects for results that did not change, so
+        that the list view keeps their rows bound
+        """
+
+        current_keys = [result_key(result) for result in list_items(self.result)]
+        new_keys = [result_key(result) for result in results]
+
+        matcher = difflib.SequenceMatcher(None, current_keys, new_keys, autojunk=False)
+        # From the end, so that the positions of the earlier ranges still hold
+        for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+            if tag != "equal":
+                self.result.splice(i1, i2 - i1, results[j1:j2])
+
+    def find_in_docset(self, word) -> List[SearchResult]:
+        found = (
             self.docset.search(word, self.section.title)
             if self.section
             else self.docset.search(word)
         )
 
-        if not results:
-            return
+        if not found:
+            return []
 
-        self.result.splice(0, self.result.get_n_items(), results)
+        results = list_items(found)
 
-        if self.result.get_n_items() == 0:
+        if len(results) == 0:
             query = f'"{self.docset.name}" {word}'
             google_item = SearchResult(
                 title=f"Google - {word}",
@@ -52,7 +98,7 @@ class SearchProvider(GObject.Object):
                     f"https://google.com/search?q={query}"
                 ),
             )
-            self.result.append(google_item)
+            results.append(google_item)
 
         if is_valid_url(word):
             url_link_item = SearchResult(
@@ -62,16 +108,24 @@ class SearchProvider(GObject.Object):
                 action_name="win.open_page_uri",
                 action_args=GLib.Variant.new_string(word),
             )
-            self.result.insert(0, url_link_item)
+            results.insert(0, url_link_item)
+
+        return results
 
-    def filter_docsets(self, word: str):
-        results = get_registry().search(word)
-        self.result.splice(0, self.result.get_n_items(), results)
+    def find_text_in_docset(self, word: str) -> List[SearchResult]:
+        if not word:
+            return []
 
-    def show_sections(self):
+        return list_items(self.docset.search_text(word))
+
+    def filter_docsets(self, word: str) -> List[SearchResult]:
+        return list_items(get_registry().search(word))
+
+    def show_sections(self) -> List[SearchResult]:
+        results = []
         for title, count in self.docset.symbol_counts.items():
             section = Section(title, count)
-            self.result.append(
+            results.append(
                 SearchResult(
                     title=section.title,
                     icon=section.icon_name,
@@ -80,3 +134,5 @@ class SearchProvider(GObject.Object):
                     action_args=GLib.Variant.new_string(section.title),
                 )
             )
+
+        return results
@@ -0,0 +1,245 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, Dict, List
+
+from .config import default_config
+from .engine import SearchEngine
+from .models import SearchResult
+
+# Requests and responses are single lines of JSON:
+#   -> {"id": 1, "method": "search", "params": {"query": "py:os.path"}}
+#   <- {"id": 1, "result": [...], "elapsed_ms": 0.8}
+# A client that sends "attach" stays connected and receives {"event": ...} lines.
+
+
+def serialize_result(result: SearchResult) -> Dict:
+    icon = result.icon if isinstance(result.icon, str) else result.icon.to_string()
+    args = result.action_args.unpack() if result.action_args is not None else None
+
+    return {
+        "title": result.title,
+        "subtitle": result.subtitle,
+        "icon": icon,
+        "action": result.action_name,
+        "args": args,
+    }
+
+
+class SearchService:
+    """Answers search, resolve and open requests from a warm `Registry`"""
+
+    def __init__(self, registry) -> None:
+        self.registry = registry
+        self.engine = SearchEngine(registry)
+        self.lock = threading.Lock()
+        self.attached: List["ServiceRequestHandler"] = []
+
+    def dispatch(self, method: str, params: Dict):
+        handler = getattr(self, f"handle_{method}", None)
+        if not callable(handler):
+            raise ValueError(f"Unknown method {method}")
+
+        return handler(**params)
+
+    def handle_ping(self):
+        return "pong"
+
+    def handle_search(self, query: str, limit: int = 100):
+        with self.lock:
+            results = self.registry.search(query)
+            return [
+                serialize_result(results.get_item(position))
+                for position in range(min(results.get_n_items(), limit))
+            ]
+
+    def handle_resolve(self, name: str, keyword: str = None):
+        with self.lock:
+            record = self.engine.resolve(name, keyword)
+
+        return record._asdict() if record else None
+
+    def handle_resolve_many(self, names: List, docset: str = None, keyword: str = None):
+        with self.lock:
+            records = self.engine.resolve_many(names, docset, keyword)
+
+        return [record._asdict() if record else None for record in records]
+
+    def handle_open(
+        self,
+        url: str = None,
+        name: str = None,
+        keyword: str = None,
+        provider: str = None,
+        docset: str = None,
+    ):
+        if not url:
+            resolved = self.handle_resolve(name, keyword)
+            if not resolved:
+                return {"url": None, "delivered": 0}
+
+            url = resolved["url"]
+            provider, docset = resolved["provider"], resolved["docset"]
+
+        event = {"event": "open", "url": url, "args": None}
+        if provider and docset:
+            event["args"] = [url, provider, docset]
+
+        return {"url": url, "delivered": self.broadcast(event)}
+
+    def broadcast(self, event: Dict) -> int:
+        delivered = 0
+        for handler in list(self.attached):
+            try:
+                handler.send(event)
+                delivered += 1
+            except OSError:
+                self.attached.remove(handler)
+
+        return delivered
+
+
+class ServiceRequestHandler(socketserver.StreamRequestHandler):
+    server: "ServiceServer"
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+
+    def send(self, message: Dict):
+        with self.write_lock:
+            self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+    def handle(self):
+        service = self.server.service
+
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                self.send({"id": None, "error": "Invalid JSON"})
+                continue
+
+            request_id = request.get("id")
+            method = request.get("method")
+
+            if method == "attach":
+                service.attached.append(self)
+                self.send({"id": request_id, "result": "attached"})
+                continue
+
+            started = time.perf_counter()
+            try:
+                result = service.dispatch(method, request.get("params") or {})
+                response = {"id": request_id, "result": result}
+            except Exception as e:
+                response = {"id": request_id, "error": str(e)}
+
+            response["elapsed_ms"] = (time.perf_counter() - started) * 1000
+            self.send(response)
+
+    def finish(self):
+        if self in self.server.service.attached:
+            self.server.service.attached.remove(self)
+
+        super().finish()
+
+
+class ServiceServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: SearchService) -> None:
+        self.service = service
+        super().__init__(socket_path, ServiceRequestHandler)
+
+
+def is_service_running(socket_path: str) -> bool:
+    if not os.path.exists(socket_path):
+        return False
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+
+def run_service(socket_path: str = None) -> int:
+    """Load the registry once and serve requests until interrupted"""
+
+    from .registry import get_registry
+
+    socket_path = socket_path or default_config.service_socket_path.as_posix()
+    if is_service_running(socket_path):
+        print(f"A DocoLoco service is already listening on {socket_path}")
+        return 1
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    registry = get_registry()
+    registry.initialize_providers(start_background=True)
+
+    server = ServiceServer(socket_path, SearchService(registry))
+    print(f"DocoLoco service listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+    return 0
+
+
+class ServiceClient:
+    def __init__(self, socket_path: str = None) -> None:
+        self.socket_path = socket_path or default_config.service_socket_path.as_posix()
+        self.socket: socket.socket = None
+        self.file = None
+        self.next_id = 0
+
+    def connect(self) -> "ServiceClient":
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(self.socket_path)
+        self.file = self.socket.makefile("rwb")
+        return self
+
+    def close(self):
+        if self.socket:
+            self.file.close()
+            self.socket.close()
+            self.socket = None
+
+    def request(self, method: str, **params):
+        self.next_id += 1
+        message = {"id": self.next_id, "method": method, "params": params}
+        self.file.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.file.flush()
+
+        response = json.loads(self.file.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+
+        return response["result"]
+
+    def attach(self, on_event: Callable[[Dict], None]) -> threading.Thread:
+        """Receive events such as `open` requests on a background thread"""
+
+        self.request("attach")
+
+        def read_events():
+            for line in self.file:
+                on_event(json.loads(line))
+
+        thread = threading.Thread(
+            target=read_events, name="service-events", daemon=True
+        )
+        thread.start()
+        return thread
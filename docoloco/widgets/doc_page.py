@@ -1,29 +1,40 @@
-import html
 import re
-from typing import cast
+import time
+from typing import TYPE_CHECKING, NamedTuple, cast
 from urllib.parse import unquote
 
 import gi
-from bs4 import BeautifulSoup
 
 from ..config import default_config
 from ..helpers import add_symmetric_margins
 from ..models import Doc, DocSet, Section
+from .factories import DocLinkFactory
 from .locator import Locator
 from .new_page import NewPage
-from .section_widget import SectionWidget
+from .web import import_webkit, web_views
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-gi.require_version("WebKit2", "4.1")
-from gi.repository import Adw, Gdk, Gio, GLib, GObject, Gtk, Pango, WebKit  # noqa: E402
+gi.require_version("WebKit", "6.0")
+from gi.repository import Adw, Gio, GLib, GObject, Gtk  # noqa: E402
+
+if TYPE_CHECKING:
+    from gi.repository import WebKit
+
+
+class SuspendedPage(NamedTuple):
+    """What a suspended page needs to rebuild its WebView"""
+
+    uri: str
+    session_state: "WebKit.WebViewSessionState"
+    scroll_y: float = 0.0
 
 
 @Gtk.Template(filename=default_config.template("doc_page"))
 class DocPage(Adw.Bin):
     __gtype_name__ = "DocPage"
 
-    web_view = cast(WebKit.WebView, Gtk.Template.Child("web_view"))
+    web_view_box = cast(Gtk.Box, Gtk.Template.Child("web_view_box"))
     progress_bar = cast(Gtk.SearchBar, Gtk.Template.Child("progress_bar"))
     search_bar = cast(Gtk.SearchBar, Gtk.Template.Child("search_bar"))
     search_count_label = cast(Gtk.Label, Gtk.Template.Child("search_count_label"))
@@ -39,14 +50,15 @@ class DocPage(Adw.Bin):
     )
     zoom_step = 0.1
     content_page = None
+    suspended: SuspendedPage = None
+    pending_scroll_y = 0.0
+    find_controller: "WebKit.FindController" = None
+    _web_view: "WebKit.WebView" = None
 
     def __init__(self, docset: DocSet = None, uri: str = None):
         super().__init__(hexpand=True, vexpand=True)
         self.locator = Locator()
-
-        self.web_view.connect("load-failed", self.on_load_failed)
-        self.web_view.connect("load-changed", self.on_load_changed)
-        self.web_view.connect("context-menu", self.on_context_menu)
+        self.last_active = time.monotonic()
 
         self.bind_property(
             "title",
@@ -70,24 +82,99 @@ class DocPage(Adw.Bin):
             new_page = NewPage()
             self.set_child(new_page)
 
-        self.web_view.bind_property(
+        self._create_symbols_sections()
+        self._create_related_links_frame()
+
+    @property
+    def web_view(self) -> "WebKit.WebView":
+        if not self._web_view:
+            self._web_view = self.create_web_view()
+
+        return self._web_view
+
+    def create_web_view(self) -> "WebKit.WebView":
+        web_view = web_views.create()
+        self.web_view_box.append(web_view)
+
+        web_view.connect("load-failed", self.on_load_failed)
+        web_view.connect("load-changed", self.on_load_changed)
+        web_view.connect("context-menu", self.on_context_menu)
+
+        web_view.bind_property(
             "estimated-load-progress",
             self.progress_bar,
             "fraction",
             GObject.BindingFlags.DEFAULT,
         )
-        self.web_view.bind_property(
+        web_view.set_zoom_level(self.zoom_level)
+        web_view.bind_property(
             "zoom-level",
             self,
             "zoom_level",
             GObject.BindingFlags.BIDIRECTIONAL,
         )
 
-        self._create_symbols_sections()
-        self._create_related_links_frame()
+        return web_view
+
+    def suspend(self):
+        """Release the WebView, and with it the web process, keeping the history,
+        scroll position, zoom level and title to rebuild it with `resume`
+        """
+
+        web_view = self._web_view
+        if self.suspended or not web_view or web_view.is_loading():
+            return
+
+        uri = web_view.get_uri()
+        if not uri:
+            return
+
+        self.suspended = SuspendedPage(uri, web_view.get_session_state())
+
+        def on_scroll_position(web_view, result):
+            try:
+                scroll_y = web_view.evaluate_javascript_finish(result).to_double()
+            except GLib.Error:
+                scroll_y = 0.0
+
+            # Unless the page was selected again in the meantime
+            if self.suspended and self._web_view is web_view:
+                self.suspended = self.suspended._replace(scroll_y=scroll_y)
+                self.release_web_view()
+
+        web_view.evaluate_javascript(
+            "window.scrollY", -1, None, None, None, on_scroll_position
+        )
+
+    def release_web_view(self):
+        web_view = self._web_view
+        self._web_view = None
+        self.find_controller = None
+        self.web_view_box.remove(web_view)
+
+    def resume(self):
+        suspended = self.suspended
+        if not suspended:
+            return
+
+        self.suspended = None
+        if self._web_view:
+            return  # still waiting for the scroll position, so never released
+
+        web_view = self.web_view
+        self.setup_find_controller()
+        web_view.bind_property("title", self, "title", GObject.BindingFlags.DEFAULT)
+
+        self.pending_scroll_y = suspended.scroll_y
+        web_view.restore_session_state(suspended.session_state)
+        current_item = web_view.get_back_forward_list().get_current_item()
+        if current_item:
+            web_view.go_to_back_forward_list_item(current_item)
+        else:
+            web_view.load_uri(suspended.uri)
 
     def _create_symbols_sections(self):
-        if not self.docset or len(self.docset.sections) == 0:
+        if not self.docset or not self.docset.symbol_counts:
             self.symbols_frame.set_visible(False)
             return
 
@@ -96,15 +183,21 @@ class DocPage(Adw.Bin):
             section = Section(title, count)
             sections_list_store.append(section)
 
-        view_factory = Gtk.SignalListItemFactory()
-        view_factory.connect("setup", self._setup_sections)
-        view_factory.connect("bind", self._bind_sections)
+        # Sections are the root rows; their docs are only created when expanded
+        self.sections_tree_model = Gtk.TreeListModel.new(
+            sections_list_store, False, False, self._create_section_children
+        )
+
+        view_factory = DocLinkFactory(
+            lambda: self.docset, self._on_symbol_activated, tree=True
+        )
 
-        list_selection_model = Gtk.SingleSelection(model=sections_list_store)
+        list_selection_model = Gtk.SingleSelection(model=self.sections_tree_model)
 
         sections_tree = Gtk.ListView()
         sections_tree.set_model(list_selection_model)
         sections_tree.set_factory(view_factory)
+        sections_tree.connect("activate", self._on_symbol_row_activated)
 
         scrolled_window = Gtk.ScrolledWindow()
         scrolled_window.set_child(sections_tree)
@@ -116,21 +209,40 @@ class DocPage(Adw.Bin):
         add_symmetric_margins(self.symbols_frame, vertical=4, horizontal=4)
         self.paned.set_start_child(self.symbols_frame)
 
-    def _setup_sections(self, factory, obj: GObject.Object):
-        list_item = cast(Gtk.ListItem, obj)
-        widget = SectionWidget()
-        list_item.set_child(widget)
+    def _create_section_children(self, item: GObject.Object) -> Gio.ListModel:
+        if not isinstance(item, Section):
+            return None
+
+        docs = self.docset.section_store(item.title)
+        if docs.get_n_items() == 0:
+            self.docset.populate_section_async(item.title)
 
-    def _bind_sections(self, factory, obj: GObject.Object):
-        list_item = cast(Gtk.ListItem, obj)
-        widget = cast(SectionWidget, list_item.get_child())
-        section = cast(Section, list_item.get_item())
-        widget.build_with(section, self.docset)
+        return docs
+
+    def _on_symbol_activated(self, doc: Doc, row: Gtk.TreeListRow):
+        self._open_symbol_row(row)
+
+    def _on_symbol_row_activated(self, list_view: Gtk.ListView, position: int):
+        self._open_symbol_row(self.sections_tree_model.get_row(position))
+
+    def _open_symbol_row(self, row: Gtk.TreeListRow):
+        if row is None:
+            return
+
+        item = row.get_item()
+        if isinstance(item, Section):
+            row.set_expanded(not row.get_expanded())
+        elif item.type == "More":
+            section = cast(Section, row.get_parent().get_item())
+            self.docset.populate_section_async(section.title)
+        elif item.type != "Loading":
+            variant = GLib.Variant.new_string(item.url)
+            self.activate_action("win.open_page", variant)
 
     def _create_related_links_frame(self):
-        view_factory = Gtk.SignalListItemFactory()
-        view_factory.connect("setup", self._setup_related_link)
-        view_factory.connect("bind", self._bind_related_link)
+        view_factory = DocLinkFactory(
+            lambda: self.docset, self._on_related_link_activated
+        )
 
         list_selection_model = Gtk.SingleSelection(model=self.related_docs)
 
@@ -149,43 +261,8 @@ class DocPage(Adw.Bin):
 
         self.paned.set_end_child(related_links_frame)
 
-    def _setup_related_link(self, factory, obj):
-        list_item = cast(Gtk.ListItem, obj)
-        box = Gtk.Box()
-        icon = Gtk.Image()
-        label = Gtk.Label()
-
-        box.append(icon)
-        box.append(label)
-        list_item.set_child(box)
-
-    def _bind_related_link(self, factory, obj):
-        list_item = cast(Gtk.ListItem, obj)
-        box = cast(Gtk.Box, list_item.get_child())
-        label = cast(Gtk.Label, box.get_last_child())
-
-        doc = cast(Doc, list_item.get_item())
-        label.set_markup(
-            f"<a href='{html.escape(doc.url)}'>{html.escape(doc.name)}</a>"
-        )
-        label.set_cursor(Gdk.Cursor.new_from_name("pointer"))
-        label.set_margin_start(10)
-        label.set_ellipsize(Pango.EllipsizeMode.END)
-        label.set_tooltip_text(doc.name)
-
-        label.connect("activate-link", self._on_related_link_clicked)
-        label.connect("activate-current-link", self._on_related_link_clicked)
-
-        menu = Gio.Menu()
-        menu.append(
-            "Open In New Tab",
-            f"win.open_in_new_tab({GLib.Variant('(sss)', (doc.url, self.docset.provider_id, self.docset.name))})",
-        )
-        label.set_extra_menu(menu)
-
-    def _on_related_link_clicked(self, label: Gtk.Label, path: str, *args):
-        label.stop_emission_by_name("activate-link")
-        variant = GLib.Variant.new_string(path)
+    def _on_related_link_activated(self, doc: Doc, row: Gtk.TreeListRow = None):
+        variant = GLib.Variant.new_string(doc.url)
         self.activate_action("win.open_page", variant)
 
     def load_uri(self, uri: str):
@@ -214,17 +291,32 @@ class DocPage(Adw.Bin):
         return cleaned_uri
 
     def on_load_changed(self, web_view, event):
+        WebKit = import_webkit()
+
         match event:
             case WebKit.LoadEvent.STARTED:
                 self.progress_bar.set_visible(True)
             case WebKit.LoadEvent.FINISHED:
                 mime_type = web_view.get_main_resource().get_response().get_mime_type()
+                is_replaced = False
                 if mime_type == "application/xhtml+xml":
                     # TODO: Find a better way to handle WebKitGTK being unforgiving on rendering XML
-                    self.remove_xml_and_load_new_content(web_view)
+                    is_replaced = self.remove_xml_and_load_new_content(web_view)
 
                 self.progress_bar.set_visible(False)
 
+                # Restored once the page that replaces an xhtml one has loaded
+                if self.pending_scroll_y and not is_replaced:
+                    web_view.evaluate_javascript(
+                        f"window.scrollTo(0, {self.pending_scroll_y})",
+                        -1,
+                        None,
+                        None,
+                        None,
+                        None,
+                    )
+                    self.pending_scroll_y = 0.0
+
                 self.related_docs.remove_all()
 
                 if not self.docset:
@@ -233,11 +325,15 @@ class DocPage(Adw.Bin):
                 for doc in self.docset.related_docs_of(web_view.get_uri()):
                     self.related_docs.append(doc)
 
-    def remove_xml_and_load_new_content(self, web_view):
+    def remove_xml_and_load_new_content(self, web_view) -> bool:
+        """Load the page again as HTML; returns whether it was"""
+
         current_uri: str = web_view.get_uri()
         resource_path: str = current_uri.split("#")[0]
         if resource_path.startswith("file://"):
             resource_path = resource_path.replace("file://", "")
+            from bs4 import BeautifulSoup
+
             with open(resource_path, "r") as resource:
                 soup = BeautifulSoup(resource, "html.parser")
                 for xml_tag in soup.find_all(
@@ -252,15 +348,18 @@ class DocPage(Adw.Bin):
                     element.attrs.pop("xml:lang", None)
 
                 web_view.load_alternate_html(str(soup), current_uri, current_uri)
+                return True
+
+        return False
 
     def on_load_failed(self, web_view, load_event, failing_uri: str, error):
         print(error)
 
     def on_context_menu(
         self,
-        web_view: WebKit.WebView,
-        context_menu: WebKit.ContextMenu,
-        hit_test_result: WebKit.HitTestResult,
+        web_view: "WebKit.WebView",
+        context_menu: "WebKit.ContextMenu",
+        hit_test_result: "WebKit.HitTestResult",
     ):
         if hit_test_result.context_is_link():
             if not self.docset:
@@ -270,6 +369,7 @@ class DocPage(Adw.Bin):
                 name="open_in_new_tab", parameter_type=GLib.VariantType.new("s")
             )
             action.connect("activate", self._on_open_in_new_tab)
+            WebKit = import_webkit()
             open_in_new_tab_item = WebKit.ContextMenuItem.new_from_gaction(
                 action,
                 "Open In New Tab",
@@ -295,6 +395,14 @@ class DocPage(Adw.Bin):
         self.search_bar.connect_entry(self.search_entry)
         self.search_bar.key_capture_widget = self
 
+        self.setup_find_controller()
+
+    def setup_find_controller(self):
+        """Follow the find controller of the current WebView, once per WebView"""
+
+        if self.find_controller:
+            return
+
         self.find_controller = self.web_view.get_find_controller()
         self.find_controller.connect("counted-matches", self.counted_matches)
         self.find_controller.connect(
@@ -313,6 +421,7 @@ class DocPage(Adw.Bin):
 
     @Gtk.Template.Callback()
     def search_started(self, entry: Gtk.SearchEntry):
+        WebKit = import_webkit()
         text = entry.get_text()
         self.find_controller.search(text, WebKit.FindOptions.CASE_INSENSITIVE, 1000)
         self.find_controller.count_matches(
@@ -322,7 +431,8 @@ class DocPage(Adw.Bin):
     @Gtk.Template.Callback()
     def search_stopped(self, *args):
         self.search_ready = False
-        self.find_controller.search_finish()
+        if self.find_controller:  # not while suspended
+            self.find_controller.search_finish()
 
     @Gtk.Template.Callback()
     def search_next(self, *args):
@@ -334,21 +444,23 @@ class DocPage(Adw.Bin):
 
     @GObject.Property(type=bool, default=False)
     def can_go_back(self) -> bool:
-        return self.web_view.can_go_back() if self.web_view else False
+        return self._web_view.can_go_back() if self._web_view else False
 
     def go_back(self, *args):
-        self.web_view.go_back()
+        if self._web_view:
+            self._web_view.go_back()
 
     @GObject.Property(type=bool, default=False)
     def can_go_forward(self) -> bool:
-        return self.web_view.can_go_forward() if self.web_view else False
+        return self._web_view.can_go_forward() if self._web_view else False
 
     @GObject.Property(type=bool, default=False)
     def has_docset(self) -> bool:
         return self.locator.docset is not None
 
     def go_forward(self, *args):
-        return self.web_view.go_forward()
+        if self._web_view:
+            self._web_view.go_forward()
 
     def zoom_in(self, *args):
         self.zoom_level = self.zoom_level + self.zoom_step
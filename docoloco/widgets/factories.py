@@ -0,0 +1,224 @@
+import html
+from typing import Callable, Optional, cast
+
+import gi
+
+from ..helpers import plurarize
+from ..models import Doc, DocSet, Section
+from ..search import SearchResult
+from .icons import icon_cache
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+from gi.repository import Gdk, Gio, GLib, Gtk, Pango  # noqa: E402
+
+# List rows are recycled as lists scroll, so everything that does not depend on
+# the bound item (widgets, cursors, menus and signal handlers) is created once,
+# in `setup`. `bind` only sets the item's data, and `unbind` drops it.
+
+_pointer_cursor: Gdk.Cursor = None
+
+
+def pointer_cursor() -> Gdk.Cursor:
+    global _pointer_cursor
+
+    if not _pointer_cursor:
+        _pointer_cursor = Gdk.Cursor.new_from_name("pointer")
+
+    return _pointer_cursor
+
+
+class DocLinkRow(Gtk.Box):
+    """A `Doc` link, or a section heading in a tree of sections"""
+
+    def __init__(self, factory: "DocLinkFactory") -> None:
+        super().__init__(spacing=4)
+
+        self.factory = factory
+        self.doc: Doc = None
+        self.tree_row: Gtk.TreeListRow = None
+
+        self.icon = Gtk.Image()
+        self.label = Gtk.Label(halign=Gtk.Align.START, hexpand=True)
+        self.label.set_ellipsize(Pango.EllipsizeMode.END)
+        self.label.set_margin_start(10)
+        self.label.connect("activate-link", self.on_link_activated)
+        self.append(self.icon)
+        self.append(self.label)
+
+        actions = Gio.SimpleActionGroup()
+        open_in_new_tab = Gio.SimpleAction(name="open_in_new_tab")
+        open_in_new_tab.connect("activate", self.on_open_in_new_tab)
+        actions.add_action(open_in_new_tab)
+        self.insert_action_group("row", actions)
+
+    def bind_section(self, section: Section):
+        self.icon.set_visible(True)
+        self.icon.set_from_icon_name(section.icon_name)
+        self.label.set_margin_start(0)
+        self.set_text(f"{plurarize(section.title)} ({section.count})")
+
+    def bind_doc(self, doc: Doc):
+        self.doc = doc
+        self.icon.set_visible(False)
+        self.label.set_margin_start(10)
+
+        if doc.type == "Loading":
+            self.set_text(doc.name, markup=f"<i>{html.escape(doc.name)}</i>")
+            return
+
+        self.label.set_markup(
+            f"<a href='{html.escape(doc.url)}'>{html.escape(doc.name)}</a>"
+        )
+        self.label.set_cursor(pointer_cursor())
+        self.label.set_tooltip_text(doc.name)
+        self.label.set_extra_menu(self.factory.doc_menu if doc.type != "More" else None)
+
+    def set_text(self, text: str, markup: str = None):
+        self.label.set_markup(markup or html.escape(text))
+        self.label.set_cursor(None)
+        self.label.set_tooltip_text(None)
+        self.label.set_extra_menu(None)
+
+    def unbind(self):
+        self.doc = None
+        self.tree_row = None
+
+    def on_link_activated(self, label: Gtk.Label, uri: str):
+        label.stop_emission_by_name("activate-link")
+        if self.doc:
+            self.factory.on_activate(self.doc, self.tree_row)
+
+        return True
+
+    def on_open_in_new_tab(self, *_):
+        docset = self.factory.get_docset()
+        if not (self.doc and docset):
+            return
+
+        self.activate_action(
+            "win.open_in_new_tab",
+            GLib.Variant("(sss)", (self.doc.url, docset.provider_id, docset.name)),
+        )
+
+
+class DocLinkFactory(Gtk.SignalListItemFactory):
+    """Rows of `Doc` links, for a list of docs or a `Gtk.TreeListModel` of
+    sections and their docs.
+
+    `on_activate` is called with the clicked doc, and with its row in the tree
+    """
+
+    def __init__(
+        self,
+        get_docset: Callable[[], DocSet],
+        on_activate: Callable[[Doc, Optional[Gtk.TreeListRow]], None],
+        tree: bool = False,
+    ) -> None:
+        super().__init__()
+
+        self.get_docset = get_docset
+        self.on_activate = on_activate
+        self.tree = tree
+
+        # One menu for every row; its action is resolved by the row it opens on
+        self.doc_menu = Gio.Menu()
+        self.doc_menu.append("Open In New Tab", "row.open_in_new_tab")
+
+        self.connect("setup", self.on_setup)
+        self.connect("bind", self.on_bind)
+        self.connect("unbind", self.on_unbind)
+
+    def on_setup(self, factory, list_item: Gtk.ListItem):
+        row = DocLinkRow(self)
+        if self.tree:
+            expander = Gtk.TreeExpander()
+            expander.set_child(row)
+            list_item.set_child(expander)
+        else:
+            list_item.set_child(row)
+
+    def on_bind(self, factory, list_item: Gtk.ListItem):
+        if not self.tree:
+            cast(DocLinkRow, list_item.get_child()).bind_doc(list_item.get_item())
+            return
+
+        tree_row = cast(Gtk.TreeListRow, list_item.get_item())
+        expander = cast(Gtk.TreeExpander, list_item.get_child())
+        expander.set_list_row(tree_row)
+
+        row = cast(DocLinkRow, expander.get_child())
+        row.tree_row = tree_row
+        item = tree_row.get_item()
+        if isinstance(item, Section):
+            row.bind_section(item)
+        else:
+            row.bind_doc(item)
+
+    def on_unbind(self, factory, list_item: Gtk.ListItem):
+        child = list_item.get_child()
+        if self.tree:
+            expander = cast(Gtk.TreeExpander, child)
+            expander.set_list_row(None)
+            child = expander.get_child()
+
+        cast(DocLinkRow, child).unbind()
+
+
+class SearchResultRow(Gtk.Box):
+    def __init__(self) -> None:
+        super().__init__(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+
+        self.icon = Gtk.Image()
+        self.label = Gtk.Label(halign=Gtk.Align.START)
+        self.subtitle_label = Gtk.Label(halign=Gtk.Align.START)
+        self.subtitle_label.set_ellipsize(Pango.EllipsizeMode.END)
+        self.subtitle_label.add_css_class("dim-label")
+        self.subtitle_label.add_css_class("caption")
+
+        labels_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        labels_box.append(self.label)
+        labels_box.append(self.subtitle_label)
+
+        title_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+        title_box.append(self.icon)
+        title_box.append(labels_box)
+        title_box.set_hexpand(True)
+        title_box.set_hexpand_set(True)
+        self.append(title_box)
+
+        self.arrow = Gtk.Image()
+        self.arrow.set_from_icon_name("go-next-symbolic")
+        self.append(self.arrow)
+
+    def bind(self, result: SearchResult):
+        icon_cache.set_image(self.icon, result.icon)
+
+        self.label.set_label(result.title)
+        self.subtitle_label.set_markup(result.subtitle or "")
+        self.subtitle_label.set_visible(bool(result.subtitle))
+        self.arrow.set_visible(result.has_child)
+
+    def unbind(self):
+        icon_cache.clear_image(self.icon)
+
+
+class SearchResultFactory(Gtk.SignalListItemFactory):
+    """Rows of `SearchResult`s, as shown by the locator"""
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.connect("setup", self.on_setup)
+        self.connect("bind", self.on_bind)
+        self.connect("unbind", self.on_unbind)
+
+    def on_setup(self, factory, list_item: Gtk.ListItem):
+        list_item.set_child(SearchResultRow())
+
+    def on_bind(self, factory, list_item: Gtk.ListItem):
+        row = cast(SearchResultRow, list_item.get_child())
+        row.bind(cast(SearchResult, list_item.get_item()))
+
+    def on_unbind(self, factory, list_item: Gtk.ListItem):
+        cast(SearchResultRow, list_item.get_child()).unbind()
@@ -0,0 +1,193 @@
+import os
+import queue
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import gi
+
+from ..diagnostics.metrics import metrics
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("GdkPixbuf", "2.0")
+from gi.repository import Gdk, GdkPixbuf, Gio, GLib, Gtk  # noqa: E402
+
+# Docset and provider icons are shown at the size of a normal `Gtk.Image`
+ICON_SIZE = 16
+
+PLACEHOLDER_ICON = "accessories-dictionary-symbolic"
+
+TextureKey = Tuple[str, int, int]
+
+
+def icon_file_path(icon) -> Optional[str]:
+    if isinstance(icon, Gio.FileIcon):
+        return icon.get_file().get_path()
+
+    return None
+
+
+def scaled_icon_path(path: str, scale: int) -> str:
+    """The @2x variant of a Dash icon on HiDPI displays, when the docset has one"""
+
+    if scale < 2:
+        return path
+
+    file_path = Path(path)
+    retina_path = file_path.with_name(f"{file_path.stem}@2x{file_path.suffix}")
+
+    return retina_path.as_posix() if retina_path.exists() else path
+
+
+class TextureCache:
+    """Icon files decoded once into `Gdk.Texture`s, keyed by path, mtime and
+    scale, and shared by every image that shows them.
+
+    Textures are decoded on a worker thread; until then, images show a
+    placeholder. Files that cannot be decoded are shown as their `Gio.FileIcon`.
+    """
+
+    def __init__(self, size: int = ICON_SIZE) -> None:
+        self.size = size
+        self.textures: Dict[TextureKey, Gdk.Texture] = dict()
+        self.waiting: Dict[TextureKey, list] = dict()
+        self.failed: Set[TextureKey] = set()
+        # The latest key of each file and scale, to drop textures of older mtimes
+        self.current_keys: Dict[Tuple[str, int], TextureKey] = dict()
+        # The key each image or tab page is waiting for, or showing
+        self.target_keys: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[TextureKey]" = queue.Queue()
+        self._worker: threading.Thread = None
+
+    def key(self, path: str, scale: int) -> Optional[TextureKey]:
+        path = scaled_icon_path(path, scale)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        key = (path, mtime, scale)
+        with self._lock:
+            previous_key = self.current_keys.get((path, scale))
+            if previous_key != key:
+                self.current_keys[(path, scale)] = key
+                self.textures.pop(previous_key, None)
+                self.failed.discard(previous_key)
+
+        return key
+
+    def load_key(
+        self, key: TextureKey, callback: Callable[[Optional[Gdk.Texture]], None]
+    ):
+        """Call `callback` on the main thread with the texture of `key`, at once
+        when it is cached, or once it is decoded; with `None` when the file
+        cannot be decoded
+        """
+
+        if key in self.failed:
+            callback(None)
+            return
+
+        with self._lock:
+            texture = self.textures.get(key)
+            if not texture:
+                is_queued = key in self.waiting
+                self.waiting.setdefault(key, []).append(callback)
+
+        metrics.record_cache("icon texture", texture is not None)
+        if texture:
+            callback(texture)
+        elif not is_queued:
+            self._start_worker()
+            self._queue.put(key)
+
+    def set_image(self, image: Gtk.Image, icon):
+        """Show `icon` in `image`, from the cache when it is a file icon"""
+
+        if isinstance(icon, str):
+            self.target_keys.pop(image, None)
+            image.set_from_icon_name(icon)
+        else:
+            self.set_icon(image, icon, image.get_scale_factor(), image.set_from_gicon)
+
+    def set_icon(
+        self,
+        target,
+        icon: Gio.Icon,
+        scale: int,
+        setter: Callable[[Gio.Icon], None] = None,
+    ):
+        """Show `icon` on `target` with `setter`, or its `set_icon` method, as
+        on tab pages. Textures are `Gio.Icon`s too.
+        """
+
+        setter = setter or target.set_icon
+        self.target_keys.pop(target, None)
+
+        path = icon_file_path(icon)
+        key = path and self.key(path, scale)
+        if not key or key in self.failed:
+            setter(icon)
+            return
+
+        self.target_keys[target] = key
+        if key not in self.textures:
+            setter(Gio.ThemedIcon.new(PLACEHOLDER_ICON))
+
+        def on_texture(texture: Optional[Gdk.Texture]):
+            # The target may have been given another icon in the meantime
+            if self.target_keys.get(target) == key:
+                setter(texture or icon)
+
+        self.load_key(key, on_texture)
+
+    def clear_image(self, image: Gtk.Image):
+        self.target_keys.pop(image, None)
+        image.clear()
+
+    def _start_worker(self):
+        if self._worker:
+            return
+
+        self._worker = threading.Thread(
+            target=self._decode, name="icon-textures", daemon=True
+        )
+        self._worker.start()
+
+    def _decode(self):
+        while True:
+            key = self._queue.get()
+            path, _, scale = key
+            pixels = self.size * scale
+            try:
+                pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
+                    path, pixels, pixels, True
+                )
+                texture = Gdk.Texture.new_for_pixbuf(pixbuf)
+            except GLib.Error as e:
+                print(f"Failed to load the icon {path}: {e}")
+                texture = None
+
+            GLib.idle_add(self._finish, key, texture)
+
+    def _finish(self, key: TextureKey, texture: Gdk.Texture):
+        path, _, scale = key
+        with self._lock:
+            # Unless the file changed while it was decoded
+            is_current = self.current_keys.get((path, scale)) == key
+            if texture and is_current:
+                self.textures[key] = texture
+            elif is_current:
+                self.failed.add(key)
+            callbacks = self.waiting.pop(key, [])
+
+        for callback in callbacks:
+            callback(texture)
+
+        return GLib.SOURCE_REMOVE
+
+
+icon_cache = TextureCache()
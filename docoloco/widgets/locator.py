@@ -3,12 +3,15 @@ from typing import cast
 import gi
 
 from ..config import default_config
+from ..diagnostics.trace import get_keystroke_recorder
 from ..models import Doc, DocSet, Section
+from ..registry import get_registry
 from ..search import SearchProvider, SearchResult
+from .factories import SearchResultFactory
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-from gi.repository import Adw, Gdk, Gio, GLib, GObject, Gtk  # noqa: E402
+from gi.repository import Adw, Gdk, Gio, GLib, Gtk  # noqa: E402
 
 
 @Gtk.Template(filename=default_config.template("locator"))
@@ -39,9 +42,7 @@ class Locator(Adw.Bin):
 
         self.entry.connect("changed", self.search_changed)
 
-        view_factory = Gtk.SignalListItemFactory()
-        view_factory.connect("setup", self.setup_search_result)
-        view_factory.connect("bind", self.bind_search_result)
+        view_factory = SearchResultFactory()
 
         self.search_selection_model = Gtk.SingleSelection(
             model=self.search_result_model
@@ -63,49 +64,54 @@ class Locator(Adw.Bin):
         key_event_controller.connect("key-released", self.on_key_released)
         self.popover.add_controller(key_event_controller)
 
-    def setup_search_result(self, factory, obj: GObject.Object):
-        list_item = cast(Gtk.ListItem, obj)
-        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
-
-        icon = Gtk.Image()
-        label = Gtk.Label()
-
-        title_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
-        title_box.append(icon)
-        title_box.append(label)
-        title_box.set_hexpand(True)
-        title_box.set_hexpand_set(True)
-        box.append(title_box)
-
-        arrow = Gtk.Image()
-        arrow.set_from_icon_name("go-next-symbolic")
-        box.append(arrow)
-        list_item.set_child(box)
-
-    def bind_search_result(self, factory, obj: GObject.Object):
-        list_item = cast(Gtk.ListItem, obj)
-        box = cast(Gtk.Box, list_item.get_child())
-        title_box = cast(Gtk.Box, box.get_first_child())
-        result = cast(SearchResult, list_item.get_item())
-
-        icon = cast(Gtk.Image, title_box.get_first_child())
-        if isinstance(result.icon, str):
-            icon.set_from_icon_name(result.icon)
-        else:
-            icon.set_from_gicon(result.icon)
+        self.refresh_source_id = 0
+        # The registry outlives the locator, so it is only connected while the
+        # locator is shown, or it would keep closed tabs' locators alive
+        self.registry_handler_ids = []
+        self.connect("map", self.on_map)
+        self.connect("unmap", self.on_unmap)
 
-        label = cast(Gtk.Label, title_box.get_last_child())
-        label.set_label(result.title)
+    def on_map(self, *_):
+        registry = get_registry()
+        self.registry_handler_ids = [
+            registry.connect("docset-added", self.on_registry_changed),
+            registry.connect("provider-loaded", self.on_registry_changed),
+        ]
 
-        arrow = cast(Gtk.Image, box.get_last_child())
-        if result.has_child:
-            arrow.show()
-        else:
-            arrow.hide()
+    def on_registry_changed(self, *_):
+        """Re-run the docset filter while docsets are still being loaded"""
+
+        if self.refresh_source_id or self.docset or not self.popover.get_visible():
+            return
+
+        self.refresh_source_id = GLib.timeout_add(150, self.refresh_results)
+
+    def refresh_results(self):
+        self.refresh_source_id = 0
+        if not self.docset:
+            self.search_changed()
+            self.on_search_result_items_changed()
+
+        return False
+
+    def on_unmap(self, *_):
+        registry = get_registry()
+        for handler_id in self.registry_handler_ids:
+            registry.disconnect(handler_id)
+        self.registry_handler_ids = []
+
+        if self.refresh_source_id:
+            GLib.source_remove(self.refresh_source_id)
+            self.refresh_source_id = 0
 
     def search_changed(self, *_):
         text: str = self.entry.get_text()
         text = text.strip().lower()
+
+        recorder = get_keystroke_recorder()
+        if recorder:
+            recorder.record(text, self.docset, self.section)
+
         self.search_provider.search(text)
 
     def entry_activated(self, pos: int = None, result: Doc = None):
@@ -195,6 +201,9 @@ class Locator(Adw.Bin):
         if model_has_items:
             self.status_page.set_title("Search or Filter Docsets")
             self.status_page.set_description(None)
+        elif get_registry().is_loading:
+            self.status_page.set_title("Loading Docsets")
+            self.status_page.set_description("Results appear as docsets are loaded")
         else:
             self.status_page.set_title("No Results Found")
             self.status_page.set_description("Try a different search")
@@ -1,10 +1,13 @@
-from typing import Callable, Tuple, cast
+from typing import Callable, List, Tuple, cast
 
 import gi
 
 from ..config import default_config
+from ..diagnostics.profiler import profiler
 from ..registry import get_registry
 from .doc_page import DocPage
+from .icons import icon_cache
+from .suspender import TabSuspender
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
@@ -24,6 +27,7 @@ class MainWindow(Adw.ApplicationWindow):
 
     primary_menu_btn = cast(Gtk.MenuButton, Gtk.Template.Child("primary_menu_btn"))
     toggle_side_pane_btn = cast(Gtk.Button, Gtk.Template.Child())
+    toast_overlay = cast(Adw.ToastOverlay, Gtk.Template.Child("toast_overlay"))
 
     def __init__(self, app: Adw.Application):
         super().__init__(application=app, title="DocoLoco")
@@ -36,6 +40,8 @@ class MainWindow(Adw.ApplicationWindow):
         self.tab_view.connect("notify::title", self.on_tab_change)
         self.tab_view.connect("notify::selected-page", self.on_tab_change)
         # TODO: Setup tab_view signals for on-close
+        self.tab_suspender = TabSuspender(self.tab_view)
+        self.connect("destroy", lambda *_: self.tab_suspender.stop())
 
         self.popover_primary_menu = cast(
             Gtk.PopoverMenu, self.primary_menu_btn.get_popover()
@@ -100,11 +106,13 @@ class MainWindow(Adw.ApplicationWindow):
             ("change_docset", self.change_docset, "(ssi)", None, None),
             ("change_section", self.change_section, "s", None, None),
             ("open_in_new_tab", self.open_in_new_tab, "(sss)", None, None),
+            ("open_docset_page", self.open_docset_page, "(sss)", None, None),
             ("toggle_sidepane", self.toggle_sidepane, None, "<primary>H", None),
             ("filter_docset", self.filter_docset, "s", None, None),
             ("close_tab", self.close_tab, None, "<primary>W", None),
             ("go_back", self.go_back, None, "<Alt>Left", None),
             ("go_forward", self.go_forward, None, "<Alt>Right", None),
+            ("toggle_profiler", self.toggle_profiler, None, "<primary><Alt>P", None),
         ]
 
         for action in actions:
@@ -147,12 +155,13 @@ class MainWindow(Adw.ApplicationWindow):
 
         docset = doc_page.docset
         if docset:
-            page.set_icon(docset.icon)
+            icon_cache.set_icon(page, docset.icon, self.get_scale_factor())
 
         doc_page.bind_property("title", page, "title", GObject.BindingFlags.DEFAULT)
         page.set_title(doc_page.title)
         page.connect("notify::title", self.on_page_title_changed)
-        page.set_live_thumbnail(True)
+        # Live thumbnails would keep the WebViews of suspended tabs drawing
+        page.set_live_thumbnail(False)
         self.tab_view.set_selected_page(page)
 
     def on_page_title_changed(self, page: Adw.TabPage, title):
@@ -209,8 +218,10 @@ class MainWindow(Adw.ApplicationWindow):
 
         provider_id, docset_name, position = parameters.unpack()
         docset = get_registry().get(provider_id, docset_name, position)
-        if not docset.is_populated:
-            docset.populate_all_sections()
+        if not docset:
+            return
+
+        docset.prepare()
 
         page = self.tab_view.get_selected_page()
         doc_page = cast(DocPage, page.get_child())
@@ -245,6 +256,43 @@ class MainWindow(Adw.ApplicationWindow):
         )
         self.activate_action("win.open_page", GLib.Variant.new_string(url))
 
+    def open_docset_page(self, action, parameters):
+        if not (parameters or action):
+            return
+
+        url, provider_id, docset_name = parameters.unpack()
+
+        self.activate_action(
+            "win.change_docset",
+            GLib.Variant("(ssi)", (provider_id, docset_name, 0)),
+        )
+        self.activate_action("win.open_page", GLib.Variant.new_string(url))
+
+    def toggle_profiler(self, *_):
+        paths = profiler.toggle()
+
+        if profiler.is_running:
+            self.primary_menu_btn.set_icon_name("media-record-symbolic")
+            self.primary_menu_btn.set_tooltip_text(
+                "Profiling, press Ctrl+Alt+P to stop"
+            )
+        else:
+            self.primary_menu_btn.set_icon_name("open-menu-symbolic")
+            self.primary_menu_btn.set_tooltip_text("Main Menu")
+
+        if paths:
+            stats_path, collapsed_path = paths
+            print(f"Profile saved to {stats_path} and {collapsed_path}")
+
+            # Launched from the desktop, stdout is not seen; the toast stays
+            # until it is dismissed, so that the paths can be read
+            toast = Adw.Toast(
+                title=f"Profile saved to {stats_path} and {collapsed_path}",
+                use_markup=False,
+                timeout=0,
+            )
+            self.toast_overlay.add_toast(toast)
+
     def toggle_sidepane(self, *_):
         if not self.selected_doc_page.has_docset:
             return
@@ -265,6 +313,10 @@ class MainWindow(Adw.ApplicationWindow):
 
         return adw_page.get_child()
 
+    @property
+    def doc_pages(self) -> List[DocPage]:
+        return [self.doc_page(pos) for pos in range(self.tab_view.get_n_pages())]
+
     @property
     def selected_doc_page(self) -> DocPage:
         page = self.tab_view.get_selected_page()
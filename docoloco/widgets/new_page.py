@@ -21,7 +21,7 @@ class NewPage(Adw.Bin):
     def __init__(self):
         super().__init__()
 
-        providers_list_page = ProvidersListPage(providers=get_registry().providers)
+        providers_list_page = ProvidersListPage(registry=get_registry())
         self.navigation_view.add(providers_list_page)
 
     def filter_item(self, title: str):
@@ -1,7 +1,10 @@
-from typing import cast
+from typing import Dict, cast
 from ..helpers import is_valid_url
 import gi
 from docoloco.config import default_config
+from docoloco.diagnostics.memory import allocations, format_bytes, memory_report
+from docoloco.diagnostics.metrics import metrics
+from docoloco.registry import get_registry
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
@@ -22,6 +25,29 @@ class PreferencesWindow(Adw.PreferencesWindow):
         self.download_website_url: str = None
         self.download_website_task: Gio.Task = None
 
+        self.debug_page: DebugPage = None
+        shortcuts = Gtk.ShortcutController()
+        shortcuts.add_shortcut(
+            Gtk.Shortcut.new(
+                Gtk.ShortcutTrigger.parse_string("<Control><Shift>d"),
+                Gtk.CallbackAction.new(self.show_debug_page),
+            )
+        )
+        self.add_controller(shortcuts)
+
+        if default_config.get_setting("debug", False):
+            self.show_debug_page()
+
+    def show_debug_page(self, *_):
+        """Reveal the hidden page with the search metrics"""
+
+        if not self.debug_page:
+            self.debug_page = DebugPage(self.get_transient_for())
+            self.add(self.debug_page)
+
+        self.set_visible_page(self.debug_page)
+        return True
+
     @Gtk.Template.Callback()
     def on_url_apply(self, *args):
         self.download_btn.set_visible(True)
@@ -75,3 +101,158 @@ class PreferencesWindow(Adw.PreferencesWindow):
 
     def on_download_website_complete(self, *args):
         pass
+
+
+class DebugPage(Adw.PreferencesPage):
+    """Search latency, subprocess time and cache hit rates, refreshed every second,
+    and memory estimates, refreshed on demand
+    """
+
+    def __init__(self, window=None):
+        super().__init__(
+            title="Debug", icon_name="utilities-system-monitor-symbolic", name="debug"
+        )
+
+        self.window = window
+        self.groups: Dict[str, Adw.PreferencesGroup] = dict()
+        self.rows: Dict[str, Adw.ActionRow] = dict()
+
+        for key, title in [
+            ("latencies", "Latency"),
+            ("subprocesses", "Subprocesses"),
+            ("caches", "Caches"),
+            ("counts", "Counts"),
+            ("memory", "Memory"),
+            ("allocations", "Allocations"),
+        ]:
+            group = Adw.PreferencesGroup(title=title)
+            self.groups[key] = group
+            self.add(group)
+
+        export_btn = Gtk.Button(label="Export JSON", valign=Gtk.Align.CENTER)
+        export_btn.connect("clicked", self.on_export)
+        self.groups["latencies"].set_header_suffix(export_btn)
+
+        memory_btn = Gtk.Button(label="Refresh", valign=Gtk.Align.CENTER)
+        memory_btn.connect("clicked", lambda *_: self.refresh_memory())
+        self.groups["memory"].set_header_suffix(memory_btn)
+
+        allocations_btn = Gtk.Button(label="Snapshot", valign=Gtk.Align.CENTER)
+        allocations_btn.connect("clicked", self.on_allocations_snapshot)
+        self.groups["allocations"].set_header_suffix(allocations_btn)
+        self.groups["allocations"].set_description(
+            "Each snapshot lists what grew since the previous one"
+            if allocations.is_tracing
+            else "The first snapshot starts tracing allocations"
+        )
+
+        self.refresh_memory()
+        # The timer holds the page, so it only runs while the page is shown
+        self.refresh_source_id = 0
+        self.connect("map", self.on_map)
+        self.connect("unmap", self.on_unmap)
+
+    def on_map(self, *_):
+        self.refresh()
+        if not self.refresh_source_id:
+            self.refresh_source_id = GLib.timeout_add_seconds(1, self.refresh)
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+
+        for key in ("latencies", "subprocesses"):
+            for name, histogram in snapshot[key].items():
+                subtitle = (
+                    f"{histogram['count']} calls · p50 ≤ {histogram['p50_ms']:g} ms · "
+                    f"p95 ≤ {histogram['p95_ms']:g} ms · "
+                    f"max {histogram['max_ms']:.1f} ms"
+                )
+                if histogram["rows"]:
+                    subtitle = f"{subtitle} · {histogram['rows']} rows"
+                self.set_row(key, name, subtitle)
+
+        for name, cache in snapshot["caches"].items():
+            self.set_row(
+                "caches",
+                name,
+                f"{cache['hit_rate']:.0%} hits · {cache['hits']} hits, "
+                f"{cache['misses']} misses",
+            )
+
+        for name, count in snapshot["counts"].items():
+            self.set_row(
+                "counts",
+                name,
+                f"{count['mean']:.1f} per call · max {count['max']} · "
+                f"{count['calls']} calls",
+            )
+
+        return True
+
+    def refresh_memory(self):
+        pages = self.window.doc_pages if self.window else []
+        report = memory_report(get_registry(), pages)
+
+        self.set_row(
+            "memory",
+            "Resident",
+            f"{format_bytes(report['rss_bytes'])} · "
+            f"{format_bytes(report['docsets_bytes'])} estimated in docsets",
+        )
+        with_web_view = sum(1 for tab in report["tabs"] if tab["has_web_view"])
+        suspended = sum(1 for tab in report["tabs"] if tab["suspended"])
+        self.set_row(
+            "memory",
+            "Tabs",
+            f"{len(report['tabs'])} tabs · {with_web_view} with a WebView · "
+            f"{suspended} suspended · "
+            f"{len(report['web_processes'])} WebKit processes, "
+            f"{format_bytes(report['web_processes_rss_bytes'])} resident",
+        )
+
+        for usage in report["docsets"]:
+            if not usage["total_bytes"]:
+                continue
+
+            self.set_row(
+                "memory",
+                f"{usage['provider']}: {usage['docset']}",
+                f"{format_bytes(usage['total_bytes'])} · "
+                f"{usage['section_items']} section items, "
+                f"{format_bytes(usage['sections_bytes'])} · "
+                f"SQLite cache ≤ {format_bytes(usage['sqlite_cache_limit_bytes'])}",
+            )
+
+    def on_allocations_snapshot(self, button: Gtk.Button):
+        for key in [key for key in self.rows if key.startswith("allocations/")]:
+            self.groups["allocations"].remove(self.rows.pop(key))
+
+        for diff in allocations.take():
+            self.set_row(
+                "allocations",
+                diff.location,
+                f"{format_bytes(diff.size_diff_bytes)} in "
+                f"{diff.count_diff:+d} blocks",
+            )
+
+        self.groups["allocations"].set_description(
+            "Each snapshot lists what grew since the previous one"
+        )
+
+    def set_row(self, key: str, name: str, subtitle: str):
+        row = self.rows.get(f"{key}/{name}")
+        if not row:
+            row = Adw.ActionRow(title=name)
+            self.rows[f"{key}/{name}"] = row
+            self.groups[key].add(row)
+
+        row.set_subtitle(subtitle)
+
+    def on_export(self, button: Gtk.Button):
+        path = metrics.dump()
+        button.set_tooltip_text(f"Written to {path}")
+
+    def on_unmap(self, *_):
+        if self.refresh_source_id:
+            GLib.source_remove(self.refresh_source_id)
+            self.refresh_source_id = 0
@@ -1,9 +1,12 @@
-from typing import Callable, Dict, cast
+from typing import Callable, Dict, Tuple, cast
 
 import gi
 
 from docoloco.config import default_config
 from docoloco.providers import DocumentationProvider
+from docoloco.registry import Registry
+
+from .icons import icon_cache
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
@@ -19,27 +22,75 @@ class ProvidersListPage(Adw.NavigationPage):
 
     def __init__(
         self,
-        providers: Dict[str, DocumentationProvider],
+        registry: Registry,
         on_activate_row: Callable[[DocumentationProvider], None] = None,
     ):
         super().__init__(title="Providers")
         self.on_activate_callback = on_activate_row
+        self.registry = registry
+        self.rows: Dict[str, Tuple[Adw.ActionRow, Gtk.Spinner]] = dict()
 
-        for id, provider in providers.items():
+        for id, provider in registry.providers.items():
             action_row = Adw.ActionRow()
             action_row.set_title(provider.name)
-            action_row.set_subtitle(id)
 
             icon = Gtk.Image()
-            icon.set_from_gicon(provider.icon)
+            icon_cache.set_image(icon, provider.icon)
             action_row.add_prefix(icon)
 
+            spinner = Gtk.Spinner()
+            action_row.add_suffix(spinner)
+
             button = Gtk.Button()
             # button.connect("mnemonic-activate", self.on_provider_activate)
             action_row.set_activatable_widget(button)
             action_row.connect("activated", self.on_provider_activate, provider.id)
 
             self.providers_list_box.append(action_row)
+            self.rows[id] = (action_row, spinner)
+
+        # Connected only while shown, as the registry would keep the page alive
+        self.handler_ids = []
+        self.connect("map", self.on_map)
+        self.connect("unmap", self.on_unmap)
+
+    def update_row(self, provider_id: str):
+        action_row, spinner = self.rows[provider_id]
+        provider = self.registry.providers[provider_id]
+        is_loading = provider_id in self.registry.loading_providers
+
+        subtitle = provider_id
+        if provider.type == DocumentationProvider.Type.PRELOADED:
+            count = len(provider.docs)
+            subtitle = f"{provider_id} · {count} docset{'' if count == 1 else 's'}"
+        if is_loading:
+            subtitle = f"{subtitle} · Loading…"
+
+        action_row.set_subtitle(subtitle)
+        spinner.set_visible(is_loading)
+        spinner.set_spinning(is_loading)
+
+    def on_docset_added(self, registry: Registry, provider_id: str, docset_name: str):
+        self.update_row(provider_id)
+
+    def on_provider_loaded(self, registry: Registry, provider_id: str):
+        self.update_row(provider_id)
+
+    def on_map(self, *_):
+        for provider_id in self.rows:
+            self.update_row(provider_id)
+
+        self.handler_ids = [
+            self.registry.connect("docset-added", self.on_docset_added),
+            self.registry.connect("provider-loaded", self.on_provider_loaded),
+        ]
+
+    def on_unmap(self, *_):
+        for handler_id in self.handler_ids:
+            self.registry.disconnect(handler_id)
+        self.handler_ids = []
 
     def on_provider_activate(self, _, provider_id):
-        self.activate_action("win.focus_locator", GLib.Variant.new_string(f"{provider_id}: "))
\ No newline at end of file
+        self.activate_action(
+            "win.focus_locator", GLib.Variant.new_string(f"{provider_id}: ")
+        )
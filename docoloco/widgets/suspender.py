@@ -0,0 +1,97 @@
+import time
+from typing import List
+
+import gi
+
+from ..config import default_config
+from ..diagnostics.memory import child_processes
+from .doc_page import DocPage
+
+gi.require_version("Adw", "1")
+from gi.repository import Adw, GLib  # noqa: E402
+
+CHECK_INTERVAL_SECONDS = 30
+
+# Process names are cut to 15 characters, e.g. "WebKitWebProces"
+WEB_PROCESS_PREFIX = "WebKitWebProc"
+
+
+class TabSuspender:
+    """Releases the WebViews of background tabs, and their web processes, once
+    they have not been selected for `tab_suspend_after_minutes`, or, least
+    recently used first, while the web processes use more than
+    `web_memory_budget_mb`. A suspended tab is rebuilt when it is selected.
+    """
+
+    def __init__(self, tab_view: Adw.TabView) -> None:
+        self.tab_view = tab_view
+        self.idle_seconds = (
+            float(default_config.get_setting("tab_suspend_after_minutes", 15)) * 60
+        )
+        self.budget_bytes = (
+            int(default_config.get_setting("web_memory_budget_mb", 0)) * 1024 * 1024
+        )
+        self.selected_page: DocPage = None
+
+        tab_view.connect("notify::selected-page", self.on_selected_page_changed)
+        self.source_id = None
+        if self.idle_seconds or self.budget_bytes:
+            self.source_id = GLib.timeout_add_seconds(
+                CHECK_INTERVAL_SECONDS, self.check
+            )
+
+    def stop(self):
+        if self.source_id:
+            GLib.source_remove(self.source_id)
+            self.source_id = None
+
+    def on_selected_page_changed(self, tab_view: Adw.TabView, _):
+        now = time.monotonic()
+        if self.selected_page:
+            self.selected_page.last_active = now
+
+        page = tab_view.get_selected_page()
+        self.selected_page = page.get_child() if page else None
+        if self.selected_page:
+            self.selected_page.last_active = now
+            self.selected_page.resume()
+
+    def background_pages(self) -> List[DocPage]:
+        """Background tabs that hold a WebView, least recently used first"""
+
+        pages = [
+            self.tab_view.get_nth_page(position).get_child()
+            for position in range(self.tab_view.get_n_pages())
+        ]
+
+        return sorted(
+            (
+                page
+                for page in pages
+                if page is not self.selected_page
+                and page._web_view is not None
+                and not page.suspended
+            ),
+            key=lambda page: page.last_active,
+        )
+
+    def check(self):
+        pages = self.background_pages()
+
+        if self.idle_seconds:
+            now = time.monotonic()
+            for page in list(pages):
+                if now - page.last_active > self.idle_seconds:
+                    page.suspend()
+                    pages.remove(page)
+
+        if self.budget_bytes and pages:
+            used = sum(
+                process.rss_bytes for process in child_processes(WEB_PROCESS_PREFIX)
+            )
+            # Web processes may be shared, so suspend one tab per check and
+            # measure again on the next one
+            if used > self.budget_bytes:
+                pages[0].suspend()
+
+        return GLib.SOURCE_CONTINUE
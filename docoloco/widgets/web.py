@@ -0,0 +1,123 @@
+from typing import TYPE_CHECKING, List
+
+import gi
+
+from ..config import default_config
+
+gi.require_version("WebKit", "6.0")
+from gi.repository import GLib  # noqa: E402
+
+if TYPE_CHECKING:
+    from gi.repository import WebKit
+
+
+def import_webkit():
+    """WebKit takes long to load, so it is only imported for the first page"""
+
+    from gi.repository import WebKit
+
+    return WebKit
+
+
+class WebViews:
+    """Creates the WebViews of every tab with one web context, network session
+    and settings, tuned for local documentation rather than browsing.
+
+    Pages are cached with the document viewer cache model, in a disk cache
+    shared by all tabs. Views are related to one another so that tabs share at
+    most `web_process_limit` web processes, and each web process is asked to
+    free memory above `web_process_memory_limit_mb`.
+    """
+
+    def __init__(self) -> None:
+        self.web_context: "WebKit.WebContext" = None
+        self.network_session: "WebKit.NetworkSession" = None
+        self.settings: "WebKit.Settings" = None
+
+        self.process_limit = max(
+            1, int(default_config.get_setting("web_process_limit", 4))
+        )
+        self.memory_limit_mb = int(
+            default_config.get_setting("web_process_memory_limit_mb", 0)
+        )
+        # The live views of each web process; a process is only forgotten once
+        # none of its views is left, as related views keep it running
+        self.processes: List[List["WebKit.WebView"]] = []
+        self.next_process = 0
+
+    def setup(self):
+        if self.web_context:
+            return
+
+        WebKit = import_webkit()
+
+        memory_pressure_settings = None
+        if self.memory_limit_mb:
+            memory_pressure_settings = WebKit.MemoryPressureSettings.new()
+            memory_pressure_settings.set_memory_limit(self.memory_limit_mb)
+
+        self.web_context = WebKit.WebContext(
+            memory_pressure_settings=memory_pressure_settings
+        )
+        self.web_context.set_cache_model(WebKit.CacheModel.DOCUMENT_VIEWER)
+
+        cache_dir = default_config.application_cache_dir / "WebKit"
+        self.network_session = WebKit.NetworkSession.new(
+            (default_config.user_data_dir / "DocoLoco" / "WebKit").as_posix(),
+            cache_dir.as_posix(),
+        )
+
+        self.settings = WebKit.Settings(
+            allow_top_navigation_to_data_urls=True,
+            enable_back_forward_navigation_gestures=True,
+            enable_media_capabilities=True,
+            enable_media_stream=True,
+            enable_spatial_navigation=True,
+            enable_page_cache=True,
+        )
+
+    def create(self) -> "WebKit.WebView":
+        self.setup()
+        WebKit = import_webkit()
+
+        properties = dict(settings=self.settings, hexpand=True, vexpand=True)
+
+        if len(self.processes) < self.process_limit:
+            web_view = WebKit.WebView(
+                web_context=self.web_context,
+                network_session=self.network_session,
+                **properties,
+            )
+            process_views = []
+            self.processes.append(process_views)
+        else:
+            # Round robin over the web processes that are already running;
+            # related views share their context and session too
+            self.next_process = (self.next_process + 1) % len(self.processes)
+            process_views = self.processes[self.next_process]
+            web_view = WebKit.WebView(related_view=process_views[0], **properties)
+
+        process_views.append(web_view)
+        web_view.connect("unrealize", self.on_view_unrealized)
+        return web_view
+
+    def on_view_unrealized(self, web_view: "WebKit.WebView"):
+        # Views of suspended and closed tabs leave the window; by the next
+        # iteration, moved views are back in one
+        GLib.idle_add(self.forget_if_removed, web_view)
+
+    def forget_if_removed(self, web_view: "WebKit.WebView"):
+        if web_view.get_root() is not None:
+            return GLib.SOURCE_REMOVE
+
+        for process_views in self.processes:
+            if web_view in process_views:
+                process_views.remove(web_view)
+                if not process_views:
+                    self.processes.remove(process_views)
+                break
+
+        return GLib.SOURCE_REMOVE
+
+
+web_views = WebViews()
@@ -0,0 +1,75 @@
+"""Benchmarks over synthetic docsets.
+
+    python -m tests.benchmarks --rows 10000 100000 --output results.json
+    python -m tests.benchmarks --baseline tests/benchmarks/baseline.json
+
+Generated docsets are kept in --data-dir and reused by later runs. Results are
+written as JSON; with a baseline, the run fails when a median gets slower than
+the baseline by more than --threshold.
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from .generator import SCHEMAS, generate_docset
+from .runner import compare, isolate_user_dirs, load_baseline, write_results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m tests.benchmarks", description="DocoLoco benchmarks"
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000], help="docset sizes"
+    )
+    parser.add_argument("--schema", nargs="+", choices=SCHEMAS, default=list(SCHEMAS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "docoloco-benchmarks",
+    )
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against these results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown against the baseline, as a fraction",
+    )
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    isolate_user_dirs(args.data_dir)
+
+    from .suite import benchmark_docset
+
+    results = []
+    for schema in args.schema:
+        for rows in args.rows:
+            root_path = args.data_dir / f"{schema}_{rows}"
+            print(f"{schema} docset with {rows} rows")
+            generated = generate_docset(root_path, rows, schema)
+            results.extend(benchmark_docset(generated, root_path, args.repeat))
+
+    if args.output:
+        write_results(args.output, results)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        print(f"Compared with {args.baseline}")
+        regressions = compare(results, load_baseline(args.baseline), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
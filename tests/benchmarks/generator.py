@@ -0,0 +1,251 @@
+import html
+import json
+import random
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+DASH = "dash"
+ZDASH = "zdash"
+SCHEMAS = (DASH, ZDASH)
+
+# Roughly the mix of an API reference docset, as (DASH type, ZDASH type, weight)
+SYMBOL_TYPES: List[Tuple[str, str, int]] = [
+    ("Method", "instm", 30),
+    ("Function", "func", 14),
+    ("Property", "instp", 12),
+    ("Class", "cl", 8),
+    ("Constant", "econst", 8),
+    ("Variable", "var", 5),
+    ("Field", "Field", 5),
+    ("Enum", "enum", 3),
+    ("Macro", "macro", 3),
+    ("Type", "tdef", 3),
+    ("Constructor", "constructor", 2),
+    ("Interface", "intf", 2),
+    ("Module", "Module", 2),
+    ("Guide", "Guide", 1),
+    ("Section", "Section", 2),
+]
+
+SYLLABLES = [
+    "al", "be", "ca", "do", "el", "fi", "ga", "ho", "in", "ju", "ka", "lo", "me",
+    "no", "op", "pa", "qu", "re", "si", "to", "ul", "va", "wi", "xe", "yo", "ze",
+]  # fmt: skip
+
+VERBS = ["get", "set", "add", "remove", "find", "load", "parse", "read", "write"]
+
+SYMBOLS_PER_PAGE = 40
+
+
+class Symbol(NamedTuple):
+    name: str
+    dash_type: str
+    zdash_type: str
+    page: str
+    anchor: str
+
+
+class GeneratedDocSet(NamedTuple):
+    name: str
+    path: Path
+    schema: str
+    rows: int
+    pages: List[str]
+    names: List[str]
+
+
+def word(rng: random.Random, syllables: int = 3) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+
+def generate_symbols(rows: int, seed: int = 0) -> Iterator[Symbol]:
+    """`rows` symbols grouped into pages of modules and classes, named like
+    `module.Class.get_value` so that prefix and substring queries both match
+    """
+
+    rng = random.Random(seed)
+    types, weights = list(zip(*((t[:2], t[2]) for t in SYMBOL_TYPES)))
+
+    page_count = max(1, rows // SYMBOLS_PER_PAGE)
+    modules = [word(rng, 2) for _ in range(max(1, page_count // 20))]
+    class_names = [f"{word(rng, 3).capitalize()}{page}" for page in range(page_count)]
+
+    for row in range(rows):
+        page_number = row % page_count
+        module = modules[page_number % len(modules)]
+        class_name = class_names[page_number]
+        page = f"{module}/{class_name}.html"
+
+        dash_type, zdash_type = rng.choices(types, weights)[0]
+        member = f"{rng.choice(VERBS)}_{word(rng, 2)}{row}"
+        if dash_type in ("Class", "Interface", "Module"):
+            name = f"{module}.{class_name}"
+        else:
+            name = f"{module}.{class_name}.{member}"
+
+        yield Symbol(name, dash_type, zdash_type, page, f"//apple_ref/{member}")
+
+
+def write_documents(documents_dir: Path, pages: Dict[str, List[Symbol]]):
+    for page, symbols in pages.items():
+        page_path = documents_dir / page
+        page_path.parent.mkdir(parents=True, exist_ok=True)
+
+        body = "\n".join(
+            f'<h2><a name="{html.escape(symbol.anchor)}"></a>{html.escape(symbol.name)}</h2>'
+            f"<p>{html.escape(symbol.dash_type)} documentation for {html.escape(symbol.name)}.</p>"
+            for symbol in symbols
+        )
+        page_path.write_text(
+            f"<html><head><title>{html.escape(page)}</title></head>"
+            f"<body><h1>{html.escape(page)}</h1>\n{body}\n</body></html>",
+            encoding="utf-8",
+        )
+
+    (documents_dir / "index.html").write_text(
+        "<html><body><ul>"
+        + "".join(f'<li><a href="{page}">{page}</a></li>' for page in pages)
+        + "</ul></body></html>",
+        encoding="utf-8",
+    )
+
+
+def write_dash_index(database_path: Path, symbols: List[Symbol]):
+    con = sqlite3.connect(database_path)
+    con.executescript("""
+        CREATE TABLE searchIndex(id INTEGER PRIMARY KEY, name TEXT, type TEXT, path TEXT);
+        CREATE UNIQUE INDEX anchor ON searchIndex (name, type, path);
+        """)
+    con.executemany(
+        "INSERT OR IGNORE INTO searchIndex(name, type, path) VALUES (?, ?, ?)",
+        (
+            (symbol.name, symbol.dash_type, f"{symbol.page}#{symbol.anchor}")
+            for symbol in symbols
+        ),
+    )
+    con.commit()
+    con.close()
+
+
+def write_zdash_index(database_path: Path, symbols: List[Symbol]):
+    """The Core Data tables of a ZDASH docset, and the `searchIndex` view that
+    Zeal creates over them
+    """
+
+    con = sqlite3.connect(database_path)
+    con.executescript("""
+        CREATE TABLE ZTOKENTYPE (Z_PK INTEGER PRIMARY KEY, ZTYPENAME VARCHAR);
+        CREATE TABLE ZFILEPATH (Z_PK INTEGER PRIMARY KEY, ZPATH VARCHAR);
+        CREATE TABLE ZTOKENMETAINFORMATION (
+            Z_PK INTEGER PRIMARY KEY, ZFILE INTEGER, ZANCHOR VARCHAR
+        );
+        CREATE TABLE ZTOKEN (
+            Z_PK INTEGER PRIMARY KEY,
+            ZTOKENNAME VARCHAR,
+            ZTOKENTYPE INTEGER,
+            ZMETAINFORMATION INTEGER
+        );
+        CREATE VIEW searchIndex AS
+            SELECT ztokenname AS name, ztypename AS type, zpath AS path,
+                zanchor AS fragment
+            FROM ztoken
+            INNER JOIN ztokenmetainformation
+                ON ztoken.zmetainformation = ztokenmetainformation.z_pk
+            INNER JOIN zfilepath ON ztokenmetainformation.zfile = zfilepath.z_pk
+            INNER JOIN ztokentype ON ztoken.ztokentype = ztokentype.z_pk;
+        """)
+
+    type_ids: Dict[str, int] = dict()
+    file_ids: Dict[str, int] = dict()
+    for symbol in symbols:
+        type_ids.setdefault(symbol.zdash_type, len(type_ids) + 1)
+        file_ids.setdefault(symbol.page, len(file_ids) + 1)
+
+    con.executemany(
+        "INSERT INTO ZTOKENTYPE VALUES (?, ?)", ((v, k) for k, v in type_ids.items())
+    )
+    con.executemany(
+        "INSERT INTO ZFILEPATH VALUES (?, ?)", ((v, k) for k, v in file_ids.items())
+    )
+    con.executemany(
+        "INSERT INTO ZTOKENMETAINFORMATION VALUES (?, ?, ?)",
+        (
+            (row, file_ids[symbol.page], symbol.anchor)
+            for row, symbol in enumerate(symbols, 1)
+        ),
+    )
+    con.executemany(
+        "INSERT INTO ZTOKEN VALUES (?, ?, ?, ?)",
+        (
+            (row, symbol.name, type_ids[symbol.zdash_type], row)
+            for row, symbol in enumerate(symbols, 1)
+        ),
+    )
+    con.commit()
+    con.close()
+
+
+def write_info_plist(contents_dir: Path, name: str, keyword: str):
+    import plistlib
+
+    with open(contents_dir / "Info.plist", "wb") as plist_file:
+        plistlib.dump(
+            {
+                "CFBundleIdentifier": keyword,
+                "CFBundleName": name,
+                "DocSetPlatformFamily": keyword,
+                "dashIndexFilePath": "index.html",
+                "isDashDocset": True,
+            },
+            plist_file,
+        )
+
+
+def generate_docset(
+    root: Path, rows: int, schema: str = DASH, seed: int = 0
+) -> GeneratedDocSet:
+    """Write `<root>/Bench_<schema>_<rows>.docset`, unless it already exists"""
+
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown docset schema {schema}")
+
+    name = f"Bench_{schema}_{rows}"
+    path = root / f"{name}.docset"
+    contents_dir = path / "Contents"
+    resources_dir = contents_dir / "Resources"
+    database_path = resources_dir / "docSet.dsidx"
+
+    symbols = list(generate_symbols(rows, seed))
+    pages: Dict[str, List[Symbol]] = dict()
+    for symbol in symbols:
+        pages.setdefault(symbol.page, []).append(symbol)
+
+    if not database_path.exists():
+        documents_dir = resources_dir / "Documents"
+        documents_dir.mkdir(parents=True, exist_ok=True)
+
+        keyword = f"bench{schema}"
+        write_info_plist(contents_dir, name, keyword)
+        (path / "meta.json").write_text(
+            json.dumps(
+                {
+                    "name": name,
+                    "title": name.replace("_", " "),
+                    "extra": {"keyword": [keyword]},
+                }
+            )
+        )
+        write_documents(documents_dir, pages)
+
+        partial_path = database_path.with_suffix(".partial")
+        partial_path.unlink(missing_ok=True)
+        if schema == DASH:
+            write_dash_index(partial_path, symbols)
+        else:
+            write_zdash_index(partial_path, symbols)
+        partial_path.rename(database_path)
+
+    return GeneratedDocSet(
+        name, path, schema, rows, list(pages), [symbol.name for symbol in symbols]
+    )
@@ -0,0 +1,277 @@
+"""Replays keystroke traces through `SearchProvider`, as the locator would.
+
+    python -m tests.benchmarks.replay --generate 50 --rows 100000
+    python -m tests.benchmarks.replay --trace keystrokes.jsonl --installed
+
+Traces are recorded by the app when the `keystroke_trace` setting points to a
+file, or generated against a synthetic docset. Searches run for real, but on a
+simulated clock: a keystroke that arrives while the previous search is still
+running waits for it, and that wait counts towards its latency.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+from .generator import DASH, SCHEMAS, generate_docset
+from .runner import (
+    BenchmarkResult,
+    compare,
+    isolate_user_dirs,
+    load_baseline,
+    percentile,
+    write_results,
+)
+
+TYPING_INTERVAL_MS = 110
+SESSION_PAUSE_MS = 1500
+TYPO_PROBABILITY = 0.08
+
+
+class ReplayStats(NamedTuple):
+    latencies_ms: List[float]
+    superseded: int
+    queued: int
+    items_changed: int
+    items_added: int
+    items_removed: int
+
+    def summary(self) -> Dict:
+        count = max(len(self.latencies_ms), 1)
+        return {
+            "keystrokes": len(self.latencies_ms),
+            "p50_ms": percentile(self.latencies_ms, 50),
+            "p95_ms": percentile(self.latencies_ms, 95),
+            "p99_ms": percentile(self.latencies_ms, 99),
+            "max_ms": max(self.latencies_ms, default=0.0),
+            "superseded": self.superseded,
+            "queued": self.queued,
+            "items_changed_per_keystroke": self.items_changed / count,
+            "items_added_per_keystroke": self.items_added / count,
+            "items_removed_per_keystroke": self.items_removed / count,
+        }
+
+
+def generate_trace(
+    names: List[str], docset: str, sessions: int, seed: int = 0
+) -> List[Dict]:
+    """Bursts of typing towards symbol names, with typos, backspaces, pauses and
+    switches in and out of a docset
+    """
+
+    rng = random.Random(seed)
+    events = []
+    at_ms = 0.0
+
+    def type_text(text: str, target_docset: str = None, section: str = None):
+        nonlocal at_ms
+        at_ms += max(30.0, rng.gauss(TYPING_INTERVAL_MS, 40))
+        events.append(
+            {
+                "at_ms": round(at_ms, 1),
+                "text": text,
+                "docset": target_docset,
+                "section": section,
+            }
+        )
+
+    for _ in range(sessions):
+        name = rng.choice(names)
+        in_docset = rng.random() < 0.7
+        target_docset = docset if in_docset else None
+        query = name.split(".")[-1] if in_docset else name.split(".")[0]
+
+        if in_docset:
+            type_text("", target_docset)
+
+        typed = ""
+        for character in query:
+            if rng.random() < TYPO_PROBABILITY:
+                type_text(typed + rng.choice("qxz"), target_docset)
+                type_text(typed, target_docset)
+
+            typed += character
+            type_text(typed, target_docset)
+
+        if in_docset and rng.random() < 0.3:
+            type_text(typed, target_docset, "Method")
+
+        for _ in range(rng.randint(0, 3)):
+            typed = typed[:-1]
+            type_text(typed, target_docset)
+
+        at_ms += SESSION_PAUSE_MS
+
+    return events
+
+
+def replay(events: List[Dict], registry) -> ReplayStats:
+    from docoloco.models import Section
+    from docoloco.search import SearchProvider
+
+    search_provider = SearchProvider()
+    churn = {"changed": 0, "added": 0, "removed": 0}
+
+    def on_items_changed(model, position, removed, added):
+        churn["changed"] += 1
+        churn["added"] += added
+        churn["removed"] += removed
+
+    search_provider.result.connect("items-changed", on_items_changed)
+
+    latencies, superseded, queued = [], 0, 0
+    busy_until = 0.0
+    session_offset = 0.0
+    previous_at = 0.0
+    for index, event in enumerate(events):
+        if event["at_ms"] < previous_at:
+            session_offset += previous_at + SESSION_PAUSE_MS
+        previous_at = event["at_ms"]
+        arrival = session_offset + event["at_ms"]
+
+        docset = None
+        if event.get("docset"):
+            provider_id, name = event["docset"].split(":", 1)
+            docset = registry.get(provider_id, name, 0)
+        if docset is not search_provider.docset:
+            search_provider.docset = docset
+            search_provider.section = None
+
+        section = event.get("section")
+        if docset and section in docset.symbol_counts:
+            search_provider.section = Section(section, docset.symbol_counts[section])
+        else:
+            search_provider.section = None
+
+        started = max(arrival, busy_until)
+        if started > arrival:
+            queued += 1
+
+        search_started = time.perf_counter()
+        search_provider.search(event["text"])
+        busy_until = started + (time.perf_counter() - search_started) * 1000
+        latencies.append(busy_until - arrival)
+
+        next_event = events[index + 1] if index + 1 < len(events) else None
+        if next_event and next_event["at_ms"] >= event["at_ms"]:
+            if session_offset + next_event["at_ms"] < busy_until:
+                superseded += 1
+
+    return ReplayStats(
+        latencies,
+        superseded,
+        queued,
+        churn["changed"],
+        churn["added"],
+        churn["removed"],
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m tests.benchmarks.replay",
+        description="Replay keystroke traces through the search stack",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--trace", type=Path, help="a recorded keystroke trace")
+    source.add_argument(
+        "--generate", type=int, metavar="SESSIONS", help="generate a trace"
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--schema", choices=SCHEMAS, default=DASH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--installed",
+        action="store_true",
+        help="search the installed docsets instead of a synthetic one",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "docoloco-benchmarks",
+    )
+    parser.add_argument("--save-trace", type=Path, help="write the generated trace")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument(
+        "--max-p99", type=float, metavar="MS", help="fail above this p99 latency"
+    )
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.installed:
+        isolate_user_dirs(args.data_dir, ("cache", "config"))
+    else:
+        isolate_user_dirs(args.data_dir)
+
+    from docoloco.config import default_config
+    from docoloco.diagnostics.trace import read_trace, write_trace
+
+    generated = None
+    if not args.installed:
+        docsets_dir = default_config.user_data_dir / "Zeal/Zeal/docsets"
+        generated = generate_docset(docsets_dir, args.rows, args.schema, args.seed)
+
+    if args.trace:
+        events = list(read_trace(args.trace))
+        trace_name = args.trace.stem
+    elif generated:
+        events = generate_trace(
+            generated.names, f"zeal:{generated.name}", args.generate, args.seed
+        )
+        trace_name = f"generated-{args.generate}"
+    else:
+        print("Generated traces need the synthetic docset; pass --trace instead")
+        return 2
+
+    if args.save_trace:
+        write_trace(args.save_trace, events)
+
+    from docoloco.registry import get_registry
+
+    registry = get_registry()
+    registry.initialize_providers()
+
+    stats = replay(events, registry)
+    summary = stats.summary()
+
+    schema = args.schema if generated else "installed"
+    rows = args.rows if generated else 0
+    result = BenchmarkResult(
+        "replay", trace_name, schema, rows, stats.latencies_ms, summary
+    )
+
+    print(f"Replayed {summary['keystrokes']} keystrokes from {trace_name}")
+    for name in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+        print(f"  {name:<30} {summary[name]:>10.2f}")
+    for name in ("superseded", "queued"):
+        print(f"  {name:<30} {summary[name]:>10d}")
+    for name in ("items_changed", "items_added", "items_removed"):
+        key = f"{name}_per_keystroke"
+        print(f"  {key:<30} {summary[key]:>10.1f}")
+
+    if args.output:
+        write_results(args.output, [result])
+
+    failed = False
+    if args.baseline:
+        failed = bool(compare([result], load_baseline(args.baseline), args.threshold))
+
+    if args.max_p99 is not None and summary["p99_ms"] > args.max_p99:
+        print(f"p99 latency {summary['p99_ms']:.2f} ms is above {args.max_p99} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
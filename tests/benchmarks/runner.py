@@ -0,0 +1,129 @@
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple
+
+
+class BenchmarkResult(NamedTuple):
+    benchmark: str
+    case: str
+    schema: str
+    rows: int
+    runs_ms: List[float]
+    extra: Dict = {}
+
+    @property
+    def key(self) -> str:
+        return f"{self.benchmark}[{self.case}]/{self.schema}/{self.rows}"
+
+    @property
+    def median_ms(self) -> float:
+        return statistics.median(self.runs_ms)
+
+    def as_dict(self) -> Dict:
+        return {
+            "key": self.key,
+            "benchmark": self.benchmark,
+            "case": self.case,
+            "schema": self.schema,
+            "rows": self.rows,
+            "min_ms": min(self.runs_ms),
+            "median_ms": self.median_ms,
+            "mean_ms": statistics.fmean(self.runs_ms),
+            "runs_ms": self.runs_ms,
+            **self.extra,
+        }
+
+
+def measure(
+    function: Callable[[], object], repeat: int, setup: Callable[[], None] = None
+) -> List[float]:
+    """Wall time of `repeat` calls of `function` in milliseconds, running
+    `setup` untimed before each call
+    """
+
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+
+        started = time.perf_counter()
+        function()
+        runs.append((time.perf_counter() - started) * 1000)
+
+    return runs
+
+
+def isolate_user_dirs(data_dir: Path, names=("cache", "config", "data")):
+    """Keep the catalogs, indexes and docsets of a benchmark out of the user's own"""
+
+    for name in names:
+        path = data_dir / "xdg" / name
+        path.mkdir(parents=True, exist_ok=True)
+        os.environ[f"XDG_{name.upper()}_HOME"] = path.as_posix()
+
+
+def percentile(values: List[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "sqlite": sqlite3.sqlite_version,
+    }
+
+
+def write_results(path: Path, results: List[BenchmarkResult]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as results_file:
+        json.dump(
+            {
+                "environment": environment(),
+                "results": [result.as_dict() for result in results],
+            },
+            results_file,
+            indent=2,
+        )
+
+
+def load_baseline(path: Path) -> Dict[str, Dict]:
+    with open(path) as baseline_file:
+        return {result["key"]: result for result in json.load(baseline_file)["results"]}
+
+
+def compare(
+    results: List[BenchmarkResult], baseline: Dict[str, Dict], threshold: float
+) -> List[str]:
+    """Print each median next to its baseline, and return the keys that got
+    slower by more than `threshold` (a fraction, e.g. 0.2 for 20%)
+    """
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.key)
+        if not previous:
+            print(f"  {result.key:<56} {result.median_ms:>10.2f} ms   (new)")
+            continue
+
+        change = result.median_ms / previous["median_ms"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "REGRESSION"
+            regressions.append(result.key)
+
+        print(
+            f"  {result.key:<56} {result.median_ms:>10.2f} ms "
+            f"{change * 100:>+7.1f}%  {flag}"
+        )
+
+    return regressions
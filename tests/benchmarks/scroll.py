@@ -0,0 +1,217 @@
+"""Scrolls a long list of doc links up and down, and reports the work per bound
+row for each pass.
+
+    xvfb-run python -m tests.benchmarks.scroll --rows 5000 --passes 10
+
+Rows are recycled as the list scrolls, so a factory that leaves handlers or
+menus behind on every bind gets slower with each pass; `DocLinkFactory` should
+stay flat. The `per-bind` case rebuilds what every bind used to create, for
+comparison. This needs a display, e.g. `xvfb-run` on CI.
+"""
+
+import argparse
+import html
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from .runner import (
+    BenchmarkResult,
+    compare,
+    isolate_user_dirs,
+    load_baseline,
+    write_results,
+)
+
+FACTORY = "DocLinkFactory"
+PER_BIND = "per-bind"
+
+
+def per_bind_factory():
+    """Binds the way list rows did before the shared factories: a new menu,
+    cursor and link handlers on every bind, never disconnected
+    """
+
+    from gi.repository import Gdk, Gio, GLib, Gtk
+
+    def setup(factory, list_item):
+        box = Gtk.Box()
+        box.append(Gtk.Image())
+        box.append(Gtk.Label())
+        list_item.set_child(box)
+
+    def bind(factory, list_item):
+        label = list_item.get_child().get_last_child()
+        doc = list_item.get_item()
+        label.set_markup(
+            f"<a href='{html.escape(doc.url)}'>{html.escape(doc.name)}</a>"
+        )
+        label.set_cursor(Gdk.Cursor.new_from_name("pointer"))
+        label.set_tooltip_text(doc.name)
+        label.connect("activate-link", lambda *_: True)
+        label.connect("activate-current-link", lambda *_: True)
+
+        menu = Gio.Menu()
+        menu.append(
+            "Open In New Tab",
+            f"win.open_in_new_tab({GLib.Variant('(sss)', (doc.url, 'zeal', 'x'))})",
+        )
+        label.set_extra_menu(menu)
+
+    factory = Gtk.SignalListItemFactory()
+    factory.connect("setup", setup)
+    factory.connect("bind", bind)
+
+    return factory
+
+
+def scroll_passes(case: str, rows: int, passes: int) -> List[float]:
+    """The work per bound row of each pass, in milliseconds"""
+
+    from gi.repository import Gio, GLib, Gtk
+
+    from docoloco.models import Doc
+    from docoloco.widgets.factories import DocLinkFactory
+
+    store = Gio.ListStore(item_type=Doc)
+    store.splice(
+        0,
+        0,
+        [
+            Doc(f"module{i % 50}.Class{i}.method_{i}", "Method", f"{i}.html#m{i}")
+            for i in range(rows)
+        ],
+    )
+
+    factory = (
+        DocLinkFactory(lambda: None, lambda *_: None)
+        if case == FACTORY
+        else per_bind_factory()
+    )
+    binds = [0]
+    factory.connect_after("bind", lambda *_: binds.__setitem__(0, binds[0] + 1))
+
+    list_view = Gtk.ListView(model=Gtk.NoSelection(model=store), factory=factory)
+    scrolled_window = Gtk.ScrolledWindow(child=list_view)
+    window = Gtk.Window(default_width=400, default_height=600, child=scrolled_window)
+    window.present()
+
+    context = GLib.MainContext.default()
+    frames = [0]
+
+    def on_tick(*_):
+        frames[0] += 1
+        return GLib.SOURCE_CONTINUE
+
+    list_view.add_tick_callback(on_tick)
+
+    def next_frame() -> float:
+        """Wait for the next frame, and return the time spent working on it"""
+
+        frame = frames[0]
+        while frames[0] == frame:
+            context.iteration(True)
+
+        started = time.perf_counter()
+        while context.pending():
+            context.iteration(False)
+
+        return time.perf_counter() - started
+
+    next_frame()
+    adjustment = scrolled_window.get_vadjustment()
+
+    results = []
+    for scroll_pass in range(passes):
+        binds[0] = 0
+        work = 0.0
+
+        step = adjustment.get_page_size() / 2
+        upper = adjustment.get_upper() - adjustment.get_page_size()
+        value = 0.0 if scroll_pass % 2 == 0 else upper
+        direction = 1 if scroll_pass % 2 == 0 else -1
+        while 0.0 <= value <= upper:
+            adjustment.set_value(value)
+            work += next_frame()
+            value += direction * step
+
+        results.append(work * 1000 / max(binds[0], 1))
+
+    window.destroy()
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m tests.benchmarks.scroll",
+        description="Measure list item bind cost while scrolling",
+    )
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--passes", type=int, default=10)
+    parser.add_argument(
+        "--case", nargs="+", choices=(FACTORY, PER_BIND), default=[FACTORY, PER_BIND]
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "docoloco-benchmarks",
+    )
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=0.5,
+        help=f"fail when the last pass of {FACTORY} is slower than the first by "
+        "more than this fraction",
+    )
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    isolate_user_dirs(args.data_dir)
+
+    import gi
+
+    gi.require_version("Gtk", "4.0")
+    from gi.repository import Gdk
+
+    if not Gdk.Display.get_default():
+        print("No display; run the scroll benchmark under xvfb-run")
+        return 2
+
+    results = []
+    failed = False
+    for case in args.case:
+        runs = scroll_passes(case, args.rows, args.passes)
+        growth = runs[-1] / runs[0] - 1 if runs[0] else 0.0
+        results.append(
+            BenchmarkResult(
+                "scroll_bind", case, "list", args.rows, runs, {"growth": growth}
+            )
+        )
+
+        print(f"{case} ({args.rows} rows), ms of work per bound row:")
+        print("  " + " ".join(f"{run:.3f}" for run in runs))
+        print(f"  growth from the first to the last pass: {growth * 100:+.1f}%")
+
+        if case == FACTORY and growth > args.max_growth:
+            print(f"  {FACTORY} slowed down over {args.passes} passes")
+            failed = True
+
+    if args.output:
+        write_results(args.output, results)
+
+    if args.baseline:
+        failed |= bool(compare(results, load_baseline(args.baseline), args.threshold))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
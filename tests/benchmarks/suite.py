@@ -0,0 +1,121 @@
+from pathlib import Path
+from typing import List
+
+from .generator import GeneratedDocSet
+from .runner import BenchmarkResult, measure
+
+
+def wait_for_background_work(provider):
+    """Let the catalog finish its Bloom filters so they don't skew the timings"""
+
+    update_thread = provider.catalog._update_thread
+    if update_thread:
+        update_thread.join()
+
+
+def search_terms(generated: GeneratedDocSet):
+    name = generated.names[len(generated.names) // 2]
+    module, class_name = name.split(".")[:2]
+    member = name.split(".")[-1]
+
+    return {
+        "exact": name,
+        "prefix": f"{module}.{class_name[:3]}",
+        "substring": member[2:8],
+        "short": member[:2],
+        "missing": "zzqqxx",
+    }
+
+
+def benchmark_docset(
+    generated: GeneratedDocSet, root_path: Path, repeat: int
+) -> List[BenchmarkResult]:
+    from docoloco.providers.dash import DashProvider
+    from docoloco.registry import Registry
+
+    results: List[BenchmarkResult] = []
+
+    def add(benchmark: str, case: str, runs: List[float], **extra):
+        result = BenchmarkResult(
+            benchmark, case, generated.schema, generated.rows, runs, extra
+        )
+        results.append(result)
+        print(f"  {result.key:<56} {result.median_ms:>10.2f} ms")
+
+    def new_provider():
+        return DashProvider(id="bench", name="Benchmark", root_path=root_path)
+
+    providers = []
+
+    def load():
+        provider = new_provider()
+        provider.load(start_background=True)
+        providers.append(provider)
+
+    add("DashProvider.load", "cold", measure(load, repeat))
+    for loaded in providers:
+        wait_for_background_work(loaded)
+
+    provider = providers[-1]
+    docset = provider.docs[generated.name]
+
+    def reset_counts():
+        docset.symbol_strings = dict()
+        docset.symbol_counts = dict()
+
+    add("count_symbols", "all", measure(docset.count_symbols, repeat, reset_counts))
+
+    terms = search_terms(generated)
+    for case, term in terms.items():
+        add("search", case, measure(lambda: docset.search(term), repeat))
+
+    largest_section = max(docset.symbol_counts, key=docset.symbol_counts.get)
+
+    def reset_sections():
+        docset.sections = dict()
+
+    add(
+        "populate_section",
+        "first page",
+        measure(
+            lambda: docset.populate_section(largest_section), repeat, reset_sections
+        ),
+    )
+
+    def populate_pages():
+        for _ in range(10):
+            docset.populate_section(largest_section)
+
+    add(
+        "populate_section",
+        "ten pages",
+        measure(populate_pages, repeat, reset_sections),
+    )
+
+    page_url = docset.get_uri_to(generated.pages[len(generated.pages) // 2])
+    add(
+        "related_docs_of",
+        "page",
+        measure(lambda: docset.related_docs_of(page_url), repeat),
+    )
+
+    names = generated.names[:: max(1, len(generated.names) // 1000)][:1000]
+    runs = measure(lambda: docset.resolve_symbols(names), repeat)
+    add(
+        "resolve_symbols",
+        f"{len(names)} names",
+        runs,
+        names_per_second=len(names) / (min(runs) / 1000),
+    )
+
+    registry = Registry(providers=[provider])
+    keyword = next(iter(docset.keywords))
+    queries = {
+        "docsets": generated.name[:5].lower(),
+        "keyword": f"{keyword}:{terms['prefix']}",
+        "symbols": f"/symbols {terms['substring']}",
+    }
+    for case, query in queries.items():
+        add("Registry.search", case, measure(lambda: registry.search(query), repeat))
+
+    return results
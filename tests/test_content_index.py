@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from docoloco.index.content import DOCUMENT_SUFFIXES, DocSetContentIndex
+from docoloco.index.manifest import DocSetManifest
+
+
+def page(title: str, body: str) -> str:
+    return f"<html><head><title>{title}</title></head><body>{body}</body></html>"
+
+
+class ContentIndexUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.temporary_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temporary_dir.name)
+
+        self.documents_dir = self.root / "Documents"
+        self.documents_dir.mkdir()
+        self.write("socket.html", page("socket", "Set SO_REUSEPORT before binding."))
+        self.write("select.html", page("select", "Wait for file descriptors."))
+        self.write("signal.html", page("signal", "Handle SIGINT."))
+
+        self.stored_paths = []
+        self.index = self.open_index()
+        self.index.update()
+        self.stored_paths.clear()
+
+    def tearDown(self):
+        self.index.con.close()
+        self.temporary_dir.cleanup()
+
+    def write(self, path: str, text: str):
+        # Docset updates replace files, which changes the directory's mtime
+        temporary_path = self.documents_dir / f"{path}.tmp"
+        temporary_path.write_text(text)
+        os.replace(temporary_path, self.documents_dir / path)
+        self.touch_documents_dir()
+
+    def touch_documents_dir(self):
+        stat = os.stat(self.documents_dir)
+        os.utime(self.documents_dir, (stat.st_atime, stat.st_mtime + 1))
+
+    def open_index(self) -> DocSetContentIndex:
+        manifest = DocSetManifest(
+            self.root / "content.manifest.json",
+            self.documents_dir,
+            self.root / "docSet.dsidx",
+            suffixes=DOCUMENT_SUFFIXES,
+        )
+        index = DocSetContentIndex(
+            self.root / "content.sqlite", self.documents_dir, manifest, max_workers=1
+        )
+
+        store_document = index._store_document
+
+        def record_stored_path(con, path, title, text):
+            self.stored_paths.append(path)
+            store_document(con, path, title, text)
+
+        index._store_document = record_stored_path
+        return index
+
+    def document_rows(self):
+        return dict(self.index.con.execute("SELECT path, id FROM documents").fetchall())
+
+    def test_reindexes_only_changed_documents(self):
+        rows = self.document_rows()
+        files = dict(self.index.manifest.files)
+
+        self.write("socket.html", page("socket", "Set SO_REUSEADDR instead."))
+        (self.documents_dir / "signal.html").unlink()
+        self.touch_documents_dir()
+
+        index = self.open_index()
+        index.update()
+        index.con.close()
+        self.index.con.close()
+        self.index = self.open_index()
+
+        self.assertEqual(self.stored_paths, ["socket.html"])
+        self.assertEqual(
+            self.document_rows(),
+            {"socket.html": rows["socket.html"], "select.html": rows["select.html"]},
+        )
+        self.assertEqual(self.index.search("reuseport"), [])
+        self.assertEqual(
+            [match.path for match in self.index.search("reuseaddr")], ["socket.html"]
+        )
+
+        manifest_files = self.index.manifest.files
+        self.assertEqual(manifest_files["select.html"], files["select.html"])
+        self.assertNotEqual(manifest_files["socket.html"], files["socket.html"])
+        self.assertNotIn("signal.html", manifest_files)
+
+    def test_skips_rewritten_documents_with_the_same_content(self):
+        self.write("select.html", page("select", "Wait for file descriptors."))
+
+        self.index.update()
+
+        self.assertEqual(self.stored_paths, [])
+        self.assertTrue(self.index.manifest.check().is_empty)
+
+    def test_skips_an_unchanged_docset(self):
+        self.index.update()
+
+        self.assertEqual(self.stored_paths, [])
+        self.assertEqual(len(self.document_rows()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()